@@ -0,0 +1,262 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# An entry is (stored_at, value); value is already JSON-compatible.
+CacheEntry = Tuple[float, Any]
+
+VERSION_TTL = 30 * 24 * 3600
+
+
+class MemoryCacheBackend:
+    """Per-process LRU. Each uvicorn worker keeps its own copy."""
+
+    blocking = False
+    shared = False
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return stored_at, value
+
+    def set(self, key: str, value: Any, stored_at: float, expire_in: float):
+        with self._lock:
+            self._entries[key] = (stored_at, stored_at + expire_in, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+
+class SQLiteCacheBackend:
+    """Cache stored in a standalone SQLite file, shared by all workers on the host."""
+
+    blocking = True
+    shared = True
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    stored_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    value TEXT NOT NULL
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT stored_at, value FROM response_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def set(self, key: str, value: Any, stored_at: float, expire_in: float):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, stored_at, expires_at, value) VALUES (?, ?, ?, ?)",
+                (key, stored_at, stored_at + expire_in, json.dumps(value))
+            )
+            conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+
+    def delete_prefix(self, prefix: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM response_cache WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+
+class RedisCacheBackend:
+    """Cache in Redis or any server speaking its protocol (KeyDB, Valkey, Dragonfly)."""
+
+    blocking = True
+    shared = True
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("The redis cache backend requires the 'redis' package") from e
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raw = self._client.get(key)
+        if raw is None:
+            return None
+        payload = json.loads(raw)
+        return payload["stored_at"], payload["value"]
+
+    def set(self, key: str, value: Any, stored_at: float, expire_in: float):
+        payload = json.dumps({"stored_at": stored_at, "value": value})
+        self._client.set(key, payload, px=max(int(expire_in * 1000), 1))
+
+    def delete_prefix(self, prefix: str):
+        keys = list(self._client.scan_iter(match=f"{prefix}*"))
+        if keys:
+            self._client.delete(*keys)
+
+
+class ResponseCache:
+    """
+    Time-boxed cache for expensive read endpoints.
+
+    Fresh entries (younger than ttl) are served directly. Entries within the
+    following stale_ttl window are served immediately while a single background
+    refresh recomputes them. Concurrent misses for the same key in a worker
+    share one computation.
+    """
+
+    def __init__(self, backend, namespace: str = ""):
+        self.backend = backend
+        self.namespace = namespace
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def _call(self, fn, *args):
+        if self.backend.blocking:
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: float, stale_ttl: float = 0):
+        key = self.namespace + key
+        try:
+            entry = await self._call(self.backend.get, key)
+        except Exception as e:
+            logger.warning(f"Cache read failed for {key}: {e}")
+            entry = None
+
+        if entry is not None:
+            stored_at, value = entry
+            age = time.time() - stored_at
+            if age < ttl:
+                return value
+            if age < ttl + stale_ttl:
+                if key not in self._inflight:
+                    self._start_refresh(key, compute, ttl + stale_ttl)
+                return value
+
+        task = self._inflight.get(key) or self._start_refresh(key, compute, ttl + stale_ttl)
+        return await asyncio.shield(task)
+
+    async def current_version(self, scope: str) -> Optional[str]:
+        """
+        Version the entries of scope are stored under, None when it cannot be
+        read. A missing version (never set, expired or evicted) is replaced by
+        a fresh one instead of a fixed default, so entries stored under an
+        earlier version can never come back.
+        """
+        try:
+            entry = await self._call(self.backend.get, f"{self.namespace}version:{scope}")
+        except Exception as e:
+            logger.warning(f"Cache version read failed for {scope}: {e}")
+            return None
+        if entry is not None:
+            return entry[1]
+        return await self.bump_version(scope)
+
+    async def bump_version(self, scope: str) -> Optional[str]:
+        """
+        Move scope to a fresh version so entries computed before the change are
+        never served again, including ones still being computed right now.
+        """
+        if not self.backend.shared:
+            return None
+        version = uuid.uuid4().hex
+        try:
+            await self._call(
+                self.backend.set, f"{self.namespace}version:{scope}", version, time.time(), VERSION_TTL
+            )
+        except Exception as e:
+            logger.error(f"Cache version bump failed for {scope}: {e}")
+            return None
+        return version
+
+    async def get_versioned(self, scope: str, key: str, compute: Callable[[], Any], ttl: float, stale_ttl: float = 0):
+        """
+        get_or_compute under the current version of scope. A bump has to reach
+        every worker, so versioned entries are only cached on a shared backend;
+        with the per-process memory backend every call computes.
+        """
+        version = await self.current_version(scope) if self.backend.shared else None
+        if version is None:
+            return await run_in_threadpool(compute)
+        return await self.get_or_compute(f"{scope}:{version}:{key}", compute, ttl, stale_ttl)
+
+    async def invalidate(self, prefix: str = ""):
+        await self._call(self.backend.delete_prefix, self.namespace + prefix)
+
+    def _start_refresh(self, key: str, compute: Callable[[], Any], expire_in: float) -> asyncio.Future:
+        task = asyncio.ensure_future(self._refresh(key, compute, expire_in))
+        self._inflight[key] = task
+
+        def _done(t: asyncio.Future):
+            if self._inflight.get(key) is t:
+                del self._inflight[key]
+            if not t.cancelled() and t.exception() is not None:
+                logger.error(f"Cache refresh failed for {key}: {t.exception()}")
+
+        task.add_done_callback(_done)
+        return task
+
+    async def _refresh(self, key: str, compute: Callable[[], Any], expire_in: float):
+        stored_at = time.time()
+        value = jsonable_encoder(await run_in_threadpool(compute))
+        try:
+            await self._call(self.backend.set, key, value, stored_at, expire_in)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+        return value
+
+
+def build_cache_backend(kind: str, url: Optional[str] = None, max_entries: int = 256):
+    if kind == "memory":
+        return MemoryCacheBackend(max_entries=max_entries)
+    if kind == "sqlite":
+        return SQLiteCacheBackend(url or "response_cache.db")
+    if kind == "redis":
+        return RedisCacheBackend(url or "redis://localhost:6379/0")
+    raise ValueError(f"Unknown cache backend: {kind}")
+
+
+cache_backend = build_cache_backend(settings.CACHE_BACKEND, settings.CACHE_URL, settings.CACHE_MAX_ENTRIES)
+
+stats_cache = ResponseCache(cache_backend, namespace="stats:")
+
+# Tags, categories and statuses; versioned per scope and bumped on every change.
+# Only caches on a shared backend (CACHE_BACKEND=sqlite or redis).
+reference_cache = ResponseCache(cache_backend, namespace="reference:")
@@ -11,14 +11,108 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "novie-lyudi-secret-key-2024"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
+    USER_CACHE_TTL: int = 30
+    USER_CACHE_MAX_ENTRIES: int = 1024
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # thread | process
+    PASSWORD_HASH_WORKERS: int = 2
     UPLOAD_DIR: str = "uploads"
     
+    CACHE_BACKEND: str = "memory"  # memory | sqlite | redis
+    CACHE_URL: Optional[str] = None  # file path for sqlite, redis:// URL for redis
+    CACHE_MAX_ENTRIES: int = 256
+    STATS_CACHE_STALE_TTL: int = 60
+    STATS_CACHE_TTL_SUMMARY: int = 30
+    STATS_CACHE_TTL_TIMELINE: int = 60
+    STATS_CACHE_TTL_MODERATORS: int = 60
+    STATS_CACHE_TTL_BY_PERIOD: int = 30
+    REFERENCE_CACHE_TTL: int = 300
+    
+    SQLITE_PROFILE: bool = True
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_WRITE_QUEUE: bool = False
+    SQLITE_WRITE_QUEUE_MAX_BATCH: int = 64
+    SQLITE_WRITE_QUEUE_MAX_WAIT_MS: int = 0
+    
+    READ_REPLICA_URLS: str = ""  # comma-separated; empty sends reads to the primary
+    READ_REPLICA_RETRY_SECONDS: int = 30
+    READ_YOUR_WRITES_SECONDS: int = 5
+    READ_PIN_COOKIE: str = "read_pin"
+    
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROC_DIR: Optional[str] = None  # shared by uvicorn workers for aggregated /metrics
+    METRICS_FLUSH_SECONDS: int = 5
+    
+    SQL_PROFILER: bool = False  # development only: per-request statement profile
+    SQL_PROFILER_REPEAT_THRESHOLD: int = 5
+    
+    SLOW_QUERY_THRESHOLD_MS: int = 500  # 0 disables the slow-query log
+    SLOW_QUERY_MAX_SHAPES: int = 200
+    SLOW_QUERY_EXPLAIN: bool = False
+    SLOW_QUERY_EXPLAIN_INTERVAL: int = 300
+    SLOW_QUERY_EXPLAIN_FILE: str = "logs/slow_queries.log"
+    SLOW_QUERY_EXPLAIN_MAX_BYTES: int = 5 * 1024 * 1024
+    SLOW_QUERY_EXPLAIN_BACKUPS: int = 3
+    
+    EVENT_BROKER: str = "memory"  # memory | redis
+    EVENT_BROKER_URL: Optional[str] = None
+    EVENT_QUEUE_SIZE: int = 256
+    
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory | redis (shared by all workers)
+    RATE_LIMIT_REDIS_URL: Optional[str] = None
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    RATE_LIMIT_TRUSTED_PROXIES: str = ""  # IPs/CIDRs whose X-Real-IP / X-Forwarded-For are believed
+    APPEAL_IP_RATE_PER_MINUTE: float = 2.0
+    APPEAL_IP_BURST: int = 10
+    APPEAL_TELEGRAM_RATE_PER_MINUTE: float = 1.0
+    APPEAL_TELEGRAM_BURST: int = 5
+    UPLOAD_MAX_CONCURRENT: int = 16
+    UPLOAD_ADMISSION_TIMEOUT: float = 1.0
+    UPLOAD_RETRY_AFTER: int = 2
+    
+    DUPLICATE_INDEX_ENABLED: bool = True
+    DUPLICATE_INDEX_MAX_APPEALS: int = 1_000_000  # newest appeals kept in the near-duplicate index
+    DUPLICATE_LSH_BANDS: int = 10
+    DUPLICATE_LSH_ROWS: int = 4
+    DUPLICATE_SIMILARITY: float = 0.6
+    DUPLICATE_AUTO_TAG: bool = False  # tag new appeals that match an earlier one
+    DUPLICATE_TAG_NAME: str = "Дубликат"
+    
+    CATEGORIZER_ENABLED: bool = True  # needs numpy and scipy
+    CATEGORIZER_MODEL_PATH: str = "category_model.npz"  # shared by the workers; one of them trains
+    CATEGORIZER_TRAIN_IN_WORKERS: bool = True  # false: only `python -m app.services.categorizer` trains
+    CATEGORIZER_RETRAIN_SECONDS: int = 3600
+    CATEGORIZER_RELOAD_SECONDS: int = 30
+    CATEGORIZER_MAX_TRAINING: int = 200_000
+    CATEGORIZER_MAX_FEATURES: int = 50_000
+    CATEGORIZER_MIN_EXAMPLES: int = 5
+    
+    ARCHIVE_ENABLED: bool = False  # move long-closed appeals out of the hot tables
+    ARCHIVE_AFTER_DAYS: int = 180  # untouched for this long after closing
+    ARCHIVE_STATUSES: str = "resolved,rejected"
+    ARCHIVE_INTERVAL_SECONDS: int = 3600
+    ARCHIVE_BATCH_SIZE: int = 200
+    
+    TRACING_ENABLED: bool = False
+    TRACE_EXPORT_FILE: str = "logs/traces.jsonl"  # empty: spans go to the log
+    TRACE_EXPORT_MAX_BYTES: int = 20 * 1024 * 1024
+    TRACE_EXPORT_BACKUPS: int = 3
+    
+    STARTUP_BUDGET_MS: int = 3000  # cold start (import + lifespan) checked by python -m app.core.startup
+    
     class Config:
         env_file = str(env_path)
         env_file_encoding = 'utf-8'
     
     def get_database_url(self) -> str:
         if self.USE_SQLITE:
+            # docker-compose points both services at the shared sqlite_data volume
+            if self.DATABASE_URL.startswith("sqlite"):
+                return self.DATABASE_URL
             return "sqlite:///./citizens_appeals.db"
         return self.DATABASE_URL
 
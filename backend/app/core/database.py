@@ -1,29 +1,89 @@
-from sqlalchemy import create_engine
+import itertools
+import logging
+import time
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
+from app.core.metrics import TimedQueuePool, instrument_engine
+from app.core.sql_profiler import profile_engine
+from app.core.slow_queries import watch_engine
+
+logger = logging.getLogger(__name__)
 
 database_url = settings.get_database_url()
 
-connect_args = {}
-engine_kwargs = {}
-
-if database_url.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
-else:
-    engine_kwargs = {
-        "pool_size": 5,
-        "max_overflow": 10,
-        "pool_timeout": 30,
-        "pool_recycle": 1800,
-        "pool_pre_ping": True,
-    }
-
-engine = create_engine(
-    database_url,
-    connect_args=connect_args,
-    **engine_kwargs
-)
+
+def sqlite_pragmas():
+    """Connection profile for SQLite shared by the API and the bot."""
+    return [
+        "PRAGMA journal_mode=WAL",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def apply_sqlite_profile(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def check_sqlite_profile(bind) -> dict:
+    """Read the effective pragmas back; WAL silently falls back on some filesystems."""
+    with bind.connect() as conn:
+        status = {
+            name: conn.execute(text(f"PRAGMA {name}")).scalar()
+            for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "temp_store")
+        }
+    if str(status["journal_mode"]).lower() != "wal":
+        logger.warning(f"SQLite is not in WAL mode (journal_mode={status['journal_mode']}); writers will block readers")
+    return status
+
+
+def build_engine(url: str):
+    connect_args = {}
+    engine_kwargs = {}
+    
+    if url.startswith("sqlite"):
+        connect_args = {"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}
+    else:
+        engine_kwargs = {
+            "pool_size": 5,
+            "max_overflow": 10,
+            "pool_timeout": 30,
+            "pool_recycle": 1800,
+            "pool_pre_ping": True,
+        }
+    if settings.METRICS_ENABLED and ":memory:" not in url:
+        engine_kwargs["poolclass"] = TimedQueuePool
+    
+    built = create_engine(
+        url,
+        connect_args=connect_args,
+        **engine_kwargs
+    )
+    
+    if url.startswith("sqlite") and settings.SQLITE_PROFILE:
+        event.listen(built, "connect", apply_sqlite_profile)
+    if settings.METRICS_ENABLED:
+        instrument_engine(built)
+    if settings.SQL_PROFILER:
+        profile_engine(built)
+    if settings.SLOW_QUERY_THRESHOLD_MS > 0:
+        watch_engine(built)
+    return built
+
+
+engine = build_engine(database_url)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -35,3 +95,73 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def run_in_session(fn, *args, **kwargs):
+    """Run fn(db, ...) in a dedicated session, for work that outlives the request."""
+    db = SessionLocal()
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+class ReadRouter:
+    """
+    Hands out sessions for read-only work: replicas from READ_REPLICA_URLS in
+    turn, the primary when there are none, when the caller is pinned after a
+    write, or when every replica failed within READ_REPLICA_RETRY_SECONDS.
+    """
+
+    def __init__(self, urls):
+        self.replicas = [
+            (url, sessionmaker(autocommit=False, autoflush=False, bind=build_engine(url)))
+            for url in urls
+        ]
+        self._turn = itertools.count()
+        self._down_until = {}
+
+    def session(self, pinned: bool = False) -> Session:
+        if pinned or not self.replicas:
+            return SessionLocal()
+        start = next(self._turn)
+        now = time.monotonic()
+        for offset in range(len(self.replicas)):
+            url, factory = self.replicas[(start + offset) % len(self.replicas)]
+            if self._down_until.get(url, 0) > now:
+                continue
+            db = factory()
+            try:
+                # Check out the connection now so a dead replica falls back here
+                db.connection()
+                return db
+            except OperationalError as e:
+                db.close()
+                self._down_until[url] = now + settings.READ_REPLICA_RETRY_SECONDS
+                logger.warning(f"Read replica unavailable, falling back: {e.orig}")
+        return SessionLocal()
+
+
+read_router = ReadRouter([url.strip() for url in settings.READ_REPLICA_URLS.split(",") if url.strip()])
+
+
+def is_read_pinned(request: Request) -> bool:
+    """True while the read-your-writes cookie set after a mutation is fresh."""
+    try:
+        return float(request.cookies.get(settings.READ_PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def get_read_db(request: Request):
+    db = read_router.session(pinned=is_read_pinned(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+def run_in_read_session(fn, *args, **kwargs):
+    """run_in_session on a replica, for shared read-only work such as stats."""
+    db = read_router.session()
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
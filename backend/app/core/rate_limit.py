@@ -0,0 +1,212 @@
+"""
+Rate limiting and upload admission control for the public appeal form.
+
+Token buckets refill at a steady rate up to a burst size; a request takes one
+token or is refused with the time until the next one. Buckets live in this
+worker (bounded LRU) or, with RATE_LIMIT_BACKEND=redis, in Redis so every
+worker shares them.
+
+PublicFormGuard runs before the multipart body is read, so a refused request
+costs no disk I/O:
+- POST /api/appeals takes a token from the client IP's bucket
+- every multipart POST (appeals, comments) needs one of
+  UPLOAD_MAX_CONCURRENT upload slots; when none frees up within
+  UPLOAD_ADMISSION_TIMEOUT seconds the request gets 429 instead of queueing
+Both refusals carry Retry-After. The telegram_user_id bucket is checked in
+create_appeal, once the form is parsed.
+"""
+import asyncio
+import ipaddress
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+REQUESTS_REJECTED = registry.counter(
+    "http_requests_rejected_total", "Requests refused by rate limiting or admission control.", ("reason",)
+)
+
+
+class TokenBucketLimiter:
+    """`rate` tokens per second up to `burst` per key, for at most max_keys keys."""
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    async def acquire(self, key: str) -> float:
+        """0 when a token was taken, else seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            bucket = [float(self.burst), now]
+            if len(self._buckets) >= self.max_keys:
+                # The least recently seen key forgets its history: a full bucket again
+                self._buckets.popitem(last=False)
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        bucket[0], bucket[1] = tokens, now
+        self._buckets[key] = bucket
+        return wait
+
+
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisTokenBucketLimiter:
+    """Same buckets kept in Redis by an atomic script; allows requests when Redis is down."""
+
+    def __init__(self, url: str, prefix: str, rate: float, burst: int):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("The redis rate limit backend requires the 'redis' package") from e
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+        self.prefix = prefix
+        self.rate = rate
+        self.burst = burst
+
+    async def acquire(self, key: str) -> float:
+        try:
+            return float(await self._script(keys=[f"{self.prefix}:{key}"], args=[self.rate, self.burst]))
+        except Exception as e:
+            logger.warning(f"Rate limit backend unavailable, allowing request: {e}")
+            return 0.0
+
+
+def build_limiter(prefix: str, per_minute: float, burst: int):
+    rate = per_minute / 60
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return TokenBucketLimiter(rate, burst, settings.RATE_LIMIT_MAX_KEYS)
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisTokenBucketLimiter(
+            settings.RATE_LIMIT_REDIS_URL or "redis://localhost:6379/0", f"ratelimit:{prefix}", rate, burst
+        )
+    raise ValueError(f"Unknown rate limit backend: {settings.RATE_LIMIT_BACKEND}")
+
+
+appeal_ip_limiter = build_limiter("appeal-ip", settings.APPEAL_IP_RATE_PER_MINUTE, settings.APPEAL_IP_BURST)
+appeal_telegram_limiter = build_limiter(
+    "appeal-telegram", settings.APPEAL_TELEGRAM_RATE_PER_MINUTE, settings.APPEAL_TELEGRAM_BURST
+)
+
+
+def retry_after_header(wait: float) -> dict:
+    return {"Retry-After": str(max(1, math.ceil(wait)))}
+
+
+def parse_networks(value: str) -> list:
+    return [ipaddress.ip_network(item.strip(), strict=False) for item in value.split(",") if item.strip()]
+
+
+trusted_proxies = parse_networks(settings.RATE_LIMIT_TRUSTED_PROXIES)
+
+
+def is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+
+def client_ip(scope) -> str:
+    """
+    The peer address, or what a trusted proxy says the client is. Anyone
+    else's X-Real-IP / X-Forwarded-For is ignored: it is set by the client.
+    """
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    if not trusted_proxies or not is_trusted_proxy(peer):
+        return peer
+    headers = dict(scope.get("headers") or [])
+    real_ip = headers.get(b"x-real-ip")
+    if real_ip:
+        return real_ip.decode("latin-1").strip()
+    forwarded = headers.get(b"x-forwarded-for")
+    if forwarded:
+        # Proxies append, so the rightmost hop not added by a trusted proxy is the client
+        hops = [hop.strip() for hop in forwarded.decode("latin-1").split(",") if hop.strip()]
+        for hop in reversed(hops):
+            if not is_trusted_proxy(hop):
+                return hop
+        if hops:
+            return hops[0]
+    return peer
+
+
+class PublicFormGuard:
+    """Pure ASGI middleware: refuses before the body is read, see the module docstring."""
+
+    def __init__(self, app):
+        self.app = app
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if path.rstrip("/") == "/api/appeals":
+            wait = await appeal_ip_limiter.acquire(client_ip(scope))
+            if wait:
+                REQUESTS_REJECTED.inc(reason="ip_rate")
+                await self._refuse(scope, receive, send, "Too many appeals, try again later", wait)
+                return
+
+        content_type = dict(scope.get("headers") or []).get(b"content-type", b"")
+        if not content_type.startswith(b"multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(settings.UPLOAD_MAX_CONCURRENT)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), settings.UPLOAD_ADMISSION_TIMEOUT)
+        except asyncio.TimeoutError:
+            REQUESTS_REJECTED.inc(reason="upload_admission")
+            await self._refuse(scope, receive, send, "Server is busy, try again later",
+                               settings.UPLOAD_RETRY_AFTER)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._slots.release()
+
+    async def _refuse(self, scope, receive, send, detail: str, wait: float):
+        response = JSONResponse({"detail": detail}, status_code=429, headers=retry_after_header(wait))
+        await response(scope, receive, send)
@@ -0,0 +1,29 @@
+from typing import Any, Mapping, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            # json.dumps knows no datetimes, UUIDs or models; orjson does
+            return super().render(jsonable_encoder(content))
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def adapter_response(adapter: TypeAdapter, objects: Any, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """
+    Validate ORM objects with a prebuilt adapter and serialize them straight to
+    JSON bytes in pydantic-core, skipping jsonable_encoder and json.dumps.
+    """
+    body = adapter.dump_json(adapter.validate_python(objects, from_attributes=True))
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,195 @@
+"""
+Slow-query log.
+
+Every statement slower than SLOW_QUERY_THRESHOLD_MS is logged with its SQL,
+the shape of its bound parameters (types, never values), its duration and
+the route that ran it, and is added to per-shape totals that
+GET /api/diagnostics/slow-queries lists by total time. The totals are per
+worker and hold at most SLOW_QUERY_MAX_SHAPES shapes.
+
+With SLOW_QUERY_EXPLAIN on, SELECTs that cross the threshold are explained
+by a background thread on a connection of its own - EXPLAIN (ANALYZE,
+BUFFERS) on PostgreSQL, EXPLAIN QUERY PLAN on SQLite - at most once per
+shape every SLOW_QUERY_EXPLAIN_INTERVAL seconds, into a rotating file.
+"""
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.metrics import route_label
+from app.core.sql_profiler import statement_shape
+
+logger = logging.getLogger(__name__)
+
+current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+
+_EXPLAIN_QUEUE_SIZE = 100
+
+
+class RequestScopeMiddleware:
+    """Pure ASGI middleware that makes the request scope visible to engine listeners."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_scope.reset(token)
+
+
+def parameter_shape(parameters) -> str:
+    def describe(params):
+        if isinstance(params, dict):
+            return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in params.items()) + "}"
+        if isinstance(params, (list, tuple)):
+            return "(" + ", ".join(type(value).__name__ for value in params) + ")"
+        return type(params).__name__
+
+    if isinstance(parameters, list) and parameters and isinstance(parameters[0], (dict, list, tuple)):
+        return f"{len(parameters)} x {describe(parameters[0])}"
+    return describe(parameters)
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: int, max_shapes: int):
+        self.threshold = threshold_ms / 1000
+        self.max_shapes = max_shapes
+        self.stats: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._explained_at: Dict[str, float] = {}
+        self._explain_queue: "queue.Queue" = queue.Queue(maxsize=_EXPLAIN_QUEUE_SIZE)
+        self._explain_thread = None
+        self._explain_logger = None
+
+    def record(self, bind, statement: str, parameters, elapsed: float):
+        scope = current_scope.get()
+        route = f"{scope['method']} {route_label(scope)}" if scope else "background"
+        shape = statement_shape(statement)
+        params = parameter_shape(parameters)
+        logger.warning(
+            f"Slow query {elapsed * 1000:.1f}ms on {route} params={params}: {' '.join(statement.split())[:1000]}"
+        )
+        with self._lock:
+            entry = self.stats.get(shape)
+            if entry is None:
+                if len(self.stats) >= self.max_shapes:
+                    del self.stats[min(self.stats, key=lambda key: self.stats[key]["total_ms"])]
+                entry = self.stats[shape] = {
+                    "shape": shape, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "routes": [], "parameters": params,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += elapsed * 1000
+            entry["max_ms"] = max(entry["max_ms"], elapsed * 1000)
+            if route not in entry["routes"] and len(entry["routes"]) < 10:
+                entry["routes"].append(route)
+        if settings.SLOW_QUERY_EXPLAIN and shape.lstrip("( ").upper().startswith(("SELECT", "WITH")):
+            self._queue_explain(bind, shape, statement, parameters)
+
+    def top(self, limit: int) -> List[dict]:
+        with self._lock:
+            entries = sorted(self.stats.values(), key=lambda entry: -entry["total_ms"])[:limit]
+            return [{**entry, "routes": list(entry["routes"])} for entry in entries]
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+
+    def _queue_explain(self, bind, shape, statement, parameters):
+        now = time.monotonic()
+        if now - self._explained_at.get(shape, float("-inf")) < settings.SLOW_QUERY_EXPLAIN_INTERVAL:
+            return
+        self._explained_at[shape] = now
+        if self._explain_thread is None:
+            self._explain_logger = _explain_file_logger()
+            self._explain_thread = threading.Thread(target=self._explain_loop, name="slow-query-explain", daemon=True)
+            self._explain_thread.start()
+        try:
+            self._explain_queue.put_nowait((bind, statement, parameters))
+        except queue.Full:
+            pass
+
+    def _explain_loop(self):
+        while True:
+            bind, statement, parameters = self._explain_queue.get()
+            try:
+                plan = explain(bind, statement, parameters)
+                self._explain_logger.info(f"{' '.join(statement.split())}\nparams={parameter_shape(parameters)}\n{plan}\n")
+            except Exception as e:
+                logger.warning(f"EXPLAIN failed: {e}")
+
+
+def explain(bind, statement: str, parameters) -> str:
+    """Plan of a statement on a fresh connection, rolled back afterwards."""
+    if bind.dialect.name == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+    elif bind.dialect.name == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        prefix = "EXPLAIN "
+    connection = bind.raw_connection()
+    try:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        connection.rollback()
+    finally:
+        connection.close()
+    return "\n".join(" | ".join(str(value) for value in row) for row in rows)
+
+
+def _explain_file_logger() -> logging.Logger:
+    explain_logger = logging.getLogger("app.slow_queries.explain")
+    explain_logger.propagate = False
+    if not explain_logger.handlers:
+        directory = os.path.dirname(settings.SLOW_QUERY_EXPLAIN_FILE)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            settings.SLOW_QUERY_EXPLAIN_FILE,
+            maxBytes=settings.SLOW_QUERY_EXPLAIN_MAX_BYTES,
+            backupCount=settings.SLOW_QUERY_EXPLAIN_BACKUPS,
+            encoding="utf-8",
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        explain_logger.addHandler(handler)
+        explain_logger.setLevel(logging.INFO)
+    return explain_logger
+
+
+slow_query_log = SlowQueryLog(settings.SLOW_QUERY_THRESHOLD_MS, settings.SLOW_QUERY_MAX_SHAPES)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._slow_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_slow_query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    if elapsed >= slow_query_log.threshold:
+        slow_query_log.record(conn.engine, statement, parameters, elapsed)
+
+
+def watch_engine(bind):
+    event.listen(bind, "before_cursor_execute", _before_cursor_execute)
+    event.listen(bind, "after_cursor_execute", _after_cursor_execute)
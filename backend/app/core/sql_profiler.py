@@ -0,0 +1,148 @@
+"""
+Per-request SQL profiler for development (SQL_PROFILER=true).
+
+Engine listeners count and time every statement of the current request and
+group them by shape: the SQL with whitespace collapsed and IN lists and
+literals folded, so the same query with other ids is one shape. A shape run
+SQL_PROFILER_REPEAT_THRESHOLD times or more in one request is reported as a
+likely N+1. The middleware adds a Server-Timing header and logs one JSON line
+per request.
+
+query_budget() applies the same counting to a block of code, for tests and
+scripts that want to pin the number of statements an endpoint may run.
+"""
+import json
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+|\$\d+))*\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    shape = _SPACE.sub(" ", statement).strip()
+    shape = _STRING.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    return _IN_LIST.sub("(?)", shape)
+
+
+class QueryProfile:
+    """Statements of one request (or one query_budget block), grouped by shape."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Dict[str, List[float]] = {}
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.duration += elapsed
+        totals = self.shapes.setdefault(statement_shape(statement), [0, 0.0])
+        totals[0] += 1
+        totals[1] += elapsed
+
+    def repeated(self, threshold: int) -> List[dict]:
+        """Shapes run at least threshold times, most frequent first."""
+        return [
+            {"shape": shape, "count": count, "ms": round(elapsed * 1000, 2)}
+            for shape, (count, elapsed) in sorted(self.shapes.items(), key=lambda item: -item[1][0])
+            if count >= threshold
+        ]
+
+
+current_profile: ContextVar[Optional[QueryProfile]] = ContextVar("current_profile", default=None)
+
+# Open query_budget blocks see statements from every thread: TestClient runs
+# the app in its own thread, out of reach of the caller's context
+_budgets: List[QueryProfile] = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_profile.get() is not None or _budgets:
+        context._profiler_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_profiler_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    profile = current_profile.get()
+    if profile is not None:
+        profile.record(statement, elapsed)
+    for budget in _budgets:
+        budget.record(statement, elapsed)
+
+
+def profile_engine(bind):
+    event.listen(bind, "before_cursor_execute", _before_cursor_execute)
+    event.listen(bind, "after_cursor_execute", _after_cursor_execute)
+
+
+async def profile_request_sql(request, call_next):
+    """HTTP middleware: Server-Timing header, JSON log line and N+1 warning."""
+    profile = QueryProfile()
+    token = current_profile.set(profile)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        current_profile.reset(token)
+    total_ms = (time.perf_counter() - started) * 1000
+    db_ms = profile.duration * 1000
+
+    response.headers.append(
+        "Server-Timing",
+        f'db;dur={db_ms:.1f};desc="{profile.count} queries", app;dur={total_ms:.1f}'
+    )
+    repeated = profile.repeated(settings.SQL_PROFILER_REPEAT_THRESHOLD)
+    logger.info(json.dumps({
+        "event": "sql_profile",
+        "method": request.method,
+        "path": request.url.path,
+        "status": response.status_code,
+        "queries": profile.count,
+        "db_ms": round(db_ms, 2),
+        "total_ms": round(total_ms, 2),
+        "repeated": repeated,
+    }, ensure_ascii=False))
+    for item in repeated:
+        logger.warning(
+            f"Possible N+1 in {request.method} {request.url.path}: "
+            f"{item['count']}x {item['shape'][:200]}"
+        )
+    return response
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    """
+    Fail when the block runs more than max_queries statements, e.g. around a
+    TestClient call. The engines must have been built with SQL_PROFILER on;
+    tests use it through the query_budget fixture in tests/conftest.py.
+    """
+    profile = QueryProfile()
+    _budgets.append(profile)
+    try:
+        yield profile
+    finally:
+        _budgets.remove(profile)
+    if profile.count > max_queries:
+        details = "; ".join(f"{count}x {shape[:120]}" for shape, (count, _) in profile.shapes.items())
+        raise QueryBudgetExceeded(f"{profile.count} queries, budget {max_queries}: {details}")
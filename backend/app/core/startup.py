@@ -0,0 +1,115 @@
+"""
+Startup profiling.
+
+main.py runs its startup work (schema, migrations, default data, background
+threads) in the lifespan, each step inside startup_timer.phase(), and logs
+the phase timings once the app is ready. Importing main only imports.
+
+To see where a cold start goes:
+
+    cd backend
+    python -m app.core.startup --top 20
+
+prints the slowest imports of `python -X importtime -c "import main"` (run
+in a fresh interpreter), then imports main and runs the lifespan startup in
+this process with the phases timed. It exits with status 1 when import plus
+startup exceeds --budget-ms (STARTUP_BUDGET_MS by default);
+tests/test_startup.py runs it on an empty database to hold the cold start to
+that budget.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StartupTimer:
+    def __init__(self):
+        self.phases: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    @property
+    def total(self) -> float:
+        return sum(elapsed for _, elapsed in self.phases)
+
+    def summary(self) -> str:
+        parts = ", ".join(f"{name} {elapsed * 1000:.0f}ms" for name, elapsed in self.phases)
+        return f"Startup took {self.total * 1000:.0f}ms: {parts}"
+
+
+startup_timer = StartupTimer()
+
+
+def importtime_summary(module: str = "main", top: int = 20) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) of the slowest imports, by cumulative time."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    rows.sort(key=lambda row: -row[2])
+    return rows[:top]
+
+
+async def _run_lifespan(main_module):
+    async with main_module.lifespan(main_module.app):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=20, help="imports to list, 0 to skip the importtime run")
+    parser.add_argument("--budget-ms", type=int, default=settings.STARTUP_BUDGET_MS)
+    args = parser.parse_args()
+
+    if args.top:
+        print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+        for name, self_us, cumulative_us in importtime_summary(top=args.top):
+            print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:8.1f}  {name}")
+        print()
+
+    sys.path.insert(0, BACKEND_DIR)
+    started = time.perf_counter()
+    import main as main_module
+    imported = time.perf_counter() - started
+    asyncio.run(_run_lifespan(main_module))
+    # Run with -m this module is __main__; main.py recorded into the imported copy
+    from app.core.startup import startup_timer as timer
+    cold_start = imported + timer.total
+
+    print(f"{'import main':<24} {imported * 1000:8.0f}ms")
+    for name, elapsed in timer.phases:
+        print(f"{name:<24} {elapsed * 1000:8.0f}ms")
+    print(f"{'cold start':<24} {cold_start * 1000:8.0f}ms (budget {args.budget_ms}ms)")
+    if cold_start * 1000 > args.budget_ms:
+        print("cold start is over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
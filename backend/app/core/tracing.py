@@ -0,0 +1,254 @@
+"""
+Request tracing with W3C trace context (TRACING_ENABLED=true).
+
+The trace_requests middleware continues the trace of an incoming
+`traceparent` header, or starts one, with a server span per request.
+start_span() opens child spans, e.g. around the notifier's calls to the bot,
+and inject() puts the current span into outgoing headers. The bot continues
+the same trace, so a status change can be followed from update_appeal through
+the background task and the bot's /notify to the Telegram API.
+
+Finished spans are written one per line as OTLP/JSON export requests
+(the format the OpenTelemetry collector's file exporter uses) to
+TRACE_EXPORT_FILE, or to the log when it is empty. To see where the time goes:
+
+    cd backend
+    python -m app.core.tracing logs/traces.jsonl ../telegram_bot/logs/traces.jsonl
+
+prints the duration percentiles per span name and the end-to-end time of
+traces that reached more than one service.
+"""
+import argparse
+import json
+import logging
+import logging.handlers
+import os
+import secrets
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import route_label
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "citizens-appeals-backend"
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: int, attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes)
+        self.status = STATUS_OK
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": [span]}],
+        }]}
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(header: Optional[str]):
+    """(trace_id, parent span_id) of a valid version-00 traceparent, else None."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or parts[0] != "00" or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    trace_id, span_id = parts[1].lower(), parts[2].lower()
+    try:
+        int(trace_id, 16), int(span_id, 16), int(parts[3], 16)
+    except ValueError:
+        return None
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id
+
+
+_export_logger = None
+
+
+def _exporter() -> logging.Logger:
+    global _export_logger
+    if _export_logger is None:
+        export_logger = logging.getLogger("app.tracing.spans")
+        if settings.TRACE_EXPORT_FILE and not export_logger.handlers:
+            directory = os.path.dirname(settings.TRACE_EXPORT_FILE)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                settings.TRACE_EXPORT_FILE,
+                maxBytes=settings.TRACE_EXPORT_MAX_BYTES,
+                backupCount=settings.TRACE_EXPORT_BACKUPS,
+                encoding="utf-8",
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            export_logger.addHandler(handler)
+            export_logger.propagate = False
+        export_logger.setLevel(logging.INFO)
+        _export_logger = export_logger
+    return _export_logger
+
+
+def export(span: Span):
+    _exporter().info(json.dumps(span.to_otlp(), ensure_ascii=False))
+
+
+@contextmanager
+def start_span(name: str, kind: int = SPAN_KIND_INTERNAL, traceparent: Optional[str] = None, **attributes):
+    """
+    Child of the current span, or of `traceparent` when given (incoming
+    requests). Yields None when tracing is off.
+    """
+    if not settings.TRACING_ENABLED:
+        yield None
+        return
+    remote = parse_traceparent(traceparent)
+    parent = current_span.get()
+    if remote:
+        trace_id, parent_id = remote
+    elif parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+    span = Span(name, trace_id, parent_id, kind, attributes)
+    token = current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = STATUS_ERROR
+        span.set_attribute("exception.type", type(e).__name__)
+        raise
+    finally:
+        current_span.reset(token)
+        span.end_ns = time.time_ns()
+        export(span)
+
+
+def inject(headers: Dict[str, str]) -> Dict[str, str]:
+    span = current_span.get()
+    if span is not None:
+        headers["traceparent"] = span.traceparent
+    return headers
+
+
+async def trace_requests(request, call_next):
+    """HTTP middleware: a server span per request, continuing the caller's trace."""
+    with start_span(
+        f"{request.method} {request.url.path}",
+        kind=SPAN_KIND_SERVER,
+        traceparent=request.headers.get("traceparent"),
+        **{"http.method": request.method, "url.path": request.url.path}
+    ) as span:
+        # Background tasks run inside call_next, so they are children of this span
+        response = await call_next(request)
+        route = route_label(request.scope)
+        if route != "unmatched":
+            span.name = f"{request.method} {route}"
+            span.set_attribute("http.route", route)
+        span.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.status = STATUS_ERROR
+        response.headers["traceparent"] = span.traceparent
+        return response
+
+
+def _percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(paths):
+    spans = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line.startswith("{"):
+                    continue
+                for resource in json.loads(line).get("resourceSpans", []):
+                    service = next(
+                        (attr["value"].get("stringValue") for attr in resource["resource"]["attributes"]
+                         if attr["key"] == "service.name"), "?"
+                    )
+                    for scope in resource["scopeSpans"]:
+                        for span in scope["spans"]:
+                            spans.append((service, span))
+
+    by_name = defaultdict(list)
+    traces = defaultdict(list)
+    for service, span in spans:
+        start, end = int(span["startTimeUnixNano"]), int(span["endTimeUnixNano"])
+        by_name[f"{service}: {span['name']}"].append((end - start) / 1e6)
+        traces[span["traceId"]].append((service, start, end))
+
+    print(f"{'span':<60} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, durations in sorted(by_name.items()):
+        durations.sort()
+        print(f"{name[:60]:<60} {len(durations):>6} {_percentile(durations, 50):9.1f} "
+              f"{_percentile(durations, 95):9.1f} {_percentile(durations, 99):9.1f}")
+
+    end_to_end = sorted(
+        (max(end for _, _, end in items) - min(start for _, start, _ in items)) / 1e6
+        for items in traces.values() if len({service for service, _, _ in items}) > 1
+    )
+    if end_to_end:
+        print(f"\nend to end across services: n={len(end_to_end)} p50={_percentile(end_to_end, 50):.1f}ms "
+              f"p95={_percentile(end_to_end, 95):.1f}ms p99={_percentile(end_to_end, 99):.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="span files written by the backend and the bot")
+    summarize(parser.parse_args().files)
+
+
+if __name__ == "__main__":
+    main()
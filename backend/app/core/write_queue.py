@@ -0,0 +1,163 @@
+"""
+Write units for contended endpoints.
+
+A write unit is fn(db, ...) that stages changes in the given session and
+returns plain values (ids, flags), never ORM objects; it must not commit.
+Callers `await write_queue.run(fn, ...)` and reload what they need with their
+own session afterwards.
+
+DirectWriter runs every unit in its own transaction from the threadpool.
+GroupCommitWriter, enabled by SQLITE_WRITE_QUEUE on SQLite, gives all writes
+of the worker to one thread holding one connection: pending units are taken
+in batches, each under a SAVEPOINT so a failing unit rolls back alone, and
+the batch is committed once. Writers never contend for the lock inside a
+worker and one commit covers many requests.
+"""
+import asyncio
+import concurrent.futures
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal, apply_sqlite_profile, database_url
+
+logger = logging.getLogger(__name__)
+
+
+class DirectWriter:
+    """Each unit gets its own session and commit."""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    def _run_unit(self, fn: Callable, args, kwargs):
+        db = self.session_factory()
+        try:
+            result = fn(db, *args, **kwargs)
+            db.commit()
+            return result
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        return await run_in_threadpool(self._run_unit, fn, args, kwargs)
+
+
+class GroupCommitWriter:
+    """Single writer thread committing pending units in groups."""
+
+    def __init__(self, session_factory, max_batch: int = 64, max_wait: float = 0.0):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="sqlite-writer", daemon=True)
+                self._thread.start()
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        future = concurrent.futures.Future()
+        self._ensure_started()
+        self._queue.put((fn, args, kwargs, future))
+        return await asyncio.wrap_future(future)
+
+    def _take_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                remaining = deadline - time.monotonic()
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._take_batch()
+            try:
+                self._commit_batch(batch)
+            except Exception as e:
+                logger.error(f"Write batch of {len(batch)} failed: {e}")
+
+    def _commit_batch(self, batch):
+        db = self.session_factory()
+        outcomes = []
+        try:
+            with db.begin():
+                for fn, args, kwargs, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with db.begin_nested():
+                            outcomes.append((future, fn(db, *args, **kwargs), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            # The group commit itself failed: nothing of the batch was written
+            for future, _, _ in outcomes:
+                future.set_exception(e)
+            raise
+        finally:
+            db.close()
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+def build_writer_engine(url: str):
+    """
+    One connection that takes the write lock up front (BEGIN IMMEDIATE) and
+    leaves transaction control to SQLAlchemy, so SAVEPOINTs behave.
+    """
+    writer_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000},
+        pool_size=1,
+        max_overflow=0,
+    )
+
+    @event.listens_for(writer_engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        if settings.SQLITE_PROFILE:
+            apply_sqlite_profile(dbapi_connection, connection_record)
+
+    @event.listens_for(writer_engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return writer_engine
+
+
+def build_write_queue():
+    if settings.SQLITE_WRITE_QUEUE and database_url.startswith("sqlite"):
+        writer_engine = build_writer_engine(database_url)
+        return GroupCommitWriter(
+            sessionmaker(bind=writer_engine, autoflush=False),
+            max_batch=settings.SQLITE_WRITE_QUEUE_MAX_BATCH,
+            max_wait=settings.SQLITE_WRITE_QUEUE_MAX_WAIT_MS / 1000,
+        )
+    return DirectWriter()
+
+
+write_queue = build_write_queue()
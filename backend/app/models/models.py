@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, ForeignKey, Table, Enum, BigInteger
+from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, ForeignKey, Table, Enum, BigInteger, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -46,6 +46,7 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     role = Column(Enum(UserRole), nullable=False, default=UserRole.MODERATOR)
     is_active = Column(Boolean, default=True)
+    token_version = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
 
 class Category(Base):
@@ -95,8 +96,8 @@ class Appeal(Base):
     media_files = Column(Text, nullable=True)
     telegram_user_id = Column(BigInteger, nullable=True, index=True)
     telegram_username = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     category = relationship("Category")
     public_tags = relationship("PublicTag", secondary=appeal_public_tags, back_populates="appeals")
@@ -104,6 +105,32 @@ class Appeal(Base):
     comments = relationship("Comment", back_populates="appeal", cascade="all, delete-orphan")
     history = relationship("AppealHistory", back_populates="appeal", cascade="all, delete-orphan")
 
+class AppealChange(Base):
+    """Delta-sync log: the latest change per appeal, id is the change sequence."""
+    __tablename__ = "appeal_changes"
+    __table_args__ = {"sqlite_autoincrement": True}
+    
+    id = Column(Integer, primary_key=True)
+    appeal_id = Column(Integer, nullable=False, index=True)  # no FK, tombstones outlive the appeal
+    deleted = Column(Boolean, nullable=False, default=False)
+    changed_at = Column(DateTime, default=datetime.utcnow)
+
+class ArchivedAppeal(Base):
+    """
+    A closed appeal moved out of the hot tables (see app.services.archive):
+    the columns reads look it up by, and the appeal, its comments, history,
+    tag ids and attachment rows as JSON.
+    """
+    __tablename__ = "archived_appeals"
+    
+    id = Column(Integer, primary_key=True)  # the original appeal id
+    status = Column(String, nullable=False)
+    category_id = Column(Integer, nullable=True)
+    telegram_user_id = Column(BigInteger, nullable=True, index=True)
+    created_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow, index=True)
+    payload = Column(Text, nullable=False)
+
 class Comment(Base):
     __tablename__ = "comments"
     
@@ -153,3 +180,21 @@ class AdminTelegramId(Base):
     telegram_id = Column(BigInteger, unique=True, nullable=False)
     name = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+class Attachment(Base):
+    """
+    One uploaded file. Owners are appeals or comments; their JSON columns keep
+    the API format while this table answers the attachment queries.
+    """
+    __tablename__ = "attachments"
+    __table_args__ = (Index("ix_attachments_owner", "owner_type", "owner_id"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    owner_type = Column(String, nullable=False)  # "appeal" or "comment"
+    owner_id = Column(Integer, nullable=False)
+    unique_name = Column(String, nullable=False, index=True)
+    original_name = Column(String, nullable=True, index=True)
+    mime_type = Column(String, nullable=True)
+    size = Column(BigInteger, nullable=True)
+    sha256 = Column(String(64), nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
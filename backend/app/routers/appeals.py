@@ -1,27 +1,61 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, BackgroundTasks
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, func
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, BackgroundTasks, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import or_, func, select, insert, delete, update
+from typing import List, Literal, Optional
+from datetime import datetime, date, timedelta
+from functools import partial
+import asyncio
 import json
 import os
-import uuid
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db, run_in_session, read_router
 from app.core.config import settings
-from app.models.models import Appeal, User, PublicTag, InternalTag, Comment, AppealHistory, HistoryActionType, Category
+from app.core.responses import FastJSONResponse, adapter_response
+from app.core.write_queue import write_queue
+from app.core.rate_limit import appeal_telegram_limiter, retry_after_header, REQUESTS_REJECTED
+from app.models.models import (
+    Appeal, User, PublicTag, InternalTag, Comment, AppealHistory, HistoryActionType, Category,
+    AppealStatusConfig, AppealChange, Attachment, appeal_public_tags, appeal_internal_tags
+)
 from app.schemas.schemas import (
     Appeal as AppealSchema, 
     AppealCreate, 
     AppealUpdate,
     CommentCreate,
     Comment as CommentSchema,
-    AppealHistoryItem
+    AppealHistoryItem,
+    AppealBulkUpdate,
+    AppealBulkItemResult,
+    AppealBulkResult,
+    AppealChanges,
+    Attachment as AttachmentSchema,
+    DuplicateCandidate
+)
+from app.schemas.adapters import appeal_list_adapter, appeal_history_adapter, comment_list_adapter
+from app.routers.auth import get_current_user, require_admin
+from app.services.telegram_notifier import notify_status_change, notify_status_changes, notify_new_appeal_to_admins
+from app.services.events import event_broker
+from app.services.duplicates import duplicate_index
+from app.services.appeal_changes import record_appeal_changes, current_change_token
+from app.services.archive import (
+    archive_closed_appeals, restore_appeal, archived_appeal, archived_appeals_of_telegram_user,
+    archived_comments, archived_history, archived_attachments
+)
+from app.services.appeal_summaries import parse_summary_fields, summary_query, build_summaries
+from app.services.export import export_statement, iter_export_batches, stream_csv, stream_xlsx
+from app.services.attachments import (
+    OWNER_APPEAL, OWNER_COMMENT, save_uploads, files_json, add_attachments, appeal_has_attachments
 )
-from app.routers.auth import get_current_user
-from app.services.telegram_notifier import notify_status_change, notify_new_appeal_to_admins
 
 router = APIRouter(prefix="/appeals", tags=["appeals"])
 
+BULK_MAX_APPEALS = 500
+
+EVENTS_KEEPALIVE_SECONDS = 15
+
+CHANGES_MAX_LIMIT = 1000
+
 def add_history_entry(db: Session, appeal_id: int, user_id: int, action_type: HistoryActionType, 
                       old_value: str = None, new_value: str = None, details: str = None):
     history = AppealHistory(
@@ -34,6 +68,218 @@ def add_history_entry(db: Session, appeal_id: int, user_id: int, action_type: Hi
     )
     db.add(history)
 
+def history_row(appeal_id: int, user_id: int, action_type: HistoryActionType,
+                old_value: str = None, new_value: str = None, details: str = None) -> dict:
+    return {
+        "appeal_id": appeal_id,
+        "user_id": user_id,
+        "action_type": action_type,
+        "old_value": old_value,
+        "new_value": new_value,
+        "details": details,
+        "created_at": datetime.utcnow()
+    }
+
+def add_history_entries(db: Session, rows: List[dict]):
+    """Write history rows with a single executemany INSERT."""
+    if rows:
+        db.execute(AppealHistory.__table__.insert(), rows)
+
+def sync_appeal_tags(db: Session, appeal_id: int, user_id: int, tag_model, link_table,
+                     tag_type: str, tag_ids: List[int]) -> List[dict]:
+    """
+    Make the appeal's links in link_table match tag_ids using set-based
+    DELETE/INSERT. Unknown tag ids are ignored. Returns history rows for
+    the removed and added tags.
+    """
+    current_ids = set(db.scalars(
+        select(link_table.c.tag_id).where(link_table.c.appeal_id == appeal_id)
+    ).all())
+    requested_ids = set(tag_ids)
+    if current_ids == requested_ids:
+        return []
+    
+    tag_names = dict(
+        db.query(tag_model.id, tag_model.name).filter(tag_model.id.in_(current_ids | requested_ids)).all()
+    )
+    removed_ids = sorted(current_ids - requested_ids)
+    added_ids = sorted(tag_id for tag_id in requested_ids - current_ids if tag_id in tag_names)
+    
+    if removed_ids:
+        db.execute(delete(link_table).where(
+            link_table.c.appeal_id == appeal_id,
+            link_table.c.tag_id.in_(removed_ids)
+        ))
+    if added_ids:
+        db.execute(insert(link_table), [{"appeal_id": appeal_id, "tag_id": tag_id} for tag_id in added_ids])
+    
+    rows = []
+    for action_type, ids in ((HistoryActionType.TAG_REMOVED, removed_ids), (HistoryActionType.TAG_ADDED, added_ids)):
+        for tag_id in ids:
+            if tag_id in tag_names:
+                rows.append(history_row(
+                    appeal_id, user_id, action_type,
+                    details=json.dumps({"tag_name": tag_names[tag_id], "tag_type": tag_type})
+                ))
+    return rows
+
+def bulk_change_appeal_tags(db: Session, appeal_ids: List[int], user_id: int, tag_model, link_table,
+                            tag_type: str, add_ids: List[int], remove_ids: List[int]):
+    """
+    Add and remove tags on many appeals with one DELETE and one INSERT.
+    Returns (history rows, ids of appeals whose tags changed).
+    """
+    add_ids = set(add_ids) - set(remove_ids)
+    remove_ids = set(remove_ids)
+    if not appeal_ids or not (add_ids or remove_ids):
+        return [], set()
+    
+    tag_names = dict(
+        db.query(tag_model.id, tag_model.name).filter(tag_model.id.in_(add_ids | remove_ids)).all()
+    )
+    existing_links = set(db.execute(
+        select(link_table.c.appeal_id, link_table.c.tag_id).where(
+            link_table.c.appeal_id.in_(appeal_ids),
+            link_table.c.tag_id.in_(add_ids | remove_ids)
+        )
+    ).all())
+    
+    removed_links = sorted(link for link in existing_links if link[1] in remove_ids)
+    added_links = sorted(
+        (appeal_id, tag_id)
+        for appeal_id in appeal_ids
+        for tag_id in add_ids
+        if tag_id in tag_names and (appeal_id, tag_id) not in existing_links
+    )
+    
+    if removed_links:
+        db.execute(delete(link_table).where(
+            link_table.c.appeal_id.in_({appeal_id for appeal_id, _ in removed_links}),
+            link_table.c.tag_id.in_(remove_ids)
+        ))
+    if added_links:
+        db.execute(insert(link_table), [{"appeal_id": appeal_id, "tag_id": tag_id} for appeal_id, tag_id in added_links])
+    
+    rows = []
+    for action_type, links in ((HistoryActionType.TAG_REMOVED, removed_links), (HistoryActionType.TAG_ADDED, added_links)):
+        for appeal_id, tag_id in links:
+            if tag_id in tag_names:
+                rows.append(history_row(
+                    appeal_id, user_id, action_type,
+                    details=json.dumps({"tag_name": tag_names[tag_id], "tag_type": tag_type})
+                ))
+    changed_ids = {appeal_id for appeal_id, _ in removed_links + added_links}
+    return rows, changed_ids
+
+def apply_appeal_filters(query, status: Optional[str] = None, public_tag_id: Optional[int] = None,
+                         internal_tag_id: Optional[int] = None, category_id: Optional[int] = None,
+                         has_attachments: Optional[bool] = None, created_from: Optional[date] = None,
+                         created_to: Optional[date] = None):
+    """Filters shared by the list, summary and export queries (ORM Query or Core select)."""
+    if status:
+        query = query.filter(Appeal.status == status)
+    
+    if public_tag_id:
+        query = query.join(Appeal.public_tags).filter(PublicTag.id == public_tag_id)
+    
+    if internal_tag_id:
+        query = query.join(Appeal.internal_tags).filter(InternalTag.id == internal_tag_id)
+    
+    if category_id:
+        query = query.filter(Appeal.category_id == category_id)
+    
+    if has_attachments is not None:
+        query = query.filter(appeal_has_attachments() if has_attachments else ~appeal_has_attachments())
+    
+    if created_from:
+        query = query.filter(Appeal.created_at >= datetime.combine(created_from, datetime.min.time()))
+    
+    if created_to:
+        query = query.filter(Appeal.created_at < datetime.combine(created_to + timedelta(days=1), datetime.min.time()))
+    
+    return query
+
+def load_appeal(db: Session, appeal_id: int) -> Appeal:
+    """Load an appeal with everything AppealSchema serializes."""
+    return db.query(Appeal).options(
+        joinedload(Appeal.public_tags),
+        joinedload(Appeal.internal_tags),
+        joinedload(Appeal.category)
+    ).filter(Appeal.id == appeal_id).first()
+
+def appeal_list_options():
+    """Eager loads for lists of full appeals; lazy tags cost two queries per row."""
+    return (
+        selectinload(Appeal.public_tags),
+        selectinload(Appeal.internal_tags),
+        joinedload(Appeal.category)
+    )
+
+async def publish_appeal_event(event_type: str, appeal: Appeal):
+    await event_broker.publish({
+        "type": event_type,
+        "appeal_id": appeal.id,
+        "appeal": AppealSchema.model_validate(appeal).model_dump(mode="json")
+    })
+
+# Write units for write_queue: they stage changes without committing and return ids
+
+def insert_appeal(db: Session, fields: dict, saved_files: List[dict]) -> int:
+    appeal = Appeal(**fields, media_files=files_json(saved_files))
+    db.add(appeal)
+    db.flush()
+    add_attachments(db, OWNER_APPEAL, appeal.id, saved_files)
+    record_appeal_changes(db, [appeal.id])
+    return appeal.id
+
+def insert_comment(db: Session, appeal_id: int, user_id: int, text: str, saved_files: List[dict]) -> int:
+    comment = Comment(
+        appeal_id=appeal_id,
+        user_id=user_id,
+        text=text,
+        files=files_json(saved_files)
+    )
+    db.add(comment)
+    db.flush()
+    add_attachments(db, OWNER_COMMENT, comment.id, saved_files)
+    
+    # Add history entry
+    add_history_entry(
+        db, appeal_id, user_id,
+        HistoryActionType.COMMENT_ADDED,
+        details=json.dumps({
+            "comment_text": text[:200],
+            "files_count": len(saved_files)
+        })
+    )
+    return comment.id
+
+def change_appeal_tag(db: Session, appeal_id: int, tag_id: int, tag_type: str, user_id: int, add: bool) -> bool:
+    """Attach or detach a tag; returns whether the appeal changed."""
+    appeal = db.query(Appeal).filter(Appeal.id == appeal_id).first()
+    if not appeal:
+        raise HTTPException(status_code=404, detail="Appeal not found")
+    
+    tag_model = PublicTag if tag_type == "public" else InternalTag
+    tags = appeal.public_tags if tag_type == "public" else appeal.internal_tags
+    tag = db.query(tag_model).filter(tag_model.id == tag_id).first()
+    if add and not tag:
+        raise HTTPException(status_code=404, detail=f"{tag_type.capitalize()} tag not found")
+    if tag is None or (tag in tags) == add:
+        return False
+    
+    if add:
+        tags.append(tag)
+    else:
+        tags.remove(tag)
+    add_history_entry(
+        db, appeal_id, user_id,
+        HistoryActionType.TAG_ADDED if add else HistoryActionType.TAG_REMOVED,
+        details=json.dumps({"tag_name": tag.name, "tag_type": tag_type})
+    )
+    record_appeal_changes(db, [appeal_id])
+    return True
+
 @router.post("", response_model=AppealSchema)
 async def create_appeal(
     background_tasks: BackgroundTasks,
@@ -53,39 +299,28 @@ async def create_appeal(
     if not is_anonymous and not email and not telegram_user_id:
         raise HTTPException(status_code=400, detail="Email is required for non-anonymous appeals")
     
-    media_file_paths = []
-    if files:
-        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-        for file in files:
-            if file.filename:
-                file_extension = os.path.splitext(file.filename)[1]
-                unique_filename = f"{uuid.uuid4()}{file_extension}"
-                file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
-                
-                with open(file_path, "wb") as f:
-                    content = await file.read()
-                    f.write(content)
-                
-                media_file_paths.append({
-                    "path": file_path,
-                    "original_name": file.filename,
-                    "unique_name": unique_filename
-                })
+    if telegram_user_id and settings.RATE_LIMIT_ENABLED:
+        wait = await appeal_telegram_limiter.acquire(str(telegram_user_id))
+        if wait:
+            REQUESTS_REJECTED.inc(reason="telegram_rate")
+            raise HTTPException(
+                status_code=429,
+                detail="Too many appeals, try again later",
+                headers=retry_after_header(wait)
+            )
     
-    appeal = Appeal(
-        is_anonymous=is_anonymous,
-        author_name=author_name if not is_anonymous else None,
-        email=email if not is_anonymous else None,
-        phone=phone,
-        category_id=category_id,
-        text=text,
-        telegram_user_id=telegram_user_id,
-        telegram_username=telegram_username,
-        media_files=json.dumps(media_file_paths) if media_file_paths else None
-    )
-    db.add(appeal)
-    db.commit()
-    db.refresh(appeal)
+    saved_files = await save_uploads(files)
+    
+    appeal_id = await write_queue.run(insert_appeal, {
+        "is_anonymous": is_anonymous,
+        "author_name": author_name if not is_anonymous else None,
+        "email": email if not is_anonymous else None,
+        "phone": phone,
+        "category_id": category_id,
+        "text": text,
+        "telegram_user_id": telegram_user_id,
+        "telegram_username": telegram_username,
+    }, saved_files)
     
     category_name = None
     if category_id:
@@ -95,25 +330,160 @@ async def create_appeal(
     
     background_tasks.add_task(
         notify_new_appeal_to_admins,
-        appeal.id,
+        appeal_id,
         text,
         category_name,
         is_anonymous,
         db
     )
     
+    if settings.DUPLICATE_INDEX_ENABLED and settings.DUPLICATE_AUTO_TAG:
+        background_tasks.add_task(tag_if_duplicate, appeal_id, text)
+    
+    appeal = load_appeal(db, appeal_id)
+    await publish_appeal_event("appeal_created", appeal)
     return appeal
 
-@router.get("/search")
+async def tag_if_duplicate(appeal_id: int, text: str):
+    """Background task: put the duplicate tag on a new appeal that matches an earlier one."""
+    if not duplicate_index.ready:
+        return
+    matches = await run_in_threadpool(run_in_session, duplicate_index.find, text, appeal_id, 1)
+    if not matches:
+        return
+    
+    def duplicate_tag_id(db: Session):
+        return db.query(InternalTag.id).filter(InternalTag.name == settings.DUPLICATE_TAG_NAME).scalar()
+    
+    tag_id = await run_in_threadpool(run_in_session, duplicate_tag_id)
+    if tag_id is None:
+        return
+    if await write_queue.run(change_appeal_tag, appeal_id, tag_id, "internal", None, True):
+        await publish_appeal_event("tags_changed", await run_in_threadpool(run_in_session, load_appeal, appeal_id))
+
+@router.post("/bulk", response_model=AppealBulkResult)
+async def bulk_update_appeals(
+    bulk_update: AppealBulkUpdate,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    requested_ids = list(dict.fromkeys(bulk_update.appeal_ids))
+    if len(requested_ids) > BULK_MAX_APPEALS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_APPEALS} appeals per request")
+    
+    if bulk_update.status is not None:
+        status_exists = db.query(AppealStatusConfig.id).filter(
+            AppealStatusConfig.status_key == bulk_update.status
+        ).first()
+        if not status_exists:
+            raise HTTPException(status_code=400, detail="Unknown status")
+    
+    if bulk_update.category_id:
+        category_exists = db.query(Category.id).filter(Category.id == bulk_update.category_id).first()
+        if not category_exists:
+            raise HTTPException(status_code=400, detail="Unknown category")
+    
+    appeals = {
+        row.id: row
+        for row in db.query(
+            Appeal.id, Appeal.status, Appeal.category_id, Appeal.telegram_user_id
+        ).filter(Appeal.id.in_(requested_ids)).all()
+    }
+    found_ids = [appeal_id for appeal_id in requested_ids if appeal_id in appeals]
+    history_rows = []
+    changed_ids = set()
+    notifications = []
+    
+    if bulk_update.status is not None:
+        status_ids = [appeal_id for appeal_id in found_ids if appeals[appeal_id].status != bulk_update.status]
+        for appeal_id in status_ids:
+            old_status = appeals[appeal_id].status
+            history_rows.append(history_row(
+                appeal_id, current_user.id,
+                HistoryActionType.STATUS_CHANGE,
+                old_status, bulk_update.status
+            ))
+            if appeals[appeal_id].telegram_user_id and old_status:
+                notifications.append({
+                    "telegram_user_id": appeals[appeal_id].telegram_user_id,
+                    "appeal_id": appeal_id,
+                    "old_status": old_status,
+                    "new_status": bulk_update.status
+                })
+        if status_ids:
+            db.execute(
+                update(Appeal).where(Appeal.id.in_(status_ids)).values(status=bulk_update.status),
+                execution_options={"synchronize_session": False}
+            )
+            changed_ids.update(status_ids)
+    
+    if bulk_update.category_id is not None:
+        new_category_id = bulk_update.category_id if bulk_update.category_id != 0 else None
+        category_ids = [appeal_id for appeal_id in found_ids if appeals[appeal_id].category_id != new_category_id]
+        referenced = {appeals[appeal_id].category_id for appeal_id in category_ids} | {new_category_id}
+        referenced.discard(None)
+        category_names = dict(
+            db.query(Category.id, Category.name).filter(Category.id.in_(referenced)).all()
+        ) if referenced else {}
+        for appeal_id in category_ids:
+            history_rows.append(history_row(
+                appeal_id, current_user.id,
+                HistoryActionType.CATEGORY_CHANGED,
+                old_value=category_names.get(appeals[appeal_id].category_id, "Не указана"),
+                new_value=category_names.get(new_category_id, "Не указана")
+            ))
+        if category_ids:
+            db.execute(
+                update(Appeal).where(Appeal.id.in_(category_ids)).values(category_id=new_category_id),
+                execution_options={"synchronize_session": False}
+            )
+            changed_ids.update(category_ids)
+    
+    for tag_model, link_table, tag_type, add_ids, remove_ids in (
+        (PublicTag, appeal_public_tags, "public", bulk_update.add_public_tag_ids, bulk_update.remove_public_tag_ids),
+        (InternalTag, appeal_internal_tags, "internal", bulk_update.add_internal_tag_ids, bulk_update.remove_internal_tag_ids),
+    ):
+        rows, tag_changed_ids = bulk_change_appeal_tags(
+            db, found_ids, current_user.id, tag_model, link_table, tag_type, add_ids, remove_ids
+        )
+        history_rows.extend(rows)
+        changed_ids.update(tag_changed_ids)
+    
+    add_history_entries(db, history_rows)
+    record_appeal_changes(db, changed_ids)
+    db.commit()
+    
+    if notifications:
+        background_tasks.add_task(notify_status_changes, notifications)
+    
+    if changed_ids:
+        changed_appeals = db.query(Appeal).options(
+            joinedload(Appeal.public_tags),
+            joinedload(Appeal.internal_tags),
+            joinedload(Appeal.category)
+        ).filter(Appeal.id.in_(changed_ids)).all()
+        for appeal in changed_appeals:
+            await publish_appeal_event("appeal_updated", appeal)
+    
+    results = [
+        AppealBulkItemResult(appeal_id=appeal_id, success=True, changed=appeal_id in changed_ids)
+        if appeal_id in appeals
+        else AppealBulkItemResult(appeal_id=appeal_id, success=False, detail="Appeal not found")
+        for appeal_id in requested_ids
+    ]
+    return AppealBulkResult(results=results)
+
+@router.get("/search", response_model=List[AppealSchema])
 async def search_appeals(
     q: str = Query(..., min_length=1),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     search_term = f"%{q}%"
     
     # Search in appeal text, author name, and comments
-    appeals = db.query(Appeal).outerjoin(Comment).filter(
+    appeals = db.query(Appeal).options(*appeal_list_options()).outerjoin(Comment).filter(
         or_(
             Appeal.author_name.ilike(search_term),
             Appeal.text.ilike(search_term),
@@ -122,7 +492,146 @@ async def search_appeals(
         )
     ).distinct().order_by(Appeal.created_at.desc()).limit(50).all()
     
-    return appeals
+    return adapter_response(appeal_list_adapter, appeals)
+
+@router.get("/events")
+async def appeal_events(
+    request: Request,
+    token: str = Query(...)
+):
+    """
+    Server-sent events for the moderator dashboard. EventSource cannot send
+    headers, so the access token comes in the query string; it is checked once
+    here and no database session is held for the lifetime of the stream.
+    """
+    try:
+        await run_in_threadpool(run_in_session, lambda db: get_current_user(token, db))
+    except HTTPException:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    
+    queue = event_broker.subscribe()
+    
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+        finally:
+            event_broker.unsubscribe(queue)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/changes", response_model=AppealChanges)
+async def get_appeal_changes(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=CHANGES_MAX_LIMIT),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Appeals changed after the `since` token, tombstones for deleted ones and
+    the token to pass next time. Without a token the whole set is paged through.
+    """
+    try:
+        since_seq = int(since) if since else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    
+    changes = db.query(AppealChange).filter(
+        AppealChange.id > since_seq
+    ).order_by(AppealChange.id).limit(limit + 1).all()
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    
+    changed_ids = [change.appeal_id for change in changes if not change.deleted]
+    appeals = db.query(Appeal).options(
+        joinedload(Appeal.public_tags),
+        joinedload(Appeal.internal_tags),
+        joinedload(Appeal.category)
+    ).filter(Appeal.id.in_(changed_ids)).all() if changed_ids else []
+    sequence = {change.appeal_id: change.id for change in changes}
+    appeals.sort(key=lambda appeal: sequence[appeal.id], reverse=True)
+    found_ids = {appeal.id for appeal in appeals}
+    deleted = [change.appeal_id for change in changes if change.appeal_id not in found_ids]
+    
+    return AppealChanges(
+        appeals=appeals,
+        deleted=deleted,
+        token=str(changes[-1].id if changes else since_seq),
+        has_more=has_more
+    )
+
+@router.get("/export")
+async def export_appeals(
+    format: Literal["csv", "xlsx"] = "csv",
+    status: Optional[str] = None,
+    public_tag_id: Optional[int] = None,
+    internal_tag_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    has_attachments: Optional[bool] = None,
+    created_from: Optional[date] = None,
+    created_to: Optional[date] = None,
+    current_user: User = Depends(require_admin)
+):
+    """
+    Stream every matching appeal as CSV or XLSX. The rows are read inside the
+    generator with its own session, so nothing outlives the request scope.
+    """
+    stmt = export_statement(partial(
+        apply_appeal_filters,
+        status=status, public_tag_id=public_tag_id, internal_tag_id=internal_tag_id,
+        category_id=category_id, has_attachments=has_attachments,
+        created_from=created_from, created_to=created_to
+    ))
+    encode = stream_xlsx if format == "xlsx" else stream_csv
+    
+    def stream():
+        db = read_router.session()
+        try:
+            yield from encode(iter_export_batches(db, stmt))
+        finally:
+            db.close()
+    
+    media_type = (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        if format == "xlsx" else "text/csv; charset=utf-8"
+    )
+    filename = f"appeals-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        stream(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/archive")
+async def archive_appeals(
+    older_than_days: Optional[int] = Query(None, ge=0),
+    current_user: User = Depends(require_admin),
+):
+    """Archive closed appeals now instead of waiting for the archiver (ARCHIVE_AFTER_DAYS by default)."""
+    archived = await run_in_threadpool(run_in_session, archive_closed_appeals, older_than_days)
+    return {"archived": archived}
+
+@router.post("/{appeal_id}/restore", response_model=AppealSchema)
+async def restore_archived_appeal(
+    appeal_id: int,
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    if not await write_queue.run(restore_appeal, appeal_id):
+        raise HTTPException(status_code=404, detail="Archived appeal not found")
+    appeal = load_appeal(db, appeal_id)
+    await publish_appeal_event("appeal_updated", appeal)
+    return appeal
 
 @router.get("", response_model=List[AppealSchema])
 async def get_appeals(
@@ -130,33 +639,52 @@ async def get_appeals(
     public_tag_id: Optional[int] = None,
     internal_tag_id: Optional[int] = None,
     category_id: Optional[int] = None,
+    has_attachments: Optional[bool] = None,
+    created_from: Optional[date] = None,
+    created_to: Optional[date] = None,
     skip: int = 0,
     limit: int = 100,
+    view: Literal["full", "summary"] = "full",
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    query = db.query(Appeal)
-    
-    if status:
-        query = query.filter(Appeal.status == status)
-    
-    if public_tag_id:
-        query = query.join(Appeal.public_tags).filter(PublicTag.id == public_tag_id)
-    
-    if internal_tag_id:
-        query = query.join(Appeal.internal_tags).filter(InternalTag.id == internal_tag_id)
-    
-    if category_id:
-        query = query.filter(Appeal.category_id == category_id)
+    """
+    `view=summary` (implied by `fields=`) returns list-card rows: only the
+    selected columns, text cut server-side and an attachment count instead of
+    the media JSON.
+    """
+    # Taken before the query so a change racing with it is re-sent, not lost
+    sync_token = str(current_change_token(db))
+    
+    if view == "summary" or fields:
+        try:
+            summary_fields = parse_summary_fields(fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = apply_appeal_filters(
+            summary_query(db, summary_fields), status, public_tag_id, internal_tag_id, category_id,
+            has_attachments, created_from, created_to
+        )
+        rows = query.order_by(Appeal.created_at.desc()).offset(skip).limit(limit).all()
+        return FastJSONResponse(
+            content=build_summaries(db, rows, summary_fields),
+            headers={"X-Sync-Token": sync_token}
+        )
     
+    query = apply_appeal_filters(
+        db.query(Appeal).options(*appeal_list_options()), status, public_tag_id, internal_tag_id, category_id,
+        has_attachments, created_from, created_to
+    )
     appeals = query.order_by(Appeal.created_at.desc()).offset(skip).limit(limit).all()
-    return appeals
+    return adapter_response(appeal_list_adapter, appeals, headers={"X-Sync-Token": sync_token})
 
 @router.get("/{appeal_id}", response_model=AppealSchema)
 async def get_appeal(
     appeal_id: int,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     appeal = db.query(Appeal).options(
         joinedload(Appeal.comments).joinedload(Comment.user),
@@ -165,23 +693,46 @@ async def get_appeal(
         joinedload(Appeal.category)
     ).filter(Appeal.id == appeal_id).first()
     if not appeal:
-        raise HTTPException(status_code=404, detail="Appeal not found")
+        appeal = archived_appeal(db, appeal_id)
+        if not appeal:
+            raise HTTPException(status_code=404, detail="Appeal not found")
+        response.headers["X-Archived"] = "true"
     return appeal
 
+@router.get("/{appeal_id}/duplicates", response_model=List[DuplicateCandidate])
+async def get_appeal_duplicates(
+    appeal_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Earlier or later appeals with nearly the same text, most similar first."""
+    if not settings.DUPLICATE_INDEX_ENABLED:
+        raise HTTPException(status_code=404, detail="Duplicate detection is disabled")
+    if not duplicate_index.ready:
+        raise HTTPException(status_code=503, detail="Duplicate index is still being built")
+    appeal = db.query(Appeal.id, Appeal.text).filter(Appeal.id == appeal_id).first()
+    if not appeal:
+        raise HTTPException(status_code=404, detail="Appeal not found")
+    return await run_in_threadpool(duplicate_index.find, db, appeal.text, appeal_id, limit)
+
 @router.get("/{appeal_id}/history", response_model=List[AppealHistoryItem])
 async def get_appeal_history(
     appeal_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     appeal = db.query(Appeal).filter(Appeal.id == appeal_id).first()
     if not appeal:
-        raise HTTPException(status_code=404, detail="Appeal not found")
+        history = archived_history(db, appeal_id)
+        if history is None:
+            raise HTTPException(status_code=404, detail="Appeal not found")
+        return history
     
     history = db.query(AppealHistory).options(
         joinedload(AppealHistory.user)
     ).filter(AppealHistory.appeal_id == appeal_id).order_by(AppealHistory.created_at.desc()).all()
-    return history
+    return adapter_response(appeal_history_adapter, history)
 
 @router.patch("/{appeal_id}", response_model=AppealSchema)
 @router.put("/{appeal_id}", response_model=AppealSchema)
@@ -196,14 +747,17 @@ async def update_appeal(
     if not appeal:
         raise HTTPException(status_code=404, detail="Appeal not found")
     
+    history_rows = []
+    event_types = []
     if appeal_update.status is not None and appeal_update.status != appeal.status:
+        event_types.append("status_changed")
         old_status = appeal.status if appeal.status else None
         new_status = appeal_update.status if appeal_update.status else None
-        add_history_entry(
-            db, appeal_id, current_user.id, 
+        history_rows.append(history_row(
+            appeal_id, current_user.id,
             HistoryActionType.STATUS_CHANGE,
             old_status, new_status
-        )
+        ))
         
         if appeal.telegram_user_id and old_status and new_status:
             background_tasks.add_task(
@@ -216,79 +770,49 @@ async def update_appeal(
         
         appeal.status = appeal_update.status
     
+    tag_rows = []
     if appeal_update.public_tag_ids is not None:
-        old_tags = set(t.id for t in appeal.public_tags)
-        new_tags = set(appeal_update.public_tag_ids)
-        
-        # Log removed tags
-        for tag_id in old_tags - new_tags:
-            tag = db.query(PublicTag).filter(PublicTag.id == tag_id).first()
-            if tag:
-                add_history_entry(
-                    db, appeal_id, current_user.id,
-                    HistoryActionType.TAG_REMOVED,
-                    details=json.dumps({"tag_name": tag.name, "tag_type": "public"})
-                )
-        
-        # Log added tags
-        for tag_id in new_tags - old_tags:
-            tag = db.query(PublicTag).filter(PublicTag.id == tag_id).first()
-            if tag:
-                add_history_entry(
-                    db, appeal_id, current_user.id,
-                    HistoryActionType.TAG_ADDED,
-                    details=json.dumps({"tag_name": tag.name, "tag_type": "public"})
-                )
-        
-        appeal.public_tags = db.query(PublicTag).filter(PublicTag.id.in_(appeal_update.public_tag_ids)).all()
+        tag_rows.extend(sync_appeal_tags(
+            db, appeal_id, current_user.id, PublicTag, appeal_public_tags, "public",
+            appeal_update.public_tag_ids
+        ))
     
     if appeal_update.internal_tag_ids is not None:
-        old_tags = set(t.id for t in appeal.internal_tags)
-        new_tags = set(appeal_update.internal_tag_ids)
-        
-        # Log removed tags
-        for tag_id in old_tags - new_tags:
-            tag = db.query(InternalTag).filter(InternalTag.id == tag_id).first()
-            if tag:
-                add_history_entry(
-                    db, appeal_id, current_user.id,
-                    HistoryActionType.TAG_REMOVED,
-                    details=json.dumps({"tag_name": tag.name, "tag_type": "internal"})
-                )
-        
-        # Log added tags
-        for tag_id in new_tags - old_tags:
-            tag = db.query(InternalTag).filter(InternalTag.id == tag_id).first()
-            if tag:
-                add_history_entry(
-                    db, appeal_id, current_user.id,
-                    HistoryActionType.TAG_ADDED,
-                    details=json.dumps({"tag_name": tag.name, "tag_type": "internal"})
-                )
-        
-        appeal.internal_tags = db.query(InternalTag).filter(InternalTag.id.in_(appeal_update.internal_tag_ids)).all()
+        tag_rows.extend(sync_appeal_tags(
+            db, appeal_id, current_user.id, InternalTag, appeal_internal_tags, "internal",
+            appeal_update.internal_tag_ids
+        ))
+    if tag_rows:
+        history_rows.extend(tag_rows)
+        event_types.append("tags_changed")
+    
+    details_changed = False
     
     if appeal_update.category_id is not None and appeal_update.category_id != appeal.category_id:
-        old_category = db.query(Category).filter(Category.id == appeal.category_id).first() if appeal.category_id else None
-        new_category = db.query(Category).filter(Category.id == appeal_update.category_id).first() if appeal_update.category_id else None
-        old_name = old_category.name if old_category else "Не указана"
-        new_name = new_category.name if new_category else "Не указана"
-        add_history_entry(
-            db, appeal_id, current_user.id,
+        category_ids = [cid for cid in (appeal.category_id, appeal_update.category_id) if cid]
+        category_names = dict(
+            db.query(Category.id, Category.name).filter(Category.id.in_(category_ids)).all()
+        ) if category_ids else {}
+        old_name = category_names.get(appeal.category_id, "Не указана")
+        new_name = category_names.get(appeal_update.category_id, "Не указана")
+        history_rows.append(history_row(
+            appeal_id, current_user.id,
             HistoryActionType.CATEGORY_CHANGED,
             old_value=old_name,
             new_value=new_name
-        )
+        ))
         appeal.category_id = appeal_update.category_id if appeal_update.category_id != 0 else None
+        details_changed = True
     
     if appeal_update.text is not None and appeal_update.text != appeal.text:
-        add_history_entry(
-            db, appeal_id, current_user.id,
+        history_rows.append(history_row(
+            appeal_id, current_user.id,
             HistoryActionType.TEXT_EDITED,
             old_value=appeal.text[:200] if appeal.text else None,
             new_value=appeal_update.text[:200]
-        )
+        ))
         appeal.text = appeal_update.text
+        details_changed = True
     
     contact_changes = []
     if appeal_update.author_name is not None and appeal_update.author_name != appeal.author_name:
@@ -316,14 +840,23 @@ async def update_appeal(
         appeal.phone = appeal_update.phone
     
     if contact_changes:
-        add_history_entry(
-            db, appeal_id, current_user.id,
+        history_rows.append(history_row(
+            appeal_id, current_user.id,
             HistoryActionType.CONTACT_UPDATED,
             details=json.dumps(contact_changes)
-        )
+        ))
+        details_changed = True
+    
+    if details_changed:
+        event_types.append("appeal_updated")
     
+    add_history_entries(db, history_rows)
+    if history_rows:
+        record_appeal_changes(db, [appeal_id])
     db.commit()
-    db.refresh(appeal)
+    appeal = load_appeal(db, appeal_id)
+    for event_type in event_types:
+        await publish_appeal_event(event_type, appeal)
     return appeal
 
 @router.post("/{appeal_id}/comments", response_model=CommentSchema)
@@ -338,57 +871,44 @@ async def add_comment(
     if not appeal:
         raise HTTPException(status_code=404, detail="Appeal not found")
     
-    file_paths = []
-    if files:
-        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-        for file in files:
-            if file.filename:
-                file_extension = os.path.splitext(file.filename)[1]
-                unique_filename = f"{uuid.uuid4()}{file_extension}"
-                file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
-                
-                with open(file_path, "wb") as f:
-                    content = await file.read()
-                    f.write(content)
-                
-                file_paths.append({
-                    "path": file_path,
-                    "original_name": file.filename,
-                    "unique_name": unique_filename
-                })
-    
-    comment = Comment(
-        appeal_id=appeal_id,
-        user_id=current_user.id,
-        text=text,
-        files=json.dumps(file_paths) if file_paths else None
-    )
-    db.add(comment)
-    
-    # Add history entry
-    add_history_entry(
-        db, appeal_id, current_user.id,
-        HistoryActionType.COMMENT_ADDED,
-        details=json.dumps({
-            "comment_text": text[:200],
-            "files_count": len(file_paths)
-        })
-    )
-    
-    db.commit()
-    db.refresh(comment)
+    saved_files = await save_uploads(files)
+    comment_id = await write_queue.run(insert_comment, appeal_id, current_user.id, text, saved_files)
+    comment = db.query(Comment).options(joinedload(Comment.user)).filter(Comment.id == comment_id).first()
+    await event_broker.publish({
+        "type": "comment_added",
+        "appeal_id": appeal_id,
+        "comment": CommentSchema.model_validate(comment).model_dump(mode="json")
+    })
     return comment
 
 @router.get("/{appeal_id}/comments", response_model=List[CommentSchema])
 async def get_comments(
     appeal_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     comments = db.query(Comment).options(
         joinedload(Comment.user)
     ).filter(Comment.appeal_id == appeal_id).order_by(Comment.created_at).all()
-    return comments
+    if not comments:
+        comments = archived_comments(db, appeal_id) or []
+    return adapter_response(comment_list_adapter, comments)
+
+@router.get("/{appeal_id}/attachments", response_model=List[AttachmentSchema])
+async def get_appeal_attachments(
+    appeal_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Files attached to the appeal itself and to its comments."""
+    comment_ids = select(Comment.id).where(Comment.appeal_id == appeal_id)
+    attachments = db.query(Attachment).filter(or_(
+        (Attachment.owner_type == OWNER_APPEAL) & (Attachment.owner_id == appeal_id),
+        (Attachment.owner_type == OWNER_COMMENT) & Attachment.owner_id.in_(comment_ids)
+    )).order_by(Attachment.created_at, Attachment.id).all()
+    if not attachments:
+        attachments = archived_attachments(db, appeal_id) or []
+    return attachments
 
 @router.post("/{appeal_id}/tags/{tag_id}")
 async def add_tag_to_appeal(
@@ -398,36 +918,9 @@ async def add_tag_to_appeal(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    appeal = db.query(Appeal).filter(Appeal.id == appeal_id).first()
-    if not appeal:
-        raise HTTPException(status_code=404, detail="Appeal not found")
-    
-    if tag_type == "public":
-        tag = db.query(PublicTag).filter(PublicTag.id == tag_id).first()
-        if not tag:
-            raise HTTPException(status_code=404, detail="Public tag not found")
-        if tag not in appeal.public_tags:
-            appeal.public_tags.append(tag)
-            add_history_entry(
-                db, appeal_id, current_user.id,
-                HistoryActionType.TAG_ADDED,
-                details=json.dumps({"tag_name": tag.name, "tag_type": "public"})
-            )
-            db.commit()
-        return {"message": "Public tag added"}
-    else:
-        tag = db.query(InternalTag).filter(InternalTag.id == tag_id).first()
-        if not tag:
-            raise HTTPException(status_code=404, detail="Internal tag not found")
-        if tag not in appeal.internal_tags:
-            appeal.internal_tags.append(tag)
-            add_history_entry(
-                db, appeal_id, current_user.id,
-                HistoryActionType.TAG_ADDED,
-                details=json.dumps({"tag_name": tag.name, "tag_type": "internal"})
-            )
-            db.commit()
-        return {"message": "Internal tag added"}
+    if await write_queue.run(change_appeal_tag, appeal_id, tag_id, tag_type, current_user.id, True):
+        await publish_appeal_event("tags_changed", load_appeal(db, appeal_id))
+    return {"message": f"{tag_type.capitalize()} tag added"}
 
 @router.delete("/{appeal_id}/tags/{tag_id}")
 async def remove_tag_from_appeal(
@@ -437,32 +930,9 @@ async def remove_tag_from_appeal(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    appeal = db.query(Appeal).filter(Appeal.id == appeal_id).first()
-    if not appeal:
-        raise HTTPException(status_code=404, detail="Appeal not found")
-    
-    if tag_type == "public":
-        tag = db.query(PublicTag).filter(PublicTag.id == tag_id).first()
-        if tag and tag in appeal.public_tags:
-            appeal.public_tags.remove(tag)
-            add_history_entry(
-                db, appeal_id, current_user.id,
-                HistoryActionType.TAG_REMOVED,
-                details=json.dumps({"tag_name": tag.name, "tag_type": "public"})
-            )
-            db.commit()
-            return {"message": "Public tag removed"}
-    else:
-        tag = db.query(InternalTag).filter(InternalTag.id == tag_id).first()
-        if tag and tag in appeal.internal_tags:
-            appeal.internal_tags.remove(tag)
-            add_history_entry(
-                db, appeal_id, current_user.id,
-                HistoryActionType.TAG_REMOVED,
-                details=json.dumps({"tag_name": tag.name, "tag_type": "internal"})
-            )
-            db.commit()
-            return {"message": "Internal tag removed"}
+    if await write_queue.run(change_appeal_tag, appeal_id, tag_id, tag_type, current_user.id, False):
+        await publish_appeal_event("tags_changed", load_appeal(db, appeal_id))
+        return {"message": f"{tag_type.capitalize()} tag removed"}
     
     raise HTTPException(status_code=404, detail="Tag not found or not associated with appeal")
 
@@ -491,11 +961,18 @@ async def download_file(
 @router.get("/telegram/{telegram_user_id}", response_model=List[AppealSchema])
 async def get_appeals_by_telegram_user(
     telegram_user_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    appeals = db.query(Appeal).filter(
+    appeals = db.query(Appeal).options(*appeal_list_options()).filter(
         Appeal.telegram_user_id == telegram_user_id
     ).order_by(Appeal.created_at.desc()).all()
+    archived = archived_appeals_of_telegram_user(db, telegram_user_id)
+    if archived:
+        appeals = sorted(
+            appeals + archived,
+            key=lambda appeal: appeal["created_at"] if isinstance(appeal, dict) else appeal.created_at,
+            reverse=True
+        )
     return appeals
 
 
@@ -503,7 +980,7 @@ async def get_appeals_by_telegram_user(
 async def get_appeal_by_telegram_user(
     telegram_user_id: int,
     appeal_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     appeal = db.query(Appeal).options(
         joinedload(Appeal.public_tags),
@@ -513,6 +990,8 @@ async def get_appeal_by_telegram_user(
         Appeal.telegram_user_id == telegram_user_id
     ).first()
     
+    if not appeal:
+        appeal = archived_appeal(db, appeal_id, telegram_user_id)
     if not appeal:
         raise HTTPException(status_code=404, detail="Appeal not found")
     
@@ -1,17 +1,110 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
+from starlette.concurrency import run_in_threadpool
+from collections import OrderedDict
 from datetime import timedelta
+from typing import Optional, Tuple
+import logging
+import threading
+import time
 from app.core.database import get_db
-from app.core.security import verify_password, create_access_token, decode_access_token, get_password_hash
+from app.core.cache import cache_backend
+from app.core.security import verify_and_update_password, create_access_token, decode_access_token
 from app.core.config import settings
 from app.models.models import User, UserRole
 from app.schemas.schemas import Token, UserLogin, User as UserSchema
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# username -> (expires_at, detached user snapshot), least recently used first.
+# A hit is served without touching the database. Revocations made by this
+# worker drop the entry directly; revocations made by other workers are seen
+# through the token version stamps that revoke_user_tokens() writes to the
+# shared cache backend. With the per-process memory backend other workers
+# keep trusting their entry for at most USER_CACHE_TTL.
+_user_cache: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+TOKEN_STAMP_PREFIX = "auth:token_version:"
+
+
+def _snapshot_user(user: User) -> User:
+    snapshot = User(
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        hashed_password=user.hashed_password,
+        role=user.role,
+        is_active=user.is_active,
+        token_version=user.token_version,
+        created_at=user.created_at
+    )
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def _cached_user(username: str, token_version: int) -> Optional[User]:
+    with _user_cache_lock:
+        entry = _user_cache.get(username)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            del _user_cache[username]
+            return None
+        if (user.token_version or 0) != token_version:
+            return None
+        _user_cache.move_to_end(username)
+        return user
+
+
+def _cache_user(user: User):
+    with _user_cache_lock:
+        _user_cache[user.username] = (time.monotonic() + settings.USER_CACHE_TTL, _snapshot_user(user))
+        _user_cache.move_to_end(user.username)
+        while len(_user_cache) > settings.USER_CACHE_MAX_ENTRIES:
+            _user_cache.popitem(last=False)
+
+
+def _revoked_elsewhere(username: str, token_version: int) -> bool:
+    """Whether another worker stamped a different token version (or a delete) for username."""
+    if not cache_backend.shared:
+        return False
+    try:
+        stamp = cache_backend.get(TOKEN_STAMP_PREFIX + username)
+    except Exception as e:
+        logger.warning(f"Token stamp read failed for {username}: {e}")
+        return True
+    return stamp is not None and stamp[1] != token_version
+
+
+def invalidate_user_cache(username: str):
+    with _user_cache_lock:
+        _user_cache.pop(username, None)
+
+
+async def revoke_user_tokens(username: str, token_version: Optional[int] = None):
+    """
+    Drop username from the user cache of every worker. token_version is the
+    version tokens must now carry, None when the user was deleted. Call it
+    after the change is committed.
+    """
+    invalidate_user_cache(username)
+    if not cache_backend.shared:
+        return
+    try:
+        # No cached entry outlives USER_CACHE_TTL, so neither does the stamp
+        await run_in_threadpool(
+            cache_backend.set, TOKEN_STAMP_PREFIX + username, token_version, time.time(), settings.USER_CACHE_TTL
+        )
+    except Exception as e:
+        logger.error(f"Token stamp write failed for {username}: {e}")
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -24,9 +117,18 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     username = payload.get("sub")
     if username is None:
         raise credentials_exception
+    token_version = payload.get("ver", 0)
+    
+    cached = _cached_user(username, token_version)
+    if cached is not None:
+        if not _revoked_elsewhere(username, token_version):
+            return cached
+        invalidate_user_cache(username)
+    
     user = db.query(User).filter(User.username == username).first()
-    if user is None:
+    if user is None or (user.token_version or 0) != token_version or not user.is_active:
         raise credentials_exception
+    _cache_user(user)
     return user
 
 def require_role(required_role: UserRole):
@@ -56,7 +158,8 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    if not verify_password(form_data.password, str(user.hashed_password)):
+    is_valid, new_hash = await verify_and_update_password(form_data.password, str(user.hashed_password))
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -67,9 +170,12 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive"
         )
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username, "role": str(user.role)},
+        data={"sub": user.username, "role": str(user.role), "ver": user.token_version or 0},
         expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
@@ -1,13 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
-from app.core.database import get_db
+from app.core.database import get_db, run_in_session
+from app.core.cache import reference_cache
+from app.core.config import settings
 from app.models.models import Category as CategoryModel, User, UserRole
-from app.schemas.schemas import Category, CategoryCreate, CategoryUpdate, CategoryTree, CategoryReorder
+from app.schemas.schemas import (
+    Category, CategoryCreate, CategoryUpdate, CategoryTree, CategoryReorder,
+    CategorySuggestionRequest, CategorySuggestion
+)
 from app.routers.auth import get_current_user, require_admin
+from app.services.ordering import apply_ordering, find_missing_ids
+from app.services.appeal_changes import record_appeal_changes, appeal_ids_in_category
+from functools import partial
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
+SUGGEST_MAX_TEXT = 5000
+
 def build_category_tree(categories: List[CategoryModel], parent_id=None):
     tree = []
     for category in categories:
@@ -20,11 +30,29 @@ def build_category_tree(categories: List[CategoryModel], parent_id=None):
             tree.append(category_tree)
     return sorted(tree, key=lambda x: x.order)
 
-@router.get("", response_model=List[CategoryTree])
-async def get_categories(db: Session = Depends(get_db)):
+def list_category_tree(db: Session) -> List[CategoryTree]:
     categories = db.query(CategoryModel).all()
     return build_category_tree(categories)
 
+@router.get("", response_model=List[CategoryTree])
+async def get_categories():
+    return await reference_cache.get_versioned(
+        "categories", "tree", partial(run_in_session, list_category_tree), ttl=settings.REFERENCE_CACHE_TTL
+    )
+
+@router.post("/suggest", response_model=List[CategorySuggestion])
+async def suggest_categories(request: CategorySuggestionRequest):
+    """Most likely categories for an appeal text, for the form and for moderators."""
+    if not settings.CATEGORIZER_ENABLED:
+        raise HTTPException(status_code=404, detail="Category suggestions are disabled")
+    try:
+        from app.services.categorizer import categorizer
+    except ImportError:
+        raise HTTPException(status_code=503, detail="Category suggestions require numpy and scipy")
+    if not categorizer.ready:
+        raise HTTPException(status_code=503, detail="Category model is not trained yet")
+    return categorizer.suggest(request.text[:SUGGEST_MAX_TEXT], min(max(request.limit, 1), 10))
+
 @router.post("", response_model=Category)
 async def create_category(
     category: CategoryCreate,
@@ -35,6 +63,7 @@ async def create_category(
     db_category = CategoryModel(**category.model_dump(), order=max_order)
     db.add(db_category)
     db.commit()
+    await reference_cache.bump_version("categories")
     db.refresh(db_category)
     return db_category
 
@@ -53,7 +82,9 @@ async def update_category(
     for field, value in update_data.items():
         setattr(category, field, value)
     
+    record_appeal_changes(db, appeal_ids_in_category(db, category_id))
     db.commit()
+    await reference_cache.bump_version("categories")
     db.refresh(category)
     return category
 
@@ -63,16 +94,16 @@ async def reorder_categories(
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    for index, cat_id in enumerate(reorder_data.category_ids):
-        category = db.query(CategoryModel).filter(CategoryModel.id == cat_id).first()
-        if category:
-            category.order = index
-            if reorder_data.parent_id is not None:
-                if reorder_data.parent_id == 0:
-                    category.parent_id = None
-                else:
-                    category.parent_id = reorder_data.parent_id
+    missing_ids = find_missing_ids(db, CategoryModel, reorder_data.category_ids)
+    if missing_ids:
+        raise HTTPException(status_code=404, detail=f"Categories not found: {missing_ids}")
+    
+    extra_values = None
+    if reorder_data.parent_id is not None:
+        extra_values = {"parent_id": reorder_data.parent_id if reorder_data.parent_id != 0 else None}
+    apply_ordering(db, CategoryModel, reorder_data.category_ids, extra_values)
     db.commit()
+    await reference_cache.bump_version("categories")
     return {"message": "Categories reordered successfully"}
 
 @router.delete("/{category_id}")
@@ -85,6 +116,8 @@ async def delete_category(
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     
+    record_appeal_changes(db, appeal_ids_in_category(db, category_id))
     db.delete(category)
     db.commit()
+    await reference_cache.bump_version("categories")
     return {"message": "Category deleted successfully"}
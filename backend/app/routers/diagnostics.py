@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List
+from app.core.slow_queries import slow_query_log
+from app.schemas.schemas import SlowQueryStats
+from app.routers.auth import require_admin
+
+router = APIRouter(prefix="/diagnostics", tags=["diagnostics"])
+
+
+@router.get("/slow-queries", response_model=List[SlowQueryStats])
+async def get_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    current_user = Depends(require_admin)
+):
+    """Statements over SLOW_QUERY_THRESHOLD_MS on this worker, by total time."""
+    return slow_query_log.top(limit)
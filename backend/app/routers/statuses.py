@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
-from app.core.database import get_db
+from app.core.database import get_db, run_in_session
+from app.core.cache import reference_cache
+from app.core.config import settings
 from app.models.models import AppealStatusConfig as AppealStatusConfigModel, User
 from app.schemas.schemas import (
     AppealStatusConfig,
@@ -10,13 +12,20 @@ from app.schemas.schemas import (
     StatusReorder
 )
 from app.routers.auth import get_current_user, require_admin
+from app.services.ordering import apply_ordering, find_missing_ids
+from functools import partial
 
 router = APIRouter(prefix="/statuses", tags=["statuses"])
 
-@router.get("", response_model=List[AppealStatusConfig])
-async def get_all_statuses(db: Session = Depends(get_db)):
+def list_statuses(db: Session) -> List[AppealStatusConfig]:
     statuses = db.query(AppealStatusConfigModel).order_by(AppealStatusConfigModel.order).all()
-    return statuses
+    return [AppealStatusConfig.model_validate(status) for status in statuses]
+
+@router.get("", response_model=List[AppealStatusConfig])
+async def get_all_statuses():
+    return await reference_cache.get_versioned(
+        "statuses", "all", partial(run_in_session, list_statuses), ttl=settings.REFERENCE_CACHE_TTL
+    )
 
 @router.post("", response_model=AppealStatusConfig)
 async def create_status(
@@ -38,6 +47,7 @@ async def create_status(
     )
     db.add(db_status)
     db.commit()
+    await reference_cache.bump_version("statuses")
     db.refresh(db_status)
     return db_status
 
@@ -57,6 +67,7 @@ async def update_status(
         setattr(status, field, value)
     
     db.commit()
+    await reference_cache.bump_version("statuses")
     db.refresh(status)
     return status
 
@@ -66,11 +77,12 @@ async def reorder_statuses(
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    for index, status_id in enumerate(reorder_data.status_ids):
-        status = db.query(AppealStatusConfigModel).filter(AppealStatusConfigModel.id == status_id).first()
-        if status:
-            status.order = index
+    missing_ids = find_missing_ids(db, AppealStatusConfigModel, reorder_data.status_ids)
+    if missing_ids:
+        raise HTTPException(status_code=404, detail=f"Statuses not found: {missing_ids}")
+    apply_ordering(db, AppealStatusConfigModel, reorder_data.status_ids)
     db.commit()
+    await reference_cache.bump_version("statuses")
     return {"message": "Statuses reordered successfully"}
 
 @router.delete("/{status_id}")
@@ -87,4 +99,5 @@ async def delete_status(
     
     db.delete(status)
     db.commit()
+    await reference_cache.bump_version("statuses")
     return {"message": "Status deleted successfully"}
@@ -1,18 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
-from app.core.database import get_db
-from app.models.models import PublicTag, InternalTag, User
+from app.core.database import get_db, run_in_session
+from app.models.models import PublicTag, InternalTag, User, appeal_public_tags, appeal_internal_tags
 from app.schemas.schemas import Tag, TagCreate, TagUpdate, TagReorder
 from app.routers.auth import get_current_user, require_admin
+from app.core.cache import reference_cache
+from app.core.config import settings
+from app.services.ordering import apply_ordering, find_missing_ids
+from app.services.appeal_changes import record_appeal_changes, appeal_ids_with_tag
+from functools import partial
 
 router = APIRouter(prefix="/tags", tags=["tags"])
 
-@router.get("", response_model=List[Tag])
-async def get_all_tags(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+def list_all_tags(db: Session) -> List[Tag]:
     public_tags = db.query(PublicTag).order_by(PublicTag.order).all()
     internal_tags = db.query(InternalTag).order_by(InternalTag.order).all()
     all_tags = []
@@ -22,11 +23,26 @@ async def get_all_tags(
         all_tags.append(Tag(id=tag.id, name=tag.name, color=tag.color or "#6B7280", is_public=False, order=tag.order or 0, created_at=tag.created_at))
     return all_tags
 
-@router.get("/public", response_model=List[Tag])
-async def get_public_tags(db: Session = Depends(get_db)):
+def list_public_tags(db: Session) -> List[Tag]:
     tags = db.query(PublicTag).order_by(PublicTag.order).all()
     return [Tag(id=tag.id, name=tag.name, color=tag.color or "#00C9C8", is_public=True, order=tag.order or 0, created_at=tag.created_at) for tag in tags]
 
+def list_internal_tags(db: Session) -> List[Tag]:
+    tags = db.query(InternalTag).order_by(InternalTag.order).all()
+    return [Tag(id=tag.id, name=tag.name, color=tag.color or "#6B7280", is_public=False, order=tag.order or 0, created_at=tag.created_at) for tag in tags]
+
+@router.get("", response_model=List[Tag])
+async def get_all_tags(current_user: User = Depends(get_current_user)):
+    return await reference_cache.get_versioned(
+        "tags", "all", partial(run_in_session, list_all_tags), ttl=settings.REFERENCE_CACHE_TTL
+    )
+
+@router.get("/public", response_model=List[Tag])
+async def get_public_tags():
+    return await reference_cache.get_versioned(
+        "tags", "public", partial(run_in_session, list_public_tags), ttl=settings.REFERENCE_CACHE_TTL
+    )
+
 @router.post("/public", response_model=Tag)
 async def create_public_tag(
     tag: TagCreate,
@@ -37,6 +53,7 @@ async def create_public_tag(
     db_tag = PublicTag(**tag.model_dump(), order=max_order)
     db.add(db_tag)
     db.commit()
+    await reference_cache.bump_version("tags")
     db.refresh(db_tag)
     return Tag(id=db_tag.id, name=db_tag.name, color=db_tag.color or "#00C9C8", is_public=True, order=db_tag.order or 0, created_at=db_tag.created_at)
 
@@ -55,7 +72,10 @@ async def update_public_tag(
     for field, value in update_data.items():
         setattr(tag, field, value)
     
+    if "name" in update_data or "color" in update_data:
+        record_appeal_changes(db, appeal_ids_with_tag(db, appeal_public_tags, tag_id))
     db.commit()
+    await reference_cache.bump_version("tags")
     db.refresh(tag)
     return Tag(id=tag.id, name=tag.name, color=tag.color or "#00C9C8", is_public=True, order=tag.order or 0, created_at=tag.created_at)
 
@@ -65,11 +85,12 @@ async def reorder_public_tags(
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    for index, tag_id in enumerate(reorder_data.tag_ids):
-        tag = db.query(PublicTag).filter(PublicTag.id == tag_id).first()
-        if tag:
-            tag.order = index
+    missing_ids = find_missing_ids(db, PublicTag, reorder_data.tag_ids)
+    if missing_ids:
+        raise HTTPException(status_code=404, detail=f"Tags not found: {missing_ids}")
+    apply_ordering(db, PublicTag, reorder_data.tag_ids)
     db.commit()
+    await reference_cache.bump_version("tags")
     return {"message": "Tags reordered successfully"}
 
 @router.delete("/public/{tag_id}")
@@ -81,17 +102,17 @@ async def delete_public_tag(
     tag = db.query(PublicTag).filter(PublicTag.id == tag_id).first()
     if not tag:
         raise HTTPException(status_code=404, detail="Tag not found")
+    record_appeal_changes(db, appeal_ids_with_tag(db, appeal_public_tags, tag_id))
     db.delete(tag)
     db.commit()
+    await reference_cache.bump_version("tags")
     return {"message": "Tag deleted successfully"}
 
 @router.get("/internal", response_model=List[Tag])
-async def get_internal_tags(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    tags = db.query(InternalTag).order_by(InternalTag.order).all()
-    return [Tag(id=tag.id, name=tag.name, color=tag.color or "#6B7280", is_public=False, order=tag.order or 0, created_at=tag.created_at) for tag in tags]
+async def get_internal_tags(current_user: User = Depends(get_current_user)):
+    return await reference_cache.get_versioned(
+        "tags", "internal", partial(run_in_session, list_internal_tags), ttl=settings.REFERENCE_CACHE_TTL
+    )
 
 @router.post("/internal", response_model=Tag)
 async def create_internal_tag(
@@ -103,6 +124,7 @@ async def create_internal_tag(
     db_tag = InternalTag(**tag.model_dump(), order=max_order)
     db.add(db_tag)
     db.commit()
+    await reference_cache.bump_version("tags")
     db.refresh(db_tag)
     return Tag(id=db_tag.id, name=db_tag.name, color=db_tag.color or "#6B7280", is_public=False, order=db_tag.order or 0, created_at=db_tag.created_at)
 
@@ -121,7 +143,10 @@ async def update_internal_tag(
     for field, value in update_data.items():
         setattr(tag, field, value)
     
+    if "name" in update_data or "color" in update_data:
+        record_appeal_changes(db, appeal_ids_with_tag(db, appeal_internal_tags, tag_id))
     db.commit()
+    await reference_cache.bump_version("tags")
     db.refresh(tag)
     return Tag(id=tag.id, name=tag.name, color=tag.color or "#6B7280", is_public=False, order=tag.order or 0, created_at=tag.created_at)
 
@@ -131,11 +156,12 @@ async def reorder_internal_tags(
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    for index, tag_id in enumerate(reorder_data.tag_ids):
-        tag = db.query(InternalTag).filter(InternalTag.id == tag_id).first()
-        if tag:
-            tag.order = index
+    missing_ids = find_missing_ids(db, InternalTag, reorder_data.tag_ids)
+    if missing_ids:
+        raise HTTPException(status_code=404, detail=f"Tags not found: {missing_ids}")
+    apply_ordering(db, InternalTag, reorder_data.tag_ids)
     db.commit()
+    await reference_cache.bump_version("tags")
     return {"message": "Tags reordered successfully"}
 
 @router.delete("/internal/{tag_id}")
@@ -147,6 +173,8 @@ async def delete_internal_tag(
     tag = db.query(InternalTag).filter(InternalTag.id == tag_id).first()
     if not tag:
         raise HTTPException(status_code=404, detail="Tag not found")
+    record_appeal_changes(db, appeal_ids_with_tag(db, appeal_internal_tags, tag_id))
     db.delete(tag)
     db.commit()
+    await reference_cache.bump_version("tags")
     return {"message": "Tag deleted successfully"}
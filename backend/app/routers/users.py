@@ -2,10 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
-from app.core.security import get_password_hash
+from app.core.security import hash_password
 from app.models.models import User as UserModel, UserRole
 from app.schemas.schemas import User, UserCreate, UserUpdate, Statistics
-from app.routers.auth import get_current_user, require_admin
+from app.routers.auth import get_current_user, require_admin, invalidate_user_cache, revoke_user_tokens
 from sqlalchemy import func
 from app.models.models import Appeal, Comment
 
@@ -33,7 +33,7 @@ async def create_user(
     if existing_email:
         raise HTTPException(status_code=400, detail="Email already exists")
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password(user.password)
     db_user = UserModel(
         username=user.username,
         email=user.email,
@@ -57,14 +57,26 @@ async def update_user(
         raise HTTPException(status_code=404, detail="User not found")
     
     update_data = user_update.model_dump(exclude_unset=True)
+    old_username = user.username
+    # Changes to these fields revoke tokens issued before the update
+    revokes_tokens = 'password' in update_data or any(
+        field in update_data and update_data[field] != getattr(user, field)
+        for field in ('username', 'role', 'is_active')
+    )
     if 'password' in update_data:
-        update_data['hashed_password'] = get_password_hash(update_data.pop('password'))
+        update_data['hashed_password'] = await hash_password(update_data.pop('password'))
     
     for field, value in update_data.items():
         setattr(user, field, value)
+    if revokes_tokens:
+        user.token_version = (user.token_version or 0) + 1
     
     db.commit()
     db.refresh(user)
+    if revokes_tokens:
+        await revoke_user_tokens(old_username, user.token_version)
+    else:
+        invalidate_user_cache(old_username)
     return user
 
 @router.delete("/{user_id}")
@@ -80,8 +92,10 @@ async def delete_user(
     if user.id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
+    username = user.username
     db.delete(user)
     db.commit()
+    await revoke_user_tokens(username)
     return {"message": "User deleted successfully"}
 
 @router.get("/statistics", response_model=Statistics)
@@ -0,0 +1,15 @@
+"""
+Prebuilt TypeAdapters for the large list responses.
+
+Building an adapter compiles its validator and serializer once; the routes
+reuse them instead of FastAPI rebuilding the response field per request.
+"""
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.schemas.schemas import Appeal, AppealHistoryItem, Comment
+
+appeal_list_adapter = TypeAdapter(List[Appeal])
+appeal_history_adapter = TypeAdapter(List[AppealHistoryItem])
+comment_list_adapter = TypeAdapter(List[Comment])
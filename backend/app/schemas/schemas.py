@@ -79,6 +79,24 @@ class AppealUpdate(BaseModel):
     email: Optional[str] = None
     phone: Optional[str] = None
 
+class AppealBulkUpdate(BaseModel):
+    appeal_ids: List[int]
+    status: Optional[str] = None
+    category_id: Optional[int] = None  # 0 clears the category
+    add_public_tag_ids: List[int] = []
+    remove_public_tag_ids: List[int] = []
+    add_internal_tag_ids: List[int] = []
+    remove_internal_tag_ids: List[int] = []
+
+class AppealBulkItemResult(BaseModel):
+    appeal_id: int
+    success: bool
+    changed: bool = False
+    detail: Optional[str] = None
+
+class AppealBulkResult(BaseModel):
+    results: List[AppealBulkItemResult]
+
 class Appeal(BaseModel):
     id: int
     is_anonymous: bool
@@ -98,6 +116,12 @@ class Appeal(BaseModel):
     class Config:
         from_attributes = True
 
+class AppealChanges(BaseModel):
+    appeals: List[Appeal]
+    deleted: List[int]
+    token: str
+    has_more: bool
+
 class CommentCreate(BaseModel):
     content: str
 
@@ -113,6 +137,20 @@ class Comment(BaseModel):
     class Config:
         from_attributes = True
 
+class Attachment(BaseModel):
+    id: int
+    owner_type: str
+    owner_id: int
+    unique_name: str
+    original_name: Optional[str] = None
+    mime_type: Optional[str] = None
+    size: Optional[int] = None
+    sha256: Optional[str] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
 class AppealHistoryItem(BaseModel):
     id: int
     appeal_id: int
@@ -246,3 +284,27 @@ class AdminTelegramId(AdminTelegramIdBase):
     
     class Config:
         from_attributes = True
+
+class SlowQueryStats(BaseModel):
+    shape: str
+    count: int
+    total_ms: float
+    max_ms: float
+    routes: List[str]
+    parameters: str
+
+class DuplicateCandidate(BaseModel):
+    appeal_id: int
+    similarity: float
+    status: str
+    created_at: Optional[datetime] = None
+    text: str
+
+class CategorySuggestionRequest(BaseModel):
+    text: str
+    limit: int = 3
+
+class CategorySuggestion(BaseModel):
+    category_id: int
+    name: str
+    score: float
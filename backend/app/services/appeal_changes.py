@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models.models import Appeal, AppealChange
+
+CHANGE_CHUNK_SIZE = 500
+
+
+def current_change_token(db: Session) -> int:
+    return db.query(func.max(AppealChange.id)).scalar() or 0
+
+
+def record_appeal_changes(db: Session, appeal_ids: Iterable[int], deleted: bool = False):
+    """
+    Append appeals to the change log within the caller's transaction. The log
+    sequence is what delta sync follows; updated_at is left alone, since
+    it means the last edit of the appeal itself (stats read resolution time
+    from it) and tag or category renames are no such edit.
+
+    Only the newest entry per appeal is kept. Older entries are removed after
+    the insert, so the highest sequence number is never freed for reuse.
+    """
+    ids = sorted(set(appeal_ids))
+    if not ids:
+        return
+    now = datetime.utcnow()
+    previous_max = current_change_token(db)
+    for start in range(0, len(ids), CHANGE_CHUNK_SIZE):
+        chunk = ids[start:start + CHANGE_CHUNK_SIZE]
+        db.execute(
+            AppealChange.__table__.insert(),
+            [{"appeal_id": appeal_id, "deleted": deleted, "changed_at": now} for appeal_id in chunk]
+        )
+        db.execute(
+            delete(AppealChange)
+            .where(AppealChange.appeal_id.in_(chunk), AppealChange.id <= previous_max)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def appeal_ids_with_tag(db: Session, link_table, tag_id: int):
+    return db.execute(select(link_table.c.appeal_id).where(link_table.c.tag_id == tag_id)).scalars().all()
+
+
+def appeal_ids_in_category(db: Session, category_id: int):
+    return db.execute(select(Appeal.id).where(Appeal.category_id == category_id)).scalars().all()
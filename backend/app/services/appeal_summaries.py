@@ -0,0 +1,94 @@
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+
+from app.models.models import (
+    Appeal, Category, PublicTag, InternalTag, appeal_public_tags, appeal_internal_tags
+)
+from app.services.attachments import appeal_attachments_count
+
+SUMMARY_TEXT_LENGTH = 280
+
+SUMMARY_FIELDS = (
+    "id", "status", "is_anonymous", "author_name", "category_id", "category",
+    "text", "text_truncated", "attachments_count", "public_tags", "internal_tags",
+    "created_at", "updated_at",
+)
+
+# Fields filled by follow-up queries rather than columns of the main select
+TAG_FIELDS = {
+    "public_tags": (PublicTag, appeal_public_tags),
+    "internal_tags": (InternalTag, appeal_internal_tags),
+}
+
+
+def parse_summary_fields(fields: Optional[str]) -> List[str]:
+    """Validate a comma-separated `fields` value; raises ValueError on unknown names."""
+    if not fields:
+        return list(SUMMARY_FIELDS)
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in SUMMARY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [name for name in dict.fromkeys(requested) if name != "id"]
+
+
+def summary_query(db: Session, fields: Sequence[str]) -> Query:
+    """Select only the columns behind the requested summary fields."""
+    columns = {
+        "id": Appeal.id,
+        "status": Appeal.status,
+        "is_anonymous": Appeal.is_anonymous,
+        "author_name": Appeal.author_name,
+        "category_id": Appeal.category_id,
+        "text": func.substr(Appeal.text, 1, SUMMARY_TEXT_LENGTH),
+        "text_truncated": func.length(Appeal.text) > SUMMARY_TEXT_LENGTH,
+        "attachments_count": appeal_attachments_count(),
+        "created_at": Appeal.created_at,
+        "updated_at": Appeal.updated_at,
+    }
+    selected = [columns[name].label(name) for name in fields if name in columns]
+    query = db.query(*selected).select_from(Appeal)
+    if "category" in fields:
+        query = query.add_columns(
+            Category.id.label("category__id"), Category.name.label("category__name")
+        ).outerjoin(Category, Category.id == Appeal.category_id)
+    return query
+
+
+def load_summary_tags(db: Session, appeal_ids: List[int], tag_model, link_table) -> Dict[int, List[dict]]:
+    tags: Dict[int, List[dict]] = {appeal_id: [] for appeal_id in appeal_ids}
+    if not appeal_ids:
+        return tags
+    rows = db.query(
+        link_table.c.appeal_id, tag_model.id, tag_model.name, tag_model.color
+    ).join(
+        tag_model, tag_model.id == link_table.c.tag_id
+    ).filter(
+        link_table.c.appeal_id.in_(appeal_ids)
+    ).order_by(tag_model.order, tag_model.id).all()
+    for appeal_id, tag_id, name, color in rows:
+        tags[appeal_id].append({"id": tag_id, "name": name, "color": color})
+    return tags
+
+
+def build_summaries(db: Session, rows, fields: Sequence[str]) -> List[dict]:
+    items = []
+    for row in rows:
+        data = row._asdict()
+        if "category" in fields:
+            category_id = data.pop("category__id")
+            category_name = data.pop("category__name")
+            data["category"] = {"id": category_id, "name": category_name} if category_id else None
+        if "text_truncated" in data:
+            data["text_truncated"] = bool(data["text_truncated"])
+        items.append(data)
+
+    appeal_ids = [item["id"] for item in items]
+    for name, (tag_model, link_table) in TAG_FIELDS.items():
+        if name in fields:
+            tags = load_summary_tags(db, appeal_ids, tag_model, link_table)
+            for item in items:
+                item[name] = tags[item["id"]]
+    return items
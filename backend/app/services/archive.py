@@ -0,0 +1,329 @@
+"""
+Archive tier for closed appeals.
+
+Appeals in one of ARCHIVE_STATUSES that nobody touched for ARCHIVE_AFTER_DAYS
+(updated_at, the last edit of the appeal row itself) are moved out
+of appeals, comments, appeal_history and the tag link tables into
+archived_appeals: one row per appeal with the appeal, its comments, history,
+tag ids and attachment rows as JSON. Lists, search and stats then only scan
+the appeals people still work on. Uploaded files stay on disk.
+
+Archiving writes a deletion tombstone to appeal_changes so synced dashboards
+drop the appeal, and restore() puts every row back under its old id and
+logs the appeal as changed. Single-appeal reads fall back to the archive
+through archived_appeal(), archived_comments(), archived_history() and
+archived_attachments().
+"""
+import enum
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import DateTime, Enum, delete, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import run_in_session
+from app.models.models import (
+    Appeal, AppealHistory, ArchivedAppeal, Attachment, Category, Comment, InternalTag, PublicTag, User,
+    appeal_internal_tags, appeal_public_tags
+)
+from app.services.appeal_changes import record_appeal_changes
+from app.services.attachments import OWNER_APPEAL, OWNER_COMMENT
+
+logger = logging.getLogger(__name__)
+
+
+def archive_statuses() -> List[str]:
+    return [status.strip() for status in settings.ARCHIVE_STATUSES.split(",") if status.strip()]
+
+
+def _dump_row(table, row) -> dict:
+    values = {}
+    for column in table.columns:
+        value = row[column.name]
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, enum.Enum):
+            value = value.value
+        values[column.name] = value
+    return values
+
+
+def _load_row(table, values: dict) -> dict:
+    row = {}
+    for column in table.columns:
+        if column.name not in values:
+            continue
+        value = values[column.name]
+        if value is not None:
+            if isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column.type, Enum) and column.type.enum_class:
+                value = column.type.enum_class(value)
+        row[column.name] = value
+    return row
+
+
+def _rows_by_appeal(db: Session, table, appeal_ids: List[int]):
+    grouped = defaultdict(list)
+    for row in db.execute(select(table).where(table.c.appeal_id.in_(appeal_ids)).order_by(table.c.id)).mappings():
+        grouped[row["appeal_id"]].append(_dump_row(table, row))
+    return grouped
+
+
+def _tag_ids_by_appeal(db: Session, link_table, appeal_ids: List[int]):
+    grouped = defaultdict(list)
+    for appeal_id, tag_id in db.execute(
+        select(link_table.c.appeal_id, link_table.c.tag_id).where(link_table.c.appeal_id.in_(appeal_ids))
+    ):
+        grouped[appeal_id].append(tag_id)
+    return grouped
+
+
+def _attachments_by_appeal(db: Session, appeal_ids: List[int], comments) -> tuple:
+    """Attachment rows of the appeals and of their comments, and the matching delete condition."""
+    comment_appeal = {row["id"]: appeal_id for appeal_id, rows in comments.items() for row in rows}
+    table = Attachment.__table__
+    condition = or_(
+        (table.c.owner_type == OWNER_APPEAL) & table.c.owner_id.in_(appeal_ids),
+        (table.c.owner_type == OWNER_COMMENT) & table.c.owner_id.in_(list(comment_appeal))
+    )
+    grouped = defaultdict(list)
+    for row in db.execute(select(table).where(condition).order_by(table.c.id)).mappings():
+        appeal_id = row["owner_id"] if row["owner_type"] == OWNER_APPEAL else comment_appeal[row["owner_id"]]
+        grouped[appeal_id].append(_dump_row(table, row))
+    return grouped, condition
+
+
+def archive_batch(db: Session, cutoff: datetime, limit: int) -> List[int]:
+    """Move up to `limit` appeals closed and untouched since before cutoff; does not commit."""
+    newest_id = db.query(func.max(Appeal.id)).scalar()
+    if newest_id is None:
+        return []
+    # The newest appeal stays: SQLite hands out max(id) + 1, so archiving it
+    # would let the next new appeal take its id
+    ids = db.execute(
+        select(Appeal.id)
+        .where(Appeal.status.in_(archive_statuses()), Appeal.updated_at < cutoff, Appeal.id < newest_id)
+        .order_by(Appeal.id)
+        .limit(limit)
+    ).scalars().all()
+    if not ids:
+        return []
+
+    appeals = Appeal.__table__
+    comments = _rows_by_appeal(db, Comment.__table__, ids)
+    history = _rows_by_appeal(db, AppealHistory.__table__, ids)
+    public_tags = _tag_ids_by_appeal(db, appeal_public_tags, ids)
+    internal_tags = _tag_ids_by_appeal(db, appeal_internal_tags, ids)
+    attachments, attachment_condition = _attachments_by_appeal(db, ids, comments)
+    now = datetime.utcnow()
+    db.execute(insert(ArchivedAppeal), [
+        {
+            "id": row["id"],
+            "status": row["status"],
+            "category_id": row["category_id"],
+            "telegram_user_id": row["telegram_user_id"],
+            "created_at": row["created_at"],
+            "archived_at": now,
+            "payload": json.dumps({
+                "appeal": _dump_row(appeals, row),
+                "public_tag_ids": public_tags[row["id"]],
+                "internal_tag_ids": internal_tags[row["id"]],
+                "comments": comments[row["id"]],
+                "history": history[row["id"]],
+                "attachments": attachments[row["id"]],
+            }, ensure_ascii=False),
+        }
+        for row in db.execute(select(appeals).where(appeals.c.id.in_(ids))).mappings()
+    ])
+
+    # Comment ids can be handed out again once archived (SQLite reuses
+    # max(id) + 1), so their attachment rows must not stay behind
+    db.execute(delete(Attachment).where(attachment_condition))
+    # Explicit deletes: SQLite does not enforce the ON DELETE CASCADE clauses
+    for table in (appeal_public_tags, appeal_internal_tags, Comment.__table__, AppealHistory.__table__):
+        db.execute(delete(table).where(table.c.appeal_id.in_(ids)))
+    db.execute(delete(appeals).where(appeals.c.id.in_(ids)))
+    record_appeal_changes(db, ids, deleted=True)
+    return ids
+
+
+def archive_closed_appeals(db: Session, older_than_days: Optional[int] = None) -> int:
+    """Archive every eligible appeal, committing batch by batch; returns how many moved."""
+    days = settings.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    total = 0
+    while True:
+        try:
+            moved = archive_batch(db, cutoff, settings.ARCHIVE_BATCH_SIZE)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        total += len(moved)
+        if len(moved) < settings.ARCHIVE_BATCH_SIZE:
+            break
+    if total:
+        logger.info(f"Archived {total} appeals closed before {cutoff:%Y-%m-%d}")
+    return total
+
+
+def _archived_payload(db: Session, appeal_id: int, telegram_user_id: Optional[int] = None) -> Optional[dict]:
+    query = select(ArchivedAppeal.payload).where(ArchivedAppeal.id == appeal_id)
+    if telegram_user_id is not None:
+        query = query.where(ArchivedAppeal.telegram_user_id == telegram_user_id)
+    payload = db.execute(query).scalar()
+    return json.loads(payload) if payload is not None else None
+
+
+def _existing(db: Session, column, ids) -> set:
+    ids = set(ids)
+    if not ids:
+        return set()
+    return set(db.execute(select(column).where(column.in_(ids))).scalars())
+
+
+def restore_appeal(db: Session, appeal_id: int) -> bool:
+    """Write unit: move an archived appeal back under its old ids; False when it is not archived."""
+    payload = _archived_payload(db, appeal_id)
+    if payload is None:
+        return False
+
+    appeal = _load_row(Appeal.__table__, payload["appeal"])
+    if appeal["category_id"] not in _existing(db, Category.id, [appeal["category_id"]]):
+        appeal["category_id"] = None
+    db.execute(insert(Appeal), [appeal])
+
+    for link_table, tag_model, key in (
+        (appeal_public_tags, PublicTag, "public_tag_ids"),
+        (appeal_internal_tags, InternalTag, "internal_tag_ids"),
+    ):
+        tag_ids = _existing(db, tag_model.id, payload[key])
+        if tag_ids:
+            db.execute(insert(link_table), [{"appeal_id": appeal_id, "tag_id": tag_id} for tag_id in sorted(tag_ids)])
+
+    comments = [_load_row(Comment.__table__, row) for row in payload["comments"]]
+    history = [_load_row(AppealHistory.__table__, row) for row in payload["history"]]
+    users = _existing(db, User.id, [row["user_id"] for row in comments + history])
+    # Comments of deleted users would have been deleted with them
+    comments = [row for row in comments if row["user_id"] in users]
+    taken = _existing(db, Comment.id, [row["id"] for row in comments])
+    comment_ids = {}
+    for row in comments:
+        old_id = row["id"]
+        if old_id in taken:
+            # The id went to a newer comment meanwhile: this one gets a fresh id
+            row.pop("id")
+            comment_ids[old_id] = db.execute(insert(Comment).values(**row).returning(Comment.id)).scalar()
+        else:
+            db.execute(insert(Comment), [row])
+            comment_ids[old_id] = old_id
+    attachments = []
+    for row in payload.get("attachments", []):
+        row = _load_row(Attachment.__table__, row)
+        row.pop("id")
+        if row["owner_type"] == OWNER_COMMENT:
+            if row["owner_id"] not in comment_ids:
+                continue
+            row["owner_id"] = comment_ids[row["owner_id"]]
+        attachments.append(row)
+    if attachments:
+        db.execute(insert(Attachment), attachments)
+    for row in history:
+        # Nothing refers to history ids, fresh ones cannot collide
+        row.pop("id", None)
+        if row["user_id"] not in users:
+            row["user_id"] = None
+    if history:
+        db.execute(insert(AppealHistory), history)
+
+    db.execute(delete(ArchivedAppeal).where(ArchivedAppeal.id == appeal_id))
+    record_appeal_changes(db, [appeal_id])
+    return True
+
+
+def _with_relations(db: Session, payload: dict) -> dict:
+    appeal = _load_row(Appeal.__table__, payload["appeal"])
+    appeal["category"] = db.get(Category, appeal["category_id"]) if appeal["category_id"] else None
+    for model, key, ids in (
+        (PublicTag, "public_tags", payload["public_tag_ids"]),
+        (InternalTag, "internal_tags", payload["internal_tag_ids"]),
+    ):
+        appeal[key] = db.query(model).filter(model.id.in_(ids)).order_by(model.order).all() if ids else []
+    return appeal
+
+
+def archived_appeal(db: Session, appeal_id: int, telegram_user_id: Optional[int] = None) -> Optional[dict]:
+    """An archived appeal shaped like the AppealSchema of a live one, or None."""
+    payload = _archived_payload(db, appeal_id, telegram_user_id)
+    return _with_relations(db, payload) if payload is not None else None
+
+
+def archived_appeals_of_telegram_user(db: Session, telegram_user_id: int) -> List[dict]:
+    payloads = db.execute(
+        select(ArchivedAppeal.payload).where(ArchivedAppeal.telegram_user_id == telegram_user_id)
+    ).scalars().all()
+    return [_with_relations(db, json.loads(payload)) for payload in payloads]
+
+
+def _with_users(db: Session, table, rows: List[dict]) -> List[dict]:
+    rows = [_load_row(table, row) for row in rows]
+    user_ids = {row["user_id"] for row in rows if row["user_id"] is not None}
+    users = {user.id: user for user in db.query(User).filter(User.id.in_(user_ids))} if user_ids else {}
+    for row in rows:
+        row["user"] = users.get(row["user_id"])
+    return rows
+
+
+def archived_comments(db: Session, appeal_id: int) -> Optional[List[dict]]:
+    payload = _archived_payload(db, appeal_id)
+    if payload is None:
+        return None
+    return sorted(_with_users(db, Comment.__table__, payload["comments"]), key=lambda row: row["created_at"])
+
+
+def archived_history(db: Session, appeal_id: int) -> Optional[List[dict]]:
+    payload = _archived_payload(db, appeal_id)
+    if payload is None:
+        return None
+    return sorted(
+        _with_users(db, AppealHistory.__table__, payload["history"]), key=lambda row: row["created_at"], reverse=True
+    )
+
+
+def archived_attachments(db: Session, appeal_id: int) -> Optional[List[dict]]:
+    payload = _archived_payload(db, appeal_id)
+    if payload is None:
+        return None
+    rows = [_load_row(Attachment.__table__, row) for row in payload.get("attachments", [])]
+    return sorted(rows, key=lambda row: (row["created_at"], row["id"]))
+
+
+class Archiver:
+    def __init__(self):
+        self._thread = None
+
+    def start(self):
+        """Archive every ARCHIVE_INTERVAL_SECONDS in a daemon thread."""
+        if self._thread is not None:
+            return
+
+        def loop():
+            while True:
+                try:
+                    run_in_session(archive_closed_appeals)
+                except Exception as e:
+                    logger.error(f"Archiving closed appeals failed: {e}")
+                time.sleep(settings.ARCHIVE_INTERVAL_SECONDS)
+
+        self._thread = threading.Thread(target=loop, name="archiver", daemon=True)
+        self._thread.start()
+
+
+archiver = Archiver()
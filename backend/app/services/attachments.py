@@ -0,0 +1,138 @@
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import uuid
+from typing import List, Optional
+
+from fastapi import UploadFile
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Appeal, Attachment, Comment
+
+logger = logging.getLogger(__name__)
+
+OWNER_APPEAL = "appeal"
+OWNER_COMMENT = "comment"
+
+# Keys kept in the appeal/comment JSON columns the API returns
+FILE_INFO_KEYS = ("path", "original_name", "unique_name")
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+async def save_uploads(files: Optional[List[UploadFile]]) -> List[dict]:
+    """Write uploads to UPLOAD_DIR and return their file info with size, hash and mime type."""
+    saved = []
+    if not files:
+        return saved
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    for file in files:
+        if file.filename:
+            file_extension = os.path.splitext(file.filename)[1]
+            unique_filename = f"{uuid.uuid4()}{file_extension}"
+            file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
+
+            content = await file.read()
+            with open(file_path, "wb") as f:
+                f.write(content)
+
+            saved.append({
+                "path": file_path,
+                "original_name": file.filename,
+                "unique_name": unique_filename,
+                "mime_type": file.content_type or mimetypes.guess_type(file.filename)[0],
+                "size": len(content),
+                "sha256": hashlib.sha256(content).hexdigest(),
+            })
+    return saved
+
+
+def files_json(saved: List[dict]) -> Optional[str]:
+    if not saved:
+        return None
+    return json.dumps([{key: info[key] for key in FILE_INFO_KEYS} for info in saved])
+
+
+def add_attachments(db: Session, owner_type: str, owner_id: int, saved: List[dict]):
+    if not saved:
+        return
+    db.execute(Attachment.__table__.insert(), [
+        {
+            "owner_type": owner_type,
+            "owner_id": owner_id,
+            "unique_name": info["unique_name"],
+            "original_name": info.get("original_name"),
+            "mime_type": info.get("mime_type"),
+            "size": info.get("size"),
+            "sha256": info.get("sha256"),
+        }
+        for info in saved
+    ])
+
+
+def appeal_attachments_count():
+    """Correlated count for select lists over Appeal."""
+    return select(func.count(Attachment.id)).where(
+        Attachment.owner_type == OWNER_APPEAL,
+        Attachment.owner_id == Appeal.id
+    ).correlate(Appeal).scalar_subquery()
+
+
+def appeal_has_attachments():
+    return select(Attachment.id).where(
+        Attachment.owner_type == OWNER_APPEAL,
+        Attachment.owner_id == Appeal.id
+    ).exists()
+
+
+def _describe_stored_file(info: dict) -> dict:
+    unique_name = info.get("unique_name") or os.path.basename(info.get("path") or "")
+    original_name = info.get("original_name")
+    described = {
+        "unique_name": unique_name,
+        "original_name": original_name,
+        "mime_type": mimetypes.guess_type(original_name or unique_name)[0],
+        "size": None,
+        "sha256": None,
+    }
+    file_path = os.path.join(settings.UPLOAD_DIR, unique_name)
+    if unique_name and os.path.isfile(file_path):
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        described["size"] = os.path.getsize(file_path)
+        described["sha256"] = digest.hexdigest()
+    return described
+
+
+def backfill_attachments(db: Session) -> int:
+    """
+    Fill the attachments table from Appeal.media_files and Comment.files.
+    Runs once: it does nothing when the table already has rows.
+    Files missing on disk are recorded without size and hash.
+    """
+    if db.query(Attachment.id).first() is not None:
+        return 0
+
+    sources = (
+        (OWNER_APPEAL, db.query(Appeal.id, Appeal.media_files).filter(Appeal.media_files.isnot(None))),
+        (OWNER_COMMENT, db.query(Comment.id, Comment.files).filter(Comment.files.isnot(None))),
+    )
+    total = 0
+    for owner_type, query in sources:
+        for owner_id, raw in query.yield_per(500):
+            try:
+                infos = json.loads(raw) or []
+            except ValueError:
+                logger.warning(f"Skipping unparsable files JSON on {owner_type} {owner_id}")
+                continue
+            described = [_describe_stored_file(info) for info in infos if isinstance(info, dict)]
+            add_attachments(db, owner_type, owner_id, described)
+            total += len(described)
+    db.commit()
+    return total
@@ -0,0 +1,327 @@
+"""
+Category suggestions for new appeals.
+
+A TF-IDF vectorizer (word stems and stem bigrams, sublinear tf, L2 norm)
+and a multinomial logistic regression are trained on the newest
+CATEGORIZER_MAX_TRAINING appeals that have a category - which includes every
+correction moderators made through update_appeal.
+
+The model is trained once per host, not once per worker: the worker that
+gets the lock on CATEGORIZER_MODEL_PATH retrains when appeals changed (at
+most every CATEGORIZER_RETRAIN_SECONDS) and writes the vocabulary, idf and
+weights to that file; every worker polls the file every
+CATEGORIZER_RELOAD_SECONDS and swaps a newer model in at once, so suggest()
+never waits. With CATEGORIZER_TRAIN_IN_WORKERS=false the workers only load,
+and `python -m app.services.categorizer` trains offline (e.g. from cron).
+
+Needs numpy and scipy. scipy is imported here only, so the rest of the app
+starts without paying for it.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, every worker trains for itself
+    fcntl = None
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import minimize
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import run_in_read_session, SessionLocal
+from app.models.models import Appeal, Category
+from app.services.appeal_changes import current_change_token
+
+logger = logging.getLogger(__name__)
+
+STEM_LENGTH = 6
+L2_PENALTY = 1e-3
+MAX_ITERATIONS = 200
+
+_WORD = re.compile(r"[a-zа-я0-9]{2,}")
+
+
+def tokenize(text: str) -> List[str]:
+    # Cutting words to a fixed prefix is a crude but effective stemmer for Russian
+    stems = [word[:STEM_LENGTH] for word in _WORD.findall((text or "").lower().replace("ё", "е"))]
+    return stems + [f"{a} {b}" for a, b in zip(stems, stems[1:])]
+
+
+class TfidfVectorizer:
+    def __init__(self, max_features: int, min_df: int = 2):
+        self.max_features = max_features
+        self.min_df = min_df
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = None
+
+    def fit_transform(self, texts: List[str]):
+        tokenized = [tokenize(text) for text in texts]
+        document_frequency = Counter()
+        for tokens in tokenized:
+            document_frequency.update(set(tokens))
+        frequent = [(count, token) for token, count in document_frequency.items() if count >= self.min_df]
+        frequent.sort(reverse=True)
+        self.vocabulary = {token: index for index, (_, token) in enumerate(frequent[:self.max_features])}
+        df = np.array([count for count, _ in frequent[:self.max_features]], dtype=np.float64)
+        self.idf = np.log((1 + len(texts)) / (1 + df)) + 1
+        return self._matrix(tokenized)
+
+    def transform(self, texts: List[str]):
+        return self._matrix([tokenize(text) for text in texts])
+
+    def _matrix(self, tokenized: List[List[str]]):
+        indptr, indices, values = [0], [], []
+        for tokens in tokenized:
+            counts = Counter(self.vocabulary[token] for token in tokens if token in self.vocabulary)
+            indices.extend(counts.keys())
+            values.extend(counts.values())
+            indptr.append(len(indices))
+        matrix = sparse.csr_matrix(
+            (np.array(values, dtype=np.float64), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+            shape=(len(tokenized), len(self.vocabulary))
+        )
+        matrix.data = 1 + np.log(matrix.data)
+        matrix = matrix.multiply(self.idf).tocsr()
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms) @ matrix
+
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    scores /= scores.sum(axis=1, keepdims=True)
+    return scores
+
+
+def train_softmax_regression(X, y, classes: int):
+    """Weights (features + 1, classes) of an L2-regularized multinomial logistic regression."""
+    samples, features = X.shape
+    targets = np.zeros((samples, classes))
+    targets[np.arange(samples), y] = 1
+    X = sparse.hstack([X, np.ones((samples, 1))]).tocsr()
+
+    def loss_and_gradient(flat):
+        weights = flat.reshape(features + 1, classes)
+        scores = X @ weights
+        log_norm = np.log(np.exp(scores - scores.max(axis=1, keepdims=True)).sum(axis=1)) + scores.max(axis=1)
+        loss = (log_norm - scores[np.arange(samples), y]).mean() + L2_PENALTY / 2 * (weights[:-1] ** 2).sum()
+        gradient = X.T @ (_softmax(scores) - targets) / samples
+        gradient[:-1] += L2_PENALTY * weights[:-1]
+        return loss, gradient.ravel()
+
+    result = minimize(
+        loss_and_gradient, np.zeros((features + 1) * classes), jac=True, method="L-BFGS-B",
+        options={"maxiter": MAX_ITERATIONS}
+    )
+    return result.x.reshape(features + 1, classes)
+
+
+class CategoryModel:
+    def __init__(
+        self, vectorizer: TfidfVectorizer, weights, category_ids: List[int], trained_on: int,
+        names: Dict[int, str], token: int
+    ):
+        self.vectorizer = vectorizer
+        self.weights = weights
+        self.category_ids = category_ids
+        self.trained_on = trained_on
+        self.names = names
+        self.token = token
+
+    def save(self, path: str):
+        """Write the model to path; readers see either the old file or the complete new one."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        vocabulary = sorted(self.vectorizer.vocabulary, key=self.vectorizer.vocabulary.get)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            np.savez(
+                f,
+                vocabulary=np.array(vocabulary),
+                idf=self.vectorizer.idf,
+                weights=self.weights,
+                category_ids=np.array(self.category_ids, dtype=np.int64),
+                trained_on=np.array(self.trained_on),
+                token=np.array(self.token),
+                names=np.array(json.dumps(self.names, ensure_ascii=False))
+            )
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CategoryModel":
+        with np.load(path, allow_pickle=False) as data:
+            vectorizer = TfidfVectorizer(len(data["vocabulary"]))
+            vectorizer.vocabulary = {str(token): index for index, token in enumerate(data["vocabulary"])}
+            vectorizer.idf = data["idf"]
+            names = {int(category_id): name for category_id, name in json.loads(str(data["names"])).items()}
+            return cls(
+                vectorizer, data["weights"], [int(category_id) for category_id in data["category_ids"]],
+                int(data["trained_on"]), names, int(data["token"])
+            )
+
+    def predict(self, text: str, limit: int):
+        x = self.vectorizer.transform([text])
+        scores = x @ self.weights[:-1] + self.weights[-1]
+        probabilities = _softmax(np.asarray(scores))[0]
+        top = np.argsort(-probabilities)[:limit]
+        return [(self.category_ids[index], float(probabilities[index])) for index in top]
+
+
+def fit_model(db: Session) -> Optional[CategoryModel]:
+    """Train on the current appeals; None when fewer than two categories have enough examples."""
+    token = current_change_token(db)
+    started = time.perf_counter()
+    rows = db.execute(
+        select(Appeal.text, Appeal.category_id)
+        .where(Appeal.category_id.isnot(None))
+        .order_by(Appeal.id.desc())
+        .limit(settings.CATEGORIZER_MAX_TRAINING)
+    ).all()
+    counts = Counter(category_id for _, category_id in rows)
+    category_ids = sorted(
+        category_id for category_id, count in counts.items() if count >= settings.CATEGORIZER_MIN_EXAMPLES
+    )
+    if len(category_ids) < 2:
+        logger.info("Not enough categorized appeals to train category suggestions")
+        return None
+    names = dict(db.execute(select(Category.id, Category.name)).all())
+    label = {category_id: index for index, category_id in enumerate(category_ids)}
+    texts = [text for text, category_id in rows if category_id in label]
+    y = np.array([label[category_id] for _, category_id in rows if category_id in label])
+
+    vectorizer = TfidfVectorizer(settings.CATEGORIZER_MAX_FEATURES)
+    X = vectorizer.fit_transform(texts)
+    weights = train_softmax_regression(X, y, len(category_ids))
+    logger.info(
+        f"Category model trained on {len(texts)} appeals, {len(category_ids)} categories, "
+        f"{len(vectorizer.vocabulary)} features in {time.perf_counter() - started:.1f}s"
+    )
+    return CategoryModel(vectorizer, weights, category_ids, len(texts), names, token)
+
+
+@contextmanager
+def training_lock(path: str, wait: bool = False):
+    """Yields whether this process holds the training lock of the model file."""
+    if fcntl is None:
+        yield True
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.lock", "a") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class Categorizer:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.CATEGORIZER_MODEL_PATH
+        self.model: Optional[CategoryModel] = None
+        self.token = None
+        self._loaded_mtime = None
+        self._next_training = 0.0
+        self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        return self.model is not None
+
+    def reload(self) -> bool:
+        """Swap in the model file if it changed since the last load."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._loaded_mtime:
+            return False
+        model = CategoryModel.load(self.path)
+        self.model, self.token, self._loaded_mtime = model, model.token, mtime
+        return True
+
+    def train(self, db: Session, wait: bool = False) -> bool:
+        """
+        Retrain and write the model file if appeals changed since it was
+        trained. Returns False without training when another process holds
+        the lock, so the caller tries again later.
+        """
+        with training_lock(self.path, wait) as locked:
+            if not locked:
+                return False
+            self.reload()
+            token = current_change_token(db)
+            if token == self.token:
+                return True
+            model = fit_model(db)
+            if model is not None:
+                model.save(self.path)
+                self.reload()
+            self.token = token
+            return True
+
+    def refresh(self):
+        self.reload()
+        if settings.CATEGORIZER_TRAIN_IN_WORKERS and time.monotonic() >= self._next_training:
+            if run_in_read_session(self.train):
+                self._next_training = time.monotonic() + settings.CATEGORIZER_RETRAIN_SECONDS
+
+    def suggest(self, text: str, limit: int = 3) -> List[dict]:
+        model = self.model
+        if model is None:
+            return []
+        return [
+            {"category_id": category_id, "name": model.names.get(category_id, ""), "score": round(score, 4)}
+            for category_id, score in model.predict(text, limit)
+        ]
+
+    def start(self):
+        """Load and, when due, retrain every CATEGORIZER_RELOAD_SECONDS, in a daemon thread."""
+        if self._thread is not None:
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f"Category model refresh failed: {e}")
+                time.sleep(settings.CATEGORIZER_RELOAD_SECONDS)
+
+        self._thread = threading.Thread(target=loop, name="categorizer", daemon=True)
+        self._thread.start()
+
+
+categorizer = Categorizer()
+
+
+def main():
+    """Train the model file now, waiting for a worker that is training it."""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    db = SessionLocal()
+    try:
+        Categorizer().train(db, wait=True)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Near-duplicate detection over appeal texts.
+
+Texts are normalized (case, ё, punctuation) and cut into overlapping
+character 5-grams. A one-permutation MinHash signature of DUPLICATE_LSH_BANDS
+x DUPLICATE_LSH_ROWS values is split into bands; appeals sharing any band
+hash are candidates, which are then checked against their stored text with
+the exact shingle Jaccard similarity. With 10 bands of 4 rows, pairs above
+~0.55 similarity are found with high probability.
+
+Per band the index keeps a sorted numpy array of 64-bit (band hash << 32 |
+appeal id) keys, 8 bytes per appeal and band (~80 MB for 1M appeals), looked
+up with searchsorted, plus a small dict of recent additions merged in from
+time to time. Sorting and merging run inside numpy, so they neither build
+Python lists of every key nor hold the GIL. It covers the newest
+DUPLICATE_INDEX_MAX_APPEALS appeals. New and edited appeals are picked up
+from the appeal_changes log before every lookup, so each worker's index also
+sees what other workers wrote: an edit adds the band keys its new text does
+not share with the indexed ones. The old keys stay behind until the next
+rebuild; verification against the current text filters them out.
+"""
+import logging
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import run_in_read_session
+from app.models.models import Appeal, AppealChange
+from app.services.appeal_changes import current_change_token
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 5
+MAX_CANDIDATES = 200
+DELTA_LIMIT = 20_000
+BUILD_BATCH_SIZE = 5_000
+
+_HASH_MASK = (1 << 64) - 1
+_KEY_MASK = (1 << 32) - 1
+_EMPTY = _HASH_MASK
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    return _NON_WORD.sub(" ", (text or "").lower().replace("ё", "е")).strip()
+
+
+def shingles(text: str) -> Set[str]:
+    normalized = normalize(text)
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def minhash(items: Set[str], bins: int) -> List[int]:
+    """One-permutation MinHash: the smallest hash per bin, empty bins filled from the next one."""
+    values = [_EMPTY] * bins
+    for item in items:
+        # str hashes are salted per process, which is fine for an index that lives in it
+        h = hash(item) & _HASH_MASK
+        slot = h % bins
+        h //= bins
+        if h < values[slot]:
+            values[slot] = h
+    if _EMPTY in values and any(value != _EMPTY for value in values):
+        for slot in range(bins):
+            if values[slot] == _EMPTY:
+                offset = 1
+                while values[(slot + offset) % bins] == _EMPTY:
+                    offset += 1
+                values[slot] = (values[(slot + offset) % bins] + offset * 0x9E3779B97F4A7C15) & _HASH_MASK
+    return values
+
+
+class DuplicateIndex:
+    def __init__(self, bands: int, rows: int, max_appeals: int):
+        self.bands = bands
+        self.rows = rows
+        self.max_appeals = max_appeals
+        self.ready = False
+        self.token = 0
+        self.entries = 0
+        self._sorted = [np.empty(0, dtype=np.uint64) for _ in range(bands)]
+        self._delta: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+        self._delta_size = 0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._building = False
+
+    def band_keys(self, text: str) -> List[int]:
+        items = shingles(text)
+        if not items:
+            return []
+        values = minhash(items, self.bands * self.rows)
+        return [
+            hash(tuple(values[band * self.rows:(band + 1) * self.rows])) & _KEY_MASK
+            for band in range(self.bands)
+        ]
+
+    def _contains(self, band: int, key: int, appeal_id: int) -> bool:
+        if appeal_id in self._delta[band].get(key, ()):
+            return True
+        packed = np.uint64(key << 32 | appeal_id)
+        keys = self._sorted[band]
+        index = keys.searchsorted(packed)
+        return bool(index < len(keys) and keys[index] == packed)
+
+    def add(self, appeal_id: int, text: str):
+        keys = self.band_keys(text)
+        if not keys:
+            return
+        with self._lock:
+            missing = [(band, key) for band, key in enumerate(keys) if not self._contains(band, key, appeal_id)]
+            # Re-logged without a text change (tags, status): nothing to add
+            if not missing:
+                return
+            for band, key in missing:
+                self._delta[band].setdefault(key, []).append(appeal_id)
+            self._delta_size += 1
+            self.entries += 1
+            if self._delta_size >= DELTA_LIMIT:
+                self._merge_delta()
+
+    def _merge_delta(self):
+        for band in range(self.bands):
+            added = np.fromiter(
+                (key << 32 | appeal_id for key, ids in self._delta[band].items() for appeal_id in ids),
+                dtype=np.uint64
+            )
+            added.sort()
+            keys = self._sorted[band]
+            self._sorted[band] = np.insert(keys, keys.searchsorted(added), added)
+            self._delta[band] = {}
+        self._delta_size = 0
+
+    def candidates(self, text: str) -> Counter:
+        """Appeal ids sharing a band with the text, counted by shared bands."""
+        found = Counter()
+        keys = self.band_keys(text)
+        with self._lock:
+            for band, key in enumerate(keys):
+                sorted_keys = self._sorted[band]
+                start = sorted_keys.searchsorted(np.uint64(key << 32))
+                end = sorted_keys.searchsorted(np.uint64(key << 32 | _KEY_MASK), side="right")
+                found.update((sorted_keys[start:end] & np.uint64(_KEY_MASK)).tolist())
+                found.update(self._delta[band].get(key, ()))
+        return found
+
+    def build(self, db: Session):
+        """Index the newest max_appeals appeals from scratch."""
+        token = current_change_token(db)
+        columns = [array("Q") for _ in range(self.bands)]
+        count = 0
+        rows = db.execute(
+            select(Appeal.id, Appeal.text).order_by(Appeal.id.desc()).limit(self.max_appeals)
+            .execution_options(yield_per=BUILD_BATCH_SIZE)
+        )
+        for appeal_id, text in rows:
+            for band, key in enumerate(self.band_keys(text)):
+                columns[band].append(key << 32 | appeal_id)
+            count += 1
+        # array("Q") keeps the raw keys compact while reading; numpy sorts them in place
+        sorted_columns = []
+        for band in range(self.bands):
+            keys = np.frombuffer(columns[band], dtype=np.uint64).copy()
+            keys.sort()
+            sorted_columns.append(keys)
+        with self._lock:
+            self._sorted = sorted_columns
+            self._delta = [{} for _ in range(self.bands)]
+            self._delta_size = 0
+            self.entries = count
+            self.token = token
+            self.ready = True
+        logger.info(f"Duplicate index built: {count} appeals")
+
+    def sync(self, db: Session):
+        """Add appeals created or edited (by any worker) since the last sync."""
+        with self._sync_lock:
+            token = current_change_token(db)
+            if token <= self.token:
+                return
+            rows = db.execute(
+                select(Appeal.id, Appeal.text)
+                .join(AppealChange, AppealChange.appeal_id == Appeal.id)
+                .where(AppealChange.id > self.token, AppealChange.id <= token)
+            ).all()
+            for appeal_id, text in rows:
+                self.add(appeal_id, text)
+            self.token = token
+        if self.entries > self.max_appeals * 1.25:
+            # Edits and new appeals pushed it past the bound: start over from the newest
+            self.start_build()
+
+    def find(self, db: Session, text: str, exclude_id: Optional[int] = None, limit: int = 10,
+             threshold: Optional[float] = None) -> List[dict]:
+        """Appeals whose text is at least `threshold` similar, most similar first."""
+        threshold = settings.DUPLICATE_SIMILARITY if threshold is None else threshold
+        self.sync(db)
+        found = self.candidates(text)
+        found.pop(exclude_id, None)
+        if not found:
+            return []
+        ids = [appeal_id for appeal_id, _ in found.most_common(MAX_CANDIDATES)]
+        target = shingles(text)
+        matches = []
+        for appeal_id, candidate_text, status, created_at in db.query(
+            Appeal.id, Appeal.text, Appeal.status, Appeal.created_at
+        ).filter(Appeal.id.in_(ids)):
+            similarity = jaccard(target, shingles(candidate_text))
+            if similarity >= threshold:
+                matches.append({
+                    "appeal_id": appeal_id,
+                    "similarity": round(similarity, 3),
+                    "status": status,
+                    "created_at": created_at,
+                    "text": candidate_text[:300],
+                })
+        matches.sort(key=lambda match: (-match["similarity"], -match["appeal_id"]))
+        return matches[:limit]
+
+    def start_build(self):
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(target=self._build_in_background, name="duplicate-index", daemon=True).start()
+
+    def _build_in_background(self):
+        try:
+            run_in_read_session(self.build)
+        except Exception as e:
+            logger.error(f"Duplicate index build failed: {e}")
+        finally:
+            with self._lock:
+                self._building = False
+
+
+duplicate_index = DuplicateIndex(
+    settings.DUPLICATE_LSH_BANDS, settings.DUPLICATE_LSH_ROWS, settings.DUPLICATE_INDEX_MAX_APPEALS
+)
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import logging
+from typing import Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Sent to a subscriber whose queue overflowed; clients reload their data.
+RESYNC_EVENT = {"type": "resync"}
+
+
+class InProcessEventBroker:
+    """
+    Fan-out of appeal events to the SSE streams of this worker.
+
+    Every subscriber gets a bounded queue. A subscriber that falls behind has
+    its backlog replaced by a single resync event instead of blocking publishers.
+    """
+
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def deliver(self, event: dict):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC_EVENT)
+
+    async def publish(self, event: dict):
+        self.deliver(event)
+
+
+class RedisEventBroker(InProcessEventBroker):
+    """
+    Cross-worker variant: events go through a Redis pub/sub channel and each
+    worker fans them out to its own subscribers.
+    """
+
+    def __init__(self, url: str, channel: str = "appeal-events", queue_size: int = 256):
+        super().__init__(queue_size)
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("The redis event broker requires the 'redis' package") from e
+        self._client = redis.Redis.from_url(url)
+        self.channel = channel
+        self._listener: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.ensure_future(self._listen())
+        return super().subscribe()
+
+    async def publish(self, event: dict):
+        try:
+            await self._client.publish(self.channel, json.dumps(event))
+        except Exception as e:
+            logger.error(f"Failed to publish event: {e}")
+
+    async def _listen(self):
+        pubsub = self._client.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    self.deliver(json.loads(message["data"]))
+        except Exception as e:
+            logger.error(f"Event listener stopped: {e}")
+        finally:
+            await pubsub.close()
+
+
+def build_event_broker(kind: str, url: Optional[str] = None, queue_size: int = 256):
+    if kind == "memory":
+        return InProcessEventBroker(queue_size)
+    if kind == "redis":
+        return RedisEventBroker(url or "redis://localhost:6379/0", queue_size=queue_size)
+    raise ValueError(f"Unknown event broker: {kind}")
+
+
+event_broker = build_event_broker(settings.EVENT_BROKER, settings.EVENT_BROKER_URL, settings.EVENT_QUEUE_SIZE)
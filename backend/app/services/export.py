@@ -0,0 +1,191 @@
+"""
+Streaming export of appeals as CSV or XLSX.
+
+Rows are read with a server-side cursor in batches of EXPORT_BATCH_SIZE and
+encoded batch by batch, so memory stays flat and the first bytes go out as
+soon as the first batch is read. XLSX is written as a bare SpreadsheetML
+package through zipfile on an unseekable sink; no spreadsheet library needed.
+"""
+import csv
+import io
+import re
+import zipfile
+from typing import Callable, Iterator, List
+from xml.sax.saxutils import escape
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.models import (
+    Appeal, Category, PublicTag, InternalTag, appeal_public_tags, appeal_internal_tags
+)
+from app.services.attachments import appeal_attachments_count
+from app.services.appeal_summaries import load_summary_tags
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_HEADERS = [
+    "ID", "Создано", "Обновлено", "Статус", "Категория", "Анонимно", "Автор",
+    "Email", "Телефон", "Telegram", "Текст", "Публичные теги", "Внутренние теги", "Вложения",
+]
+
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+# Characters XML 1.0 does not allow even escaped
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# Leading characters spreadsheet apps treat as a formula
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def export_statement(filters: Callable):
+    """Select the export columns; filters(stmt) applies the list filters."""
+    stmt = select(
+        Appeal.id, Appeal.created_at, Appeal.updated_at, Appeal.status,
+        Category.name.label("category_name"), Appeal.is_anonymous, Appeal.author_name,
+        Appeal.email, Appeal.phone, Appeal.telegram_username, Appeal.text,
+        appeal_attachments_count().label("attachments_count"),
+    ).select_from(Appeal).outerjoin(Category, Category.id == Appeal.category_id)
+    return filters(stmt).order_by(Appeal.created_at.desc())
+
+
+def iter_export_batches(db: Session, stmt) -> Iterator[List[list]]:
+    result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for partition in result.partitions():
+        appeal_ids = [row.id for row in partition]
+        public_tags = load_summary_tags(db, appeal_ids, PublicTag, appeal_public_tags)
+        internal_tags = load_summary_tags(db, appeal_ids, InternalTag, appeal_internal_tags)
+        yield [
+            [
+                row.id,
+                row.created_at.strftime(DATE_FORMAT) if row.created_at else "",
+                row.updated_at.strftime(DATE_FORMAT) if row.updated_at else "",
+                row.status,
+                row.category_name or "",
+                "да" if row.is_anonymous else "нет",
+                row.author_name or "",
+                row.email or "",
+                row.phone or "",
+                f"@{row.telegram_username}" if row.telegram_username else "",
+                row.text,
+                ", ".join(tag["name"] for tag in public_tags[row.id]),
+                ", ".join(tag["name"] for tag in internal_tags[row.id]),
+                row.attachments_count,
+            ]
+            for row in partition
+        ]
+
+
+def _csv_cell(value):
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(batches: Iterator[List[list]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so Excel opens the UTF-8 file with Cyrillic intact
+    buffer.write("\ufeff")
+    writer.writerow(EXPORT_HEADERS)
+    yield buffer.getvalue().encode("utf-8")
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([[_csv_cell(value) for value in row] for row in batch])
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable file object that hands written bytes back to the generator."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Обращения" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def _xlsx_cell(value) -> str:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    text = _XML_ILLEGAL.sub("", str(value))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def _xlsx_rows(rows: List[list]) -> bytes:
+    return "".join(
+        "<row>" + "".join(_xlsx_cell(value) for value in row) + "</row>" for row in rows
+    ).encode("utf-8")
+
+
+def stream_xlsx(batches: Iterator[List[list]]) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        package.writestr("_rels/.rels", _ROOT_RELS)
+        package.writestr("xl/workbook.xml", _WORKBOOK)
+        package.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        with package.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(_SHEET_HEAD.encode("utf-8") + _xlsx_rows([EXPORT_HEADERS]))
+            yield sink.drain()
+            for batch in batches:
+                sheet.write(_xlsx_rows(batch))
+                yield sink.drain()
+            sheet.write(_SHEET_TAIL.encode("utf-8"))
+    yield sink.drain()
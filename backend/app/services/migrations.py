@@ -0,0 +1,58 @@
+"""
+Schema migrations for existing databases, shared by the app startup
+(main.prepare_database) and the manual init_db.py. Tables that do not exist
+yet are created by Base.metadata.create_all before these run.
+"""
+import logging
+
+from sqlalchemy import inspect, text
+
+from app.core.database import SessionLocal, engine
+from app.services.attachments import backfill_attachments
+
+logger = logging.getLogger(__name__)
+
+
+def run_migrations():
+    """Bring an existing database up to the current models; every step is safe to repeat."""
+    with engine.connect() as conn:
+        try:
+            result = conn.execute(text("""
+                SELECT data_type FROM information_schema.columns 
+                WHERE table_name = 'appeals' AND column_name = 'status'
+            """))
+            row = result.fetchone()
+            if row and row[0] == 'USER-DEFINED':
+                conn.execute(text("""
+                    ALTER TABLE appeals ALTER COLUMN status TYPE VARCHAR USING status::VARCHAR
+                """))
+                conn.commit()
+                logger.info("Migrated appeals.status from enum to varchar")
+        except Exception as e:
+            pass
+    
+    user_columns = {column["name"] for column in inspect(engine).get_columns("users")}
+    if "token_version" not in user_columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"))
+        logger.info("Added users.token_version column")
+    
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_appeals_created_at ON appeals (created_at)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_appeals_updated_at ON appeals (updated_at)"))
+        has_changes = conn.execute(text("SELECT 1 FROM appeal_changes LIMIT 1")).first()
+        if not has_changes:
+            result = conn.execute(text("""
+                INSERT INTO appeal_changes (appeal_id, deleted, changed_at)
+                SELECT id, :deleted, updated_at FROM appeals ORDER BY updated_at, id
+            """), {"deleted": False})
+            if result.rowcount:
+                logger.info("Backfilled appeal_changes from appeals")
+    
+    db = SessionLocal()
+    try:
+        backfilled = backfill_attachments(db)
+        if backfilled:
+            logger.info(f"Backfilled {backfilled} attachments from JSON file columns")
+    finally:
+        db.close()
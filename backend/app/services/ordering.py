@@ -0,0 +1,33 @@
+from typing import List, Optional
+from sqlalchemy import case, select, update
+from sqlalchemy.orm import Session
+
+# Keeps each UPDATE ... CASE well below SQLite's bound-parameter limit
+CASE_CHUNK_SIZE = 400
+
+
+def find_missing_ids(db: Session, model, ids: List[int]) -> List[int]:
+    """Return the ids that have no row in model's table, using one query."""
+    requested_ids = set(ids)
+    if not requested_ids:
+        return []
+    existing_ids = set(db.scalars(select(model.id).where(model.id.in_(requested_ids))).all())
+    return sorted(requested_ids - existing_ids)
+
+
+def apply_ordering(db: Session, model, ordered_ids: List[int], extra_values: Optional[dict] = None):
+    """
+    Set model.order to each id's position in ordered_ids with a single
+    UPDATE ... SET order = CASE id WHEN ... END per chunk of ids.
+    If an id is repeated, its last position wins.
+    """
+    positions = {item_id: index for index, item_id in enumerate(ordered_ids)}
+    item_ids = list(positions)
+    for start in range(0, len(item_ids), CASE_CHUNK_SIZE):
+        chunk = item_ids[start:start + CASE_CHUNK_SIZE]
+        db.execute(
+            update(model)
+            .where(model.id.in_(chunk))
+            .values(order=case({item_id: positions[item_id] for item_id in chunk}, value=model.id), **(extra_values or {})),
+            execution_options={"synchronize_session": False}
+        )
@@ -1,7 +1,11 @@
 import httpx
 import logging
 import os
+import time
+from typing import List
 from sqlalchemy.orm import Session
+from app.core.metrics import NOTIFICATION_DURATION, NOTIFICATION_FAILURES
+from app.core.tracing import SPAN_KIND_CLIENT, inject, start_span
 
 logger = logging.getLogger(__name__)
 
@@ -9,39 +13,87 @@ TELEGRAM_BOT_URL = os.environ.get("TELEGRAM_BOT_URL", "http://localhost:3001")
 NOTIFY_SECRET = os.environ.get("NOTIFY_SECRET", "")
 
 
+def _record_notification(kind: str, started: float, ok: bool):
+    NOTIFICATION_DURATION.observe(time.perf_counter() - started, kind=kind)
+    if not ok:
+        NOTIFICATION_FAILURES.inc(kind=kind)
+
+
 async def notify_status_change(
     telegram_user_id: int,
     appeal_id: int,
     old_status: str,
     new_status: str
 ):
+    started = time.perf_counter()
     try:
         headers = {}
         if NOTIFY_SECRET:
             headers["Authorization"] = f"Bearer {NOTIFY_SECRET}"
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{TELEGRAM_BOT_URL}/notify",
-                json={
-                    "telegram_user_id": telegram_user_id,
-                    "appeal_id": appeal_id,
-                    "old_status": old_status,
-                    "new_status": new_status
-                },
-                headers=headers,
-                timeout=10.0
-            )
+        with start_span("POST /notify", kind=SPAN_KIND_CLIENT, **{"appeal.id": appeal_id}):
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{TELEGRAM_BOT_URL}/notify",
+                    json={
+                        "telegram_user_id": telegram_user_id,
+                        "appeal_id": appeal_id,
+                        "old_status": old_status,
+                        "new_status": new_status
+                    },
+                    headers=inject(headers),
+                    timeout=10.0
+                )
             
-            if response.status_code == 200:
-                logger.info(f"Notification sent for appeal {appeal_id}")
-                return True
-            else:
-                logger.warning(f"Failed to send notification: {response.status_code}")
-                return False
+                if response.status_code == 200:
+                    logger.info(f"Notification sent for appeal {appeal_id}")
+                    _record_notification("status", started, True)
+                    return True
+                else:
+                    logger.warning(f"Failed to send notification: {response.status_code}")
+                    _record_notification("status", started, False)
+                    return False
                 
     except Exception as e:
         logger.error(f"Error sending notification: {e}")
+        _record_notification("status", started, False)
+        return False
+
+
+async def notify_status_changes(notifications: List[dict]):
+    """
+    Send several status-change notifications in one request to the bot.
+    Each item has telegram_user_id, appeal_id, old_status and new_status.
+    """
+    if not notifications:
+        return True
+    started = time.perf_counter()
+    try:
+        headers = {}
+        if NOTIFY_SECRET:
+            headers["Authorization"] = f"Bearer {NOTIFY_SECRET}"
+        
+        with start_span("POST /notify_batch", kind=SPAN_KIND_CLIENT, **{"notifications.count": len(notifications)}):
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{TELEGRAM_BOT_URL}/notify_batch",
+                    json={"notifications": notifications},
+                    headers=inject(headers),
+                    timeout=30.0
+                )
+            
+                if response.status_code == 200:
+                    logger.info(f"Batch of {len(notifications)} notifications sent")
+                    _record_notification("status_batch", started, True)
+                    return True
+                else:
+                    logger.warning(f"Failed to send notification batch: {response.status_code}")
+                    _record_notification("status_batch", started, False)
+                    return False
+                
+    except Exception as e:
+        logger.error(f"Error sending notification batch: {e}")
+        _record_notification("status_batch", started, False)
         return False
 
 
@@ -54,6 +106,7 @@ async def notify_new_appeal_to_admins(
 ):
     from app.models.models import AdminTelegramId
     
+    started = time.perf_counter()
     try:
         admin_ids = db.query(AdminTelegramId).all()
         if not admin_ids:
@@ -66,27 +119,31 @@ async def notify_new_appeal_to_admins(
         if NOTIFY_SECRET:
             headers["Authorization"] = f"Bearer {NOTIFY_SECRET}"
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{TELEGRAM_BOT_URL}/notify_admins",
-                json={
-                    "appeal_id": appeal_id,
-                    "text_preview": text_preview[:200] if text_preview else "",
-                    "category_name": category_name or "Без категории",
-                    "is_anonymous": is_anonymous,
-                    "admin_telegram_ids": telegram_ids
-                },
-                headers=headers,
-                timeout=15.0
-            )
+        with start_span("POST /notify_admins", kind=SPAN_KIND_CLIENT, **{"appeal.id": appeal_id}):
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{TELEGRAM_BOT_URL}/notify_admins",
+                    json={
+                        "appeal_id": appeal_id,
+                        "text_preview": text_preview[:200] if text_preview else "",
+                        "category_name": category_name or "Без категории",
+                        "is_anonymous": is_anonymous,
+                        "admin_telegram_ids": telegram_ids
+                    },
+                    headers=inject(headers),
+                    timeout=15.0
+                )
             
-            if response.status_code == 200:
-                logger.info(f"Admin notification sent for new appeal {appeal_id}")
-                return True
-            else:
-                logger.warning(f"Failed to send admin notification: {response.status_code}")
-                return False
+                if response.status_code == 200:
+                    logger.info(f"Admin notification sent for new appeal {appeal_id}")
+                    _record_notification("admins", started, True)
+                    return True
+                else:
+                    logger.warning(f"Failed to send admin notification: {response.status_code}")
+                    _record_notification("admins", started, False)
+                    return False
                 
     except Exception as e:
         logger.error(f"Error sending admin notification: {e}")
+        _record_notification("admins", started, False)
         return False
@@ -0,0 +1,293 @@
+"""
+Scripted load scenarios against a backend filled by benchmarks.seed.
+
+Each scenario is a loop of steps a real client performs, run by a number of
+virtual users with think time between steps:
+- public_form: open the form (categories), submit an appeal
+- dashboard: moderator pages through summaries with filters, opens an
+  appeal with its history and comments, polls for changes, now and then
+  changes a status
+- stats: admin opens the statistics page
+- bot: Telegram user lists their appeals and opens one, sometimes files one
+
+    cd backend
+    python -m benchmarks.seed --database-url sqlite:///./bench.db --appeals 1000000
+    DATABASE_URL=sqlite:///./bench.db RATE_LIMIT_ENABLED=false uvicorn main:app --workers 4 --port 8000 &
+    python -m benchmarks.load --url http://localhost:8000 --users public_form=5 dashboard=20 stats=2 bot=10 \
+        --duration 60 --output results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.load ... --compare results/<baseline>.json
+
+Per operation it prints count, errors, throughput and p50/p95/p99. Requests
+sent during --warmup are not counted. The random choices are seeded per
+virtual user, so two runs with the same arguments send the same mix; --output
+stores the results with the git commit, --compare prints the change against
+a stored run.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import subprocess
+import time
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.login_storm import percentile
+from benchmarks.seed import BENCH_MODERATOR_PASSWORD, PROBLEMS, PLACES, TELEGRAM_USER_BASE, appeal_text
+
+STATUSES = ["new", "in_progress", "resolved", "rejected"]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.counting = False
+
+    async def request(self, client, op, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        if self.counting:
+            self.samples[op].append(time.perf_counter() - started)
+            if not ok:
+                self.errors[op] += 1
+        return response if ok else None
+
+
+async def login(client, username, password):
+    response = await client.post("/api/auth/login", data={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def think(rng, args):
+    await asyncio.sleep(rng.expovariate(1 / args.think) if args.think > 0 else 0)
+
+
+async def public_form(client, rec, rng, args, stop, user):
+    while not stop.is_set():
+        categories = await rec.request(client, "form.categories", "GET", "/api/categories")
+        await think(rng, args)
+        category_id = None
+        if categories is not None and categories.json():
+            category_id = rng.choice(categories.json())["id"]
+        data = {"text": appeal_text(rng), "is_anonymous": "true"}
+        if category_id:
+            data["category_id"] = str(category_id)
+        await rec.request(client, "form.submit", "POST", "/api/appeals", data=data)
+        await think(rng, args)
+
+
+async def dashboard(client, rec, rng, args, stop, user):
+    headers = await login(client, f"bench_mod_{user % args.moderators}", BENCH_MODERATOR_PASSWORD)
+    sync_token = None
+    while not stop.is_set():
+        params = {"view": "summary", "limit": 50, "skip": 50 * min(int(rng.expovariate(1)), 20)}
+        if rng.random() < 0.6:
+            params["status"] = rng.choice(STATUSES[:2])
+        if rng.random() < 0.2:
+            params["category_id"] = rng.randint(1, 8)
+        page = await rec.request(client, "dashboard.list", "GET", "/api/appeals", params=params, headers=headers)
+        await think(rng, args)
+        rows = page.json() if page is not None else []
+        if page is not None and sync_token is None:
+            sync_token = page.headers.get("X-Sync-Token")
+        if rows:
+            appeal_id = rng.choice(rows)["id"]
+            await rec.request(client, "dashboard.detail", "GET", f"/api/appeals/{appeal_id}", headers=headers)
+            await rec.request(client, "dashboard.history", "GET", f"/api/appeals/{appeal_id}/history", headers=headers)
+            await rec.request(client, "dashboard.comments", "GET", f"/api/appeals/{appeal_id}/comments", headers=headers)
+            await think(rng, args)
+            if rng.random() < args.write_ratio:
+                await rec.request(client, "dashboard.update", "PUT", f"/api/appeals/{appeal_id}",
+                                  json={"status": rng.choice(STATUSES[1:])}, headers=headers)
+                await think(rng, args)
+        if sync_token:
+            changes = await rec.request(client, "dashboard.changes", "GET", "/api/appeals/changes",
+                                        params={"since": sync_token}, headers=headers)
+            if changes is not None:
+                sync_token = changes.json()["token"]
+        await think(rng, args)
+
+
+async def stats(client, rec, rng, args, stop, user):
+    headers = await login(client, args.admin_username, args.admin_password)
+    while not stop.is_set():
+        await rec.request(client, "stats.summary", "GET", "/api/stats", headers=headers)
+        await rec.request(client, "stats.timeline", "GET", "/api/stats/appeals-timeline",
+                          params={"period": rng.choice(["day", "week", "month"])}, headers=headers)
+        await rec.request(client, "stats.moderators", "GET", "/api/stats/moderators", headers=headers)
+        await rec.request(client, "stats.by_period", "GET", "/api/stats/appeals-by-period",
+                          params={"period": rng.choice(["month", "year", "all"])}, headers=headers)
+        await think(rng, args)
+        await think(rng, args)
+
+
+async def bot(client, rec, rng, args, stop, user):
+    while not stop.is_set():
+        # Low ids are the heavy users of the seed's Zipf distribution
+        telegram_user_id = TELEGRAM_USER_BASE + min(int(rng.paretovariate(1.0)) - 1, args.telegram_users - 1)
+        listing = await rec.request(client, "bot.my_appeals", "GET", f"/api/appeals/telegram/{telegram_user_id}")
+        await think(rng, args)
+        rows = listing.json() if listing is not None else []
+        if rows:
+            appeal_id = rng.choice(rows)["id"]
+            await rec.request(client, "bot.appeal", "GET", f"/api/appeals/telegram/{telegram_user_id}/{appeal_id}")
+            await think(rng, args)
+        if rng.random() < 0.1:
+            await rec.request(client, "bot.submit", "POST", "/api/appeals", data={
+                "text": f"{rng.choice(PROBLEMS).capitalize()} {rng.choice(PLACES)}.",
+                "telegram_user_id": str(telegram_user_id),
+                "telegram_username": f"user{telegram_user_id}",
+            })
+            await think(rng, args)
+
+
+SCENARIOS = {"public_form": public_form, "dashboard": dashboard, "stats": stats, "bot": bot}
+
+
+async def virtual_user(scenario, client, rec, args, stop, user):
+    rng = random.Random(f"{args.seed}:{scenario}:{user}")
+    try:
+        await SCENARIOS[scenario](client, rec, rng, args, stop, user)
+    except Exception as e:
+        print(f"{scenario}#{user} stopped: {e!r}")
+
+
+def summarize(rec, elapsed):
+    results = {}
+    for op in sorted(rec.samples):
+        samples = rec.samples[op]
+        results[op] = {
+            "count": len(samples),
+            "errors": rec.errors[op],
+            "rps": round(len(samples) / elapsed, 2),
+            "p50_ms": round(percentile(samples, 50) * 1000, 2),
+            "p95_ms": round(percentile(samples, 95) * 1000, 2),
+            "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        }
+    return results
+
+
+def git_revision():
+    repo = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=repo,
+                                capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=repo,
+                               capture_output=True, text=True)
+        return commit.stdout.strip() + ("-dirty" if dirty.stdout.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    print(f"{'operation':<20} {'n':>7} {'err':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for op, row in results.items():
+        line = (f"{op:<20} {row['count']:>7} {row['errors']:>5} {row['rps']:>8.1f} "
+                f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}")
+        old = (baseline or {}).get(op)
+        if old:
+            deltas = [
+                f"{key.split('_')[0]} {(row[key] - old[key]) / old[key] * 100:+.0f}%"
+                for key in ("rps", "p50_ms", "p99_ms") if old[key]
+            ]
+            line += "   vs baseline: " + ", ".join(deltas)
+        print(line)
+
+
+async def run(args):
+    users = {}
+    for item in args.users:
+        name, _, count = item.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"unknown scenario {name!r}, expected one of {', '.join(SCENARIOS)}")
+        users[name] = int(count or 1)
+
+    limits = httpx.Limits(max_connections=sum(users.values()) + 4)
+    rec = Recorder()
+    stop = asyncio.Event()
+    async with contextlib.AsyncExitStack() as stack:
+        if args.in_process:
+            os.environ.setdefault("DATABASE_URL", args.in_process)
+            # Every virtual user shares one client address
+            os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+            import main as backend
+            await stack.enter_async_context(backend.lifespan(backend.app))
+            transport = httpx.ASGITransport(app=backend.app, raise_app_exceptions=False)
+            base_url = "http://bench"
+        else:
+            transport, base_url = None, args.url
+        client = await stack.enter_async_context(
+            httpx.AsyncClient(base_url=base_url, transport=transport, timeout=60, limits=limits)
+        )
+        tasks = [
+            asyncio.create_task(virtual_user(name, client, rec, args, stop, user))
+            for name, count in users.items() for user in range(count)
+        ]
+        await asyncio.sleep(args.warmup)
+        rec.counting = True
+        started = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        rec.counting = False
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    results = summarize(rec, elapsed)
+    total = sum(row["count"] for row in results.values())
+    print(f"{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s), users: "
+          + ", ".join(f"{name}={count}" for name, count in users.items()))
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            stored = json.load(f)
+        print(f"baseline: {args.compare} (commit {stored.get('commit')})")
+        baseline = stored["results"]
+    print_results(results, baseline)
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "commit": git_revision(),
+                "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+                "elapsed": round(elapsed, 2),
+                "results": results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"saved to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--in-process", metavar="DATABASE_URL", default=None,
+                        help="run the app inside this process on the given database instead of --url")
+    parser.add_argument("--users", nargs="+", default=["public_form=2", "dashboard=8", "stats=1", "bot=4"],
+                        help="scenario=virtual users")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--think", type=float, default=0.05, help="mean pause between steps, seconds")
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="share of opened appeals a moderator updates")
+    parser.add_argument("--moderators", type=int, default=20, help="bench_mod_* users created by the seed")
+    parser.add_argument("--telegram-users", type=int, default=20_000)
+    parser.add_argument("--admin-username", default="admin")
+    parser.add_argument("--admin-password", default="admin123")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    parser.add_argument("--compare", default=None, help="JSON from an earlier run to compare with")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Login storm: measures latency of an unrelated endpoint while many clients log in.
+
+Run against a live backend:
+
+    cd backend
+    uvicorn main:app --port 8000 &
+    python -m benchmarks.login_storm --url http://localhost:8000 --logins 200 --concurrency 50
+
+With bcrypt on the event loop the probe p99 grows to roughly the whole storm
+duration; with the hashing pool it should stay close to the idle baseline.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, samples):
+    print(
+        f"{name:<12} n={len(samples):<5} "
+        f"p50={percentile(samples, 50) * 1000:8.1f}ms "
+        f"p95={percentile(samples, 95) * 1000:8.1f}ms "
+        f"p99={percentile(samples, 99) * 1000:8.1f}ms "
+        f"max={max(samples, default=0) * 1000:8.1f}ms"
+    )
+
+
+async def probe(client, path, stop, samples, interval):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get(path)
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+
+async def login_worker(client, queue, username, password, samples):
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        started = time.perf_counter()
+        await client.post("/api/auth/login", data={"username": username, "password": password})
+        samples.append(time.perf_counter() - started)
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 2)
+    async with httpx.AsyncClient(base_url=args.url, timeout=120, limits=limits) as client:
+        baseline = []
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, args.probe_path, stop, baseline, args.probe_interval))
+        await asyncio.sleep(args.baseline_seconds)
+        stop.set()
+        await probe_task
+
+        queue = asyncio.Queue()
+        for _ in range(args.logins):
+            queue.put_nowait(None)
+        login_samples = []
+        storm_probe = []
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, args.probe_path, stop, storm_probe, args.probe_interval))
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            login_worker(client, queue, args.username, args.password, login_samples)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe_task
+
+    print(f"{args.logins} logins, concurrency {args.concurrency}, {elapsed:.2f}s "
+          f"({args.logins / elapsed:.1f} logins/s)")
+    report("probe idle", baseline)
+    report("probe storm", storm_probe)
+    report("login", login_samples)
+    if baseline and storm_probe:
+        print(f"probe p99 inflation: {percentile(storm_probe, 99) / max(statistics.median(baseline), 1e-9):.1f}x idle median")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--username", default="moderator")
+    parser.add_argument("--password", default="moderator123")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--probe-path", default="/api/health")
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+    parser.add_argument("--baseline-seconds", type=float, default=2.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Reorder benchmark: per-item SELECT + UPDATE loop versus apply_ordering.
+
+Runs against a throwaway SQLite file, so no server is needed:
+
+    cd backend
+    python -m benchmarks.reorder --items 1000 --rounds 5
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.models import PublicTag
+from app.services.ordering import apply_ordering, find_missing_ids
+
+
+def legacy_reorder(db, tag_ids):
+    for index, tag_id in enumerate(tag_ids):
+        tag = db.query(PublicTag).filter(PublicTag.id == tag_id).first()
+        if tag:
+            tag.order = index
+    db.commit()
+
+
+def set_based_reorder(db, tag_ids):
+    find_missing_ids(db, PublicTag, tag_ids)
+    apply_ordering(db, PublicTag, tag_ids)
+    db.commit()
+
+
+def measure(name, fn, session_factory, engine, tag_ids, rounds):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    timings = []
+    for _ in range(rounds):
+        random.shuffle(tag_ids)
+        db = session_factory()
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", count)
+        started = time.perf_counter()
+        fn(db, list(tag_ids))
+        timings.append(time.perf_counter() - started)
+        event.remove(engine, "before_cursor_execute", count)
+        db.close()
+
+    check = session_factory()
+    orders = dict(check.query(PublicTag.id, PublicTag.order).all())
+    check.close()
+    assert all(orders[tag_id] == index for index, tag_id in enumerate(tag_ids)), f"{name}: wrong order"
+
+    timings.sort()
+    print(f"{name:<10} median={timings[len(timings) // 2] * 1000:9.1f}ms "
+          f"best={timings[0] * 1000:9.1f}ms statements={len(statements)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'reorder.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+
+        db = session_factory()
+        db.add_all([PublicTag(name=f"Тег {i}", order=i) for i in range(args.items)])
+        db.commit()
+        tag_ids = [tag_id for (tag_id,) in db.query(PublicTag.id).all()]
+        db.close()
+
+        print(f"{args.items} items, {args.rounds} rounds")
+        measure("legacy", legacy_reorder, session_factory, engine, tag_ids, args.rounds)
+        measure("set-based", set_based_reorder, session_factory, engine, tag_ids, args.rounds)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
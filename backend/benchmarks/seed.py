@@ -0,0 +1,294 @@
+"""
+Synthetic data generator for load tests.
+
+Fills the configured database (or --database-url) with appeals, comments,
+history rows, tag links and attachment records, generated in batches with
+Core inserts so millions of rows take minutes. The distributions are skewed
+the way real traffic is:
+- categories and tags follow a Zipf law
+- recent appeals are mostly new or in progress and old ones are mostly
+  closed
+- a few Telegram users file many appeals
+- creation times lean towards the last months
+Texts are assembled from Russian phrase lists. The same --seed and sizes
+always produce the same data, so runs on different commits are comparable:
+
+    cd backend
+    python -m benchmarks.seed --database-url sqlite:///./bench.db --appeals 1000000
+
+The schema, migrations and default users/categories/tags come from
+main.prepare_database(), so the server started on the same database is ready for benchmarks.load.
+"""
+import argparse
+import bisect
+import itertools
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+# Telegram ids of generated users are TELEGRAM_USER_BASE + k, k < --telegram-users
+TELEGRAM_USER_BASE = 700_000_000
+BENCH_MODERATOR_PASSWORD = "bench12345"
+
+PROBLEMS = [
+    "не работает уличное освещение", "во дворе огромная яма", "течёт крыша", "нет горячей воды",
+    "не вывозят мусор", "сломаны качели на детской площадке", "в подъезде не убирают",
+    "автобус ходит с большими интервалами", "не чистят снег", "разбит тротуар",
+    "постоянно отключают отопление", "на остановке нет навеса", "затопило подвал",
+    "не работает лифт", "незаконная свалка у гаражей", "шумят по ночам на стройке",
+    "в поликлинике не записаться к врачу", "нет мест в детском саду", "опасный перекрёсток без светофора",
+    "вырубили деревья в сквере", "грязная вода из крана", "не горят фонари в парке",
+]
+PLACES = [
+    "на улице Ленина", "возле дома 12", "в микрорайоне Северный", "на проспекте Мира",
+    "у школы №5", "в переулке Садовом", "около поликлиники", "на площади Победы",
+    "во дворе дома 7 по улице Гагарина", "рядом с остановкой «Рынок»", "в посёлке Заречный",
+]
+DURATIONS = ["уже неделю", "второй месяц", "с прошлой осени", "уже несколько дней", "больше года"]
+DETAILS = [
+    "Жители неоднократно обращались в управляющую компанию, но ответа нет.",
+    "Особенно опасно вечером, когда темно.",
+    "Страдают пожилые люди и дети.",
+    "Фотографии прилагаю.",
+    "Прошу разобраться и сообщить о принятых мерах.",
+    "Ситуация повторяется каждый год.",
+    "Соседи готовы подписать коллективное обращение.",
+    "В прошлый раз обещали исправить, но ничего не сделано.",
+]
+COMMENTS = [
+    "Обращение передано в профильный департамент.",
+    "Запрошена информация у управляющей компании.",
+    "Выезд специалиста запланирован на следующую неделю.",
+    "Работы выполнены, просим подтвердить.",
+    "Связались с заявителем по телефону.",
+    "Вопрос находится на контроле.",
+    "Требуется уточнение адреса.",
+    "Дубликат ранее поданного обращения.",
+]
+FIRST_NAMES = ["Иван", "Мария", "Алексей", "Ольга", "Сергей", "Наталья", "Дмитрий", "Елена", "Андрей", "Татьяна"]
+LAST_NAMES = ["Иванов", "Смирнова", "Кузнецов", "Попова", "Васильев", "Петрова", "Соколов", "Михайлова"]
+
+
+def zipf_weights(count, exponent=1.1):
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+class Picker:
+    """Weighted choice through a precomputed cumulative table."""
+
+    def __init__(self, items, weights):
+        self.items = list(items)
+        self.cumulative = list(itertools.accumulate(weights))
+
+    def __call__(self, rng):
+        return self.items[bisect.bisect(self.cumulative, rng.random() * self.cumulative[-1])]
+
+
+def appeal_text(rng):
+    parts = [f"{rng.choice(PROBLEMS).capitalize()} {rng.choice(PLACES)} {rng.choice(DURATIONS)}."]
+    parts.extend(rng.sample(DETAILS, min(len(DETAILS), int(rng.lognormvariate(0.6, 0.7)))))
+    return " ".join(parts)
+
+
+def final_status(rng, age_days):
+    # Older appeals are mostly closed, fresh ones still open
+    closed = min(0.95, age_days / 60)
+    roll = rng.random()
+    if roll < closed:
+        return "resolved" if rng.random() < 0.8 else "rejected"
+    return "in_progress" if rng.random() < 0.45 else "new"
+
+
+def prepare(database_url):
+    if database_url:
+        os.environ["DATABASE_URL"] = database_url
+        os.environ["USE_SQLITE"] = "true" if database_url.startswith("sqlite") else "false"
+    import main
+    main.prepare_database()
+    return main.engine
+
+
+def ensure_moderators(engine, count):
+    from sqlalchemy import select
+    from app.core.security import get_password_hash
+    from app.models.models import User, UserRole
+
+    users = User.__table__
+    with engine.begin() as conn:
+        existing = set(conn.execute(select(users.c.username)).scalars())
+        hashed = get_password_hash(BENCH_MODERATOR_PASSWORD)
+        missing = [
+            {"username": f"bench_mod_{i}", "email": f"bench_mod_{i}@example.com", "hashed_password": hashed,
+             "role": UserRole.MODERATOR, "is_active": True, "token_version": 0, "created_at": datetime.utcnow()}
+            for i in range(count) if f"bench_mod_{i}" not in existing
+        ]
+        if missing:
+            conn.execute(users.insert(), missing)
+        return list(conn.execute(select(users.c.id)).scalars())
+
+
+def next_id(conn, table):
+    from sqlalchemy import func, select
+    return (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def fix_sequences(engine, tables):
+    if engine.dialect.name != "postgresql":
+        return
+    from sqlalchemy import text
+    with engine.begin() as conn:
+        for table in tables:
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM {table.name}))"
+            ))
+
+
+def seed(engine, args):
+    from sqlalchemy import select
+    from app.models.models import (
+        Appeal, AppealHistory, Attachment, Category, Comment, HistoryActionType, InternalTag, PublicTag,
+        appeal_internal_tags, appeal_public_tags
+    )
+    from app.services.attachments import OWNER_APPEAL
+
+    rng = random.Random(args.seed)
+    user_ids = ensure_moderators(engine, args.moderators)
+    with engine.connect() as conn:
+        category_ids = list(conn.execute(select(Category.id).order_by(Category.order, Category.id)).scalars())
+        public_tag_ids = list(conn.execute(select(PublicTag.id).order_by(PublicTag.order)).scalars())
+        internal_tag_ids = list(conn.execute(select(InternalTag.id).order_by(InternalTag.order)).scalars())
+        appeal_id = next_id(conn, Appeal.__table__)
+        comment_id = next_id(conn, Comment.__table__)
+
+    pick_category = Picker(category_ids, zipf_weights(len(category_ids)))
+    pick_public_tag = Picker(public_tag_ids, zipf_weights(len(public_tag_ids)))
+    pick_internal_tag = Picker(internal_tag_ids, zipf_weights(len(internal_tag_ids)))
+    pick_user = Picker(user_ids, zipf_weights(len(user_ids), 0.8))
+    pick_telegram_user = Picker(range(args.telegram_users), zipf_weights(args.telegram_users, 0.9))
+
+    now = datetime.utcnow()
+    totals = dict.fromkeys(("appeals", "comments", "history", "tag links", "attachments"), 0)
+    started = time.perf_counter()
+    remaining = args.appeals
+    while remaining > 0:
+        batch_size = min(args.batch, remaining)
+        remaining -= batch_size
+        appeals, comments, history, public_links, internal_links, attachments = [], [], [], [], [], []
+        for _ in range(batch_size):
+            # Skewed towards recent days: more traffic now than two years ago
+            age_days = args.days * (rng.random() ** 2)
+            created_at = now - timedelta(days=age_days, seconds=rng.randint(0, 86399))
+            status = final_status(rng, age_days)
+            is_anonymous = rng.random() < 0.3
+            via_telegram = rng.random() < 0.4
+            has_media = rng.random() < 0.05
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            media = None
+            if has_media:
+                unique_name = f"bench-{appeal_id}.jpg"
+                media = json.dumps([{"path": f"uploads/{unique_name}", "original_name": "фото.jpg",
+                                     "unique_name": unique_name}])
+                attachments.append({
+                    "owner_type": OWNER_APPEAL, "owner_id": appeal_id, "unique_name": unique_name,
+                    "original_name": "фото.jpg", "mime_type": "image/jpeg",
+                    "size": rng.randint(50_000, 4_000_000), "sha256": None, "created_at": created_at,
+                })
+            telegram_user = TELEGRAM_USER_BASE + pick_telegram_user(rng) if via_telegram else None
+            appeals.append({
+                "id": appeal_id,
+                "is_anonymous": is_anonymous,
+                "author_name": None if is_anonymous else name,
+                "email": None if is_anonymous else f"user{appeal_id}@example.ru",
+                "phone": None if is_anonymous or rng.random() < 0.5 else f"+7 9{rng.randint(10, 99)} {rng.randint(100, 999)}-{rng.randint(10, 99)}-{rng.randint(10, 99)}",
+                "category_id": pick_category(rng) if rng.random() < 0.92 else None,
+                "text": appeal_text(rng),
+                "status": status,
+                "media_files": media,
+                "telegram_user_id": telegram_user,
+                "telegram_username": f"user{telegram_user}" if telegram_user else None,
+                "created_at": created_at,
+                "updated_at": created_at,
+            })
+
+            moderator = pick_user(rng)
+            moment = created_at
+            for old, new in {
+                "new": [], "in_progress": [("new", "in_progress")],
+                "resolved": [("new", "in_progress"), ("in_progress", "resolved")],
+                "rejected": [("new", "rejected")],
+            }[status]:
+                moment += timedelta(hours=rng.expovariate(1 / 30))
+                history.append({"appeal_id": appeal_id, "user_id": moderator,
+                                "action_type": HistoryActionType.STATUS_CHANGE,
+                                "old_value": old, "new_value": new, "details": None, "created_at": moment})
+            for tag_id in {pick_public_tag(rng) for _ in range(rng.choice((0, 1, 1, 2)))}:
+                public_links.append({"appeal_id": appeal_id, "tag_id": tag_id})
+            for tag_id in {pick_internal_tag(rng) for _ in range(rng.choice((0, 0, 1, 2, 3)))}:
+                internal_links.append({"appeal_id": appeal_id, "tag_id": tag_id})
+                history.append({"appeal_id": appeal_id, "user_id": moderator,
+                                "action_type": HistoryActionType.TAG_ADDED, "old_value": None, "new_value": None,
+                                "details": json.dumps({"tag_name": str(tag_id), "tag_type": "internal"}),
+                                "created_at": moment})
+            comment_count = int(rng.expovariate(1 / args.comments)) if status != "new" else 0
+            for _ in range(comment_count):
+                moment += timedelta(hours=rng.expovariate(1 / 12))
+                text = rng.choice(COMMENTS)
+                comments.append({"id": comment_id, "appeal_id": appeal_id, "user_id": pick_user(rng),
+                                 "text": text, "files": None, "created_at": moment})
+                history.append({"appeal_id": appeal_id, "user_id": moderator,
+                                "action_type": HistoryActionType.COMMENT_ADDED, "old_value": None,
+                                "new_value": None, "created_at": moment,
+                                "details": json.dumps({"comment_text": text, "files_count": 0}, ensure_ascii=False)})
+                comment_id += 1
+            appeals[-1]["updated_at"] = moment
+            appeal_id += 1
+
+        with engine.begin() as conn:
+            conn.execute(Appeal.__table__.insert(), appeals)
+            for table, rows in ((Comment.__table__, comments), (AppealHistory.__table__, history),
+                                (appeal_public_tags, public_links), (appeal_internal_tags, internal_links),
+                                (Attachment.__table__, attachments)):
+                if rows:
+                    conn.execute(table.insert(), rows)
+        totals["appeals"] += len(appeals)
+        totals["comments"] += len(comments)
+        totals["history"] += len(history)
+        totals["tag links"] += len(public_links) + len(internal_links)
+        totals["attachments"] += len(attachments)
+        elapsed = time.perf_counter() - started
+        print(f"  {totals['appeals']:>10} appeals  {sum(totals.values()) / elapsed:9.0f} rows/s", flush=True)
+
+    fix_sequences(engine, [Appeal.__table__, Comment.__table__, AppealHistory.__table__, Attachment.__table__])
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            conn.exec_driver_sql("ANALYZE")
+    elif engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("ANALYZE")
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to the backend settings")
+    parser.add_argument("--appeals", type=int, default=100_000)
+    parser.add_argument("--comments", type=float, default=1.5, help="mean comments per handled appeal")
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--telegram-users", type=int, default=20_000)
+    parser.add_argument("--moderators", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    engine = prepare(args.database_url)
+    print(f"seeding {args.appeals} appeals into {engine.url.render_as_string(hide_password=True)}")
+    started = time.perf_counter()
+    totals = seed(engine, args)
+    print(f"done in {time.perf_counter() - started:.1f}s: " + ", ".join(f"{name}={count}" for name, count in totals.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Serialization benchmark for the large list responses.
+
+Compares FastAPI's default response path (validate, dump to Python,
+jsonable_encoder, json.dumps) with the prebuilt TypeAdapter path used by
+the routes, and JSONResponse with FastJSONResponse for the summary view.
+Rows are loaded once from a throwaway SQLite file, so only serialization is timed:
+
+    cd backend
+    python -m benchmarks.serialization --rows 100 --rounds 200
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine
+from sqlalchemy.orm import joinedload, sessionmaker
+
+from app.core.database import Base
+from app.core.responses import FastJSONResponse, adapter_response, orjson
+from app.models.models import Appeal, AppealHistory, Category, Comment, InternalTag, PublicTag, User
+from app.schemas.adapters import appeal_history_adapter, appeal_list_adapter, comment_list_adapter
+from app.services.appeal_summaries import SUMMARY_FIELDS, build_summaries, summary_query
+
+WORDS = "обращение двор дорога освещение ремонт подъезд мусор транспорт школа поликлиника".split()
+
+
+def sentence(length):
+    return " ".join(random.choice(WORDS) for _ in range(length)).capitalize() + "."
+
+
+def seed(db, rows):
+    user = User(username="bench", email="bench@example.com", hashed_password="x", role="moderator")
+    categories = [Category(name=f"Категория {i}", order=i) for i in range(10)]
+    public_tags = [PublicTag(name=f"Публичный {i}", order=i) for i in range(8)]
+    internal_tags = [InternalTag(name=f"Внутренний {i}", order=i) for i in range(8)]
+    db.add_all([user, *categories, *public_tags, *internal_tags])
+    db.flush()
+
+    started = datetime.utcnow() - timedelta(days=30)
+    appeals = []
+    for i in range(rows):
+        appeal = Appeal(
+            is_anonymous=i % 4 == 0,
+            author_name=None if i % 4 == 0 else f"Житель {i}",
+            email=f"user{i}@example.com",
+            phone="+7 900 000-00-00",
+            category=random.choice(categories),
+            text=sentence(random.randint(20, 200)),
+            status=random.choice(["new", "in_progress", "resolved", "rejected"]),
+            media_files='[{"path": "uploads/a.jpg", "original_name": "a.jpg", "unique_name": "a.jpg"}]',
+            created_at=started + timedelta(minutes=i),
+        )
+        appeal.public_tags = random.sample(public_tags, 2)
+        appeal.internal_tags = random.sample(internal_tags, 3)
+        appeals.append(appeal)
+    db.add_all(appeals)
+    db.flush()
+
+    target = appeals[0]
+    db.add_all([
+        Comment(appeal_id=target.id, user_id=user.id, text=sentence(30), created_at=started + timedelta(hours=i))
+        for i in range(rows)
+    ])
+    db.add_all([
+        AppealHistory(appeal_id=target.id, user_id=user.id, action_type="status_change",
+                      old_value="new", new_value="in_progress", created_at=started + timedelta(hours=i))
+        for i in range(rows)
+    ])
+    db.commit()
+    return target.id
+
+
+def default_path(adapter, objects):
+    # What FastAPI does with response_model and the default JSONResponse
+    validated = adapter.validate_python(objects, from_attributes=True)
+    return JSONResponse(jsonable_encoder(adapter.dump_python(validated, mode="json"))).body
+
+
+def adapter_path(adapter, objects):
+    return adapter_response(adapter, objects).body
+
+
+def measure(name, fn, rows, rounds):
+    fn()
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    median = timings[len(timings) // 2]
+    print(f"  {name:<14} median={median * 1000:8.2f}ms best={timings[0] * 1000:8.2f}ms "
+          f"rows/s={rows / median:10.0f} bytes={len(body)}")
+    return body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    random.seed(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'serialization.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+
+        db = session_factory()
+        appeal_id = seed(db, args.rows)
+        appeals = db.query(Appeal).options(
+            joinedload(Appeal.public_tags), joinedload(Appeal.internal_tags), joinedload(Appeal.category)
+        ).order_by(Appeal.created_at.desc()).limit(args.rows).all()
+        history = db.query(AppealHistory).options(joinedload(AppealHistory.user)).filter(
+            AppealHistory.appeal_id == appeal_id
+        ).all()
+        comments = db.query(Comment).options(joinedload(Comment.user)).filter(Comment.appeal_id == appeal_id).all()
+        summaries = build_summaries(
+            db, summary_query(db, SUMMARY_FIELDS).order_by(Appeal.created_at.desc()).limit(args.rows).all(),
+            SUMMARY_FIELDS
+        )
+
+        print(f"{args.rows} rows, {args.rounds} rounds, orjson {'available' if orjson else 'not installed'}")
+        for endpoint, adapter, objects in (
+            ("get_appeals", appeal_list_adapter, appeals),
+            ("search_appeals", appeal_list_adapter, appeals[:50]),
+            ("get_appeal_history", appeal_history_adapter, history),
+            ("get_comments", comment_list_adapter, comments),
+        ):
+            print(endpoint)
+            expected = measure("default", lambda: default_path(adapter, objects), len(objects), args.rounds)
+            actual = measure("adapter", lambda: adapter_path(adapter, objects), len(objects), args.rounds)
+            assert json.loads(expected) == json.loads(actual), f"{endpoint}: output differs"
+
+        print("get_appeals?view=summary")
+        measure("JSONResponse", lambda: JSONResponse(jsonable_encoder(summaries)).body, len(summaries), args.rounds)
+        measure("FastJSON", lambda: FastJSONResponse(summaries).body, len(summaries), args.rounds)
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
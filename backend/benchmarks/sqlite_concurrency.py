@@ -0,0 +1,146 @@
+"""
+SQLite concurrency benchmark: API and bot processes writing one file at once.
+
+Each role runs in its own process against a throwaway database, the way the
+backend and the bot share the sqlite_data volume. API writers create appeals
+the way create_appeal does; bot writers go through the bot's own engine and
+models; readers run the list and "my appeals" queries. Runs with the SQLite
+profile off and on and reports throughput, lock errors and latency:
+
+    cd backend
+    python -m benchmarks.sqlite_concurrency --duration 10 --api-writers 4 --bot-writers 1 --readers 2
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BOT_DIR = Path(__file__).resolve().parent.parent.parent / "telegram_bot"
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_role(role, url, profile, duration, results):
+    os.environ.update(USE_SQLITE="true", DATABASE_URL=url, SQLITE_PROFILE="true" if profile else "false")
+
+    if role.startswith("bot"):
+        sys.path.insert(0, str(BOT_DIR))
+        import database as bot_db
+
+        def bot_write():
+            db = bot_db.SessionLocal()
+            try:
+                db.add(bot_db.Appeal(
+                    text="Обращение из бота", status="new", is_anonymous=False,
+                    telegram_user_id=random.randint(1, 1000)
+                ))
+                db.commit()
+            finally:
+                db.close()
+
+        def bot_read():
+            bot_db.get_user_appeals(random.randint(1, 1000))
+
+        operation = bot_write if role == "bot-writer" else bot_read
+    else:
+        from app.core.database import SessionLocal
+        from app.models.models import Appeal, HistoryActionType
+        from app.routers.appeals import add_history_entries, history_row
+        from app.services.appeal_changes import record_appeal_changes
+
+        def api_write():
+            db = SessionLocal()
+            try:
+                appeal = Appeal(text="Обращение с формы", status="new", is_anonymous=True)
+                db.add(appeal)
+                db.flush()
+                add_history_entries(db, [history_row(appeal.id, None, HistoryActionType.STATUS_CHANGE, None, "new")])
+                record_appeal_changes(db, [appeal.id])
+                db.commit()
+            finally:
+                db.close()
+
+        def api_read():
+            db = SessionLocal()
+            try:
+                db.query(Appeal).order_by(Appeal.created_at.desc()).limit(50).all()
+            finally:
+                db.close()
+
+        operation = api_write if role == "api-writer" else api_read
+
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            operation()
+            latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            if "locked" not in str(e) and "busy" not in str(e):
+                raise
+            errors += 1
+    results.put((role, latencies, errors))
+
+
+def run_profile(profile, args):
+    tmp = tempfile.mkdtemp()
+    url = f"sqlite:///{os.path.join(tmp, 'concurrency.db')}"
+
+    os.environ.update(USE_SQLITE="true", DATABASE_URL=url, SQLITE_PROFILE="false")
+    from sqlalchemy import create_engine
+    from app.core.database import Base
+    import app.models.models  # noqa: F401  registers the tables
+    setup_engine = create_engine(url)
+    Base.metadata.create_all(bind=setup_engine)
+    setup_engine.dispose()
+
+    roles = (
+        ["api-writer"] * args.api_writers + ["bot-writer"] * args.bot_writers
+        + ["api-reader", "bot-reader"] * args.readers
+    )
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [
+        context.Process(target=run_role, args=(role, url, profile, args.duration, results))
+        for role in roles
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    print(f"profile {'on' if profile else 'off'}:")
+    for role in dict.fromkeys(roles):
+        latencies = [value for name, values, _ in collected if name == role for value in values]
+        errors = sum(count for name, _, count in collected if name == role)
+        print(f"  {role:<11} ops/s={len(latencies) / args.duration:8.1f} errors={errors:<5} "
+              f"p50={percentile(latencies, 0.50) * 1000:7.1f}ms p95={percentile(latencies, 0.95) * 1000:7.1f}ms "
+              f"p99={percentile(latencies, 0.99) * 1000:7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--api-writers", type=int, default=4)
+    parser.add_argument("--bot-writers", type=int, default=1)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--profile", choices=["off", "on", "both"], default="both")
+    args = parser.parse_args()
+
+    for profile in ([False, True] if args.profile == "both" else [args.profile == "on"]):
+        run_profile(profile, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Write queue benchmark: concurrent appeal creation with and without group commit.
+
+Runs --concurrency coroutines, each creating appeals through insert_appeal the
+way create_appeal does, against a throwaway SQLite file with the WAL profile.
+"direct" commits every appeal in its own transaction from the threadpool
+(SQLITE_WRITE_QUEUE=false); "queue" hands them to the single writer thread
+that commits them in groups (SQLITE_WRITE_QUEUE=true):
+
+    cd backend
+    python -m benchmarks.write_queue --duration 10 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import Base, apply_sqlite_profile
+from app.core.write_queue import DirectWriter, GroupCommitWriter, build_writer_engine
+from app.routers.appeals import insert_appeal
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def build_writer(mode, url):
+    if mode == "queue":
+        return GroupCommitWriter(
+            sessionmaker(bind=build_writer_engine(url), autoflush=False),
+            max_batch=settings.SQLITE_WRITE_QUEUE_MAX_BATCH,
+            max_wait=settings.SQLITE_WRITE_QUEUE_MAX_WAIT_MS / 1000,
+        )
+    engine = create_engine(
+        url, connect_args={"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}
+    )
+    event.listen(engine, "connect", apply_sqlite_profile)
+    return DirectWriter(sessionmaker(bind=engine, autoflush=False))
+
+
+async def client(writer, deadline, latencies, errors):
+    fields = {"is_anonymous": True, "text": "Обращение с формы: не работает освещение во дворе"}
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            await writer.run(insert_appeal, fields, [])
+            latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            if "locked" not in str(e) and "busy" not in str(e):
+                raise
+            errors.append(e)
+
+
+async def run_mode(mode, args):
+    tmp = tempfile.mkdtemp()
+    url = f"sqlite:///{os.path.join(tmp, 'write_queue.db')}"
+    setup_engine = create_engine(url)
+    Base.metadata.create_all(bind=setup_engine)
+    setup_engine.dispose()
+
+    writer = build_writer(mode, url)
+    latencies, errors = [], []
+    deadline = time.perf_counter() + args.duration
+    await asyncio.gather(*(client(writer, deadline, latencies, errors) for _ in range(args.concurrency)))
+    print(f"  {mode:<6} appeals/s={len(latencies) / args.duration:8.1f} errors={len(errors):<5} "
+          f"p50={percentile(latencies, 0.50) * 1000:7.1f}ms p95={percentile(latencies, 0.95) * 1000:7.1f}ms "
+          f"p99={percentile(latencies, 0.99) * 1000:7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--mode", choices=["direct", "queue", "both"], default="both")
+    args = parser.parse_args()
+
+    print(f"{args.concurrency} concurrent clients, {args.duration:g}s per mode")
+    for mode in (["direct", "queue"] if args.mode == "both" else [args.mode]):
+        asyncio.run(run_mode(mode, args))
+
+
+if __name__ == "__main__":
+    main()
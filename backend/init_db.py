@@ -1,26 +1,9 @@
 from app.core.database import SessionLocal, engine, Base
 from app.models.models import User, Category, PublicTag, InternalTag, AppealStatusConfig
 from app.core.security import get_password_hash
+from app.services.migrations import run_migrations
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-
-def run_migrations():
-    """Run necessary database migrations."""
-    with engine.connect() as conn:
-        try:
-            result = conn.execute(text("""
-                SELECT data_type FROM information_schema.columns 
-                WHERE table_name = 'appeals' AND column_name = 'status'
-            """))
-            row = result.fetchone()
-            if row and row[0] == 'USER-DEFINED':
-                conn.execute(text("""
-                    ALTER TABLE appeals ALTER COLUMN status TYPE VARCHAR USING status::VARCHAR
-                """))
-                conn.commit()
-                print("✓ Migrated appeals.status from enum to varchar")
-        except Exception as e:
-            print(f"Migration check: {e}")
+import logging
 
 def init_database():
     Base.metadata.create_all(bind=engine)
@@ -147,6 +130,7 @@ def init_database():
         db.close()
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("Note: Database initialization now runs automatically when starting main.py")
     print("This script can still be used for manual initialization if needed.\n")
     init_database()
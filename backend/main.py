@@ -1,14 +1,30 @@
-from fastapi import FastAPI, Depends, Query
+from fastapi import FastAPI, Depends, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
 from sqlalchemy.orm import Session
-from sqlalchemy import func, distinct, case, extract, text
+from sqlalchemy import func, distinct, case, extract
 from datetime import datetime, timedelta
 from typing import List, Literal
+from functools import partial
 import os
-from app.core.database import engine, Base, get_db, SessionLocal
+import time
+from app.core.database import (
+    engine, Base, get_db, SessionLocal, run_in_read_session, read_router, check_sqlite_profile
+)
 from app.core.config import settings
-from app.routers import auth, appeals, categories, tags, users, statuses, admin_notifications
+from app.core.cache import stats_cache
+from app.core.startup import startup_timer
+from app.services.migrations import run_migrations
+from app.core.sql_profiler import profile_request_sql
+from app.core.slow_queries import RequestScopeMiddleware
+from app.core.tracing import trace_requests
+from app.core.rate_limit import PublicFormGuard
+from app.core.metrics import (
+    registry, request_query_count, route_label, CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_PROGRESS, HTTP_REQUEST_SQL_QUERIES
+)
+from app.routers import auth, appeals, categories, tags, users, statuses, admin_notifications, diagnostics
 from app.routers.auth import get_current_user, require_admin
 from app.schemas.schemas import TimelineDataPoint, ModeratorStats, AppealsByPeriodStats
 
@@ -18,25 +34,6 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def run_migrations():
-    """Run necessary database migrations on startup."""
-    with engine.connect() as conn:
-        try:
-            result = conn.execute(text("""
-                SELECT data_type FROM information_schema.columns 
-                WHERE table_name = 'appeals' AND column_name = 'status'
-            """))
-            row = result.fetchone()
-            if row and row[0] == 'USER-DEFINED':
-                conn.execute(text("""
-                    ALTER TABLE appeals ALTER COLUMN status TYPE VARCHAR USING status::VARCHAR
-                """))
-                conn.commit()
-                logger.info("Migrated appeals.status from enum to varchar")
-        except Exception as e:
-            pass
-
-
 def init_database_if_needed():
     """Initialize database with default data if tables are empty."""
     from app.models.models import User, Category, PublicTag, InternalTag, AppealStatusConfig
@@ -160,7 +157,50 @@ def init_database_if_needed():
         db.close()
 
 
-app = FastAPI(title="Citizens Appeals System - Новые Люди")
+def prepare_database():
+    """Create missing tables, migrate and add default data; startup and tooling share this."""
+    with startup_timer.phase("schema"):
+        Base.metadata.create_all(bind=engine)
+    with startup_timer.phase("migrations"):
+        run_migrations()
+    with startup_timer.phase("default data"):
+        init_database_if_needed()
+    if engine.dialect.name == "sqlite":
+        with startup_timer.phase("sqlite profile"):
+            logger.info(f"SQLite profile: {check_sqlite_profile(engine)}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing here runs on import, so tools and tests that only need the app
+    # object (routes, OpenAPI) do not touch the database
+    prepare_database()
+    if settings.METRICS_ENABLED:
+        with startup_timer.phase("metrics flusher"):
+            registry.start_flusher(settings.METRICS_FLUSH_SECONDS)
+    if settings.DUPLICATE_INDEX_ENABLED:
+        # Built in a background thread; the duplicates endpoint answers 503 until it is ready
+        from app.services.duplicates import duplicate_index
+        with startup_timer.phase("duplicate index"):
+            duplicate_index.start_build()
+    if settings.CATEGORIZER_ENABLED:
+        try:
+            from app.services.categorizer import categorizer
+        except ImportError as e:
+            logger.warning(f"Category suggestions disabled: {e}")
+        else:
+            with startup_timer.phase("categorizer"):
+                categorizer.start()
+    if settings.ARCHIVE_ENABLED:
+        from app.services.archive import archiver
+        with startup_timer.phase("archiver"):
+            archiver.start()
+    logger.info(startup_timer.summary())
+    yield
+    engine.dispose()
+
+
+app = FastAPI(title="Citizens Appeals System - Новые Люди", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -170,9 +210,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-Base.metadata.create_all(bind=engine)
-run_migrations()
-init_database_if_needed()
+
+@app.middleware("http")
+async def pin_reads_after_writes(request: Request, call_next):
+    """Send the caller's reads to the primary for a while after a write (read-your-writes)."""
+    response = await call_next(request)
+    if read_router.replicas and request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        response.set_cookie(
+            settings.READ_PIN_COOKIE,
+            str(time.time() + settings.READ_YOUR_WRITES_SECONDS),
+            max_age=settings.READ_YOUR_WRITES_SECONDS,
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
+
+async def record_request_metrics(request: Request, call_next):
+    """Latency, in-flight count and SQL statements per route for /metrics."""
+    method = request.method
+    HTTP_REQUESTS_IN_PROGRESS.inc(method=method)
+    query_count = [0]
+    token = request_query_count.set(query_count)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = route_label(request.scope)
+        HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method=method, route=route, status=status)
+        HTTP_REQUEST_SQL_QUERIES.observe(query_count[0], method=method, route=route)
+        HTTP_REQUESTS_IN_PROGRESS.dec(method=method)
+        request_query_count.reset(token)
+
+
+if settings.SQL_PROFILER:
+    app.middleware("http")(profile_request_sql)
+
+if settings.SLOW_QUERY_THRESHOLD_MS > 0:
+    app.add_middleware(RequestScopeMiddleware)
+
+if settings.METRICS_ENABLED:
+    app.middleware("http")(record_request_metrics)
+
+if settings.TRACING_ENABLED:
+    app.middleware("http")(trace_requests)
+
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(PublicFormGuard)
 
 os.makedirs("uploads", exist_ok=True)
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
@@ -184,6 +271,7 @@ app.include_router(tags.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
 app.include_router(statuses.router, prefix="/api")
 app.include_router(admin_notifications.router, prefix="/api")
+app.include_router(diagnostics.router, prefix="/api")
 
 @app.get("/")
 async def root():
@@ -193,11 +281,12 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
-@app.get("/api/stats")
-async def get_stats(
-    current_user = Depends(require_admin),
-    db: Session = Depends(get_db)
-):
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+def compute_stats(db: Session):
     from app.models.models import Appeal, appeal_internal_tags, appeal_public_tags, InternalTag, PublicTag
     from app.schemas.schemas import Statistics, TagStatistics
     
@@ -291,12 +380,7 @@ async def get_stats(
     )
 
 
-@app.get("/api/stats/appeals-timeline", response_model=List[TimelineDataPoint])
-async def get_appeals_timeline(
-    period: Literal["hour", "day", "week", "month", "year", "all"] = Query(default="day"),
-    current_user = Depends(require_admin),
-    db: Session = Depends(get_db)
-):
+def compute_appeals_timeline(db: Session, period: str):
     from app.models.models import Appeal
     from app.schemas.schemas import TimelineDataPoint
     
@@ -458,11 +542,7 @@ async def get_appeals_timeline(
     return result
 
 
-@app.get("/api/stats/moderators", response_model=List[ModeratorStats])
-async def get_moderator_stats(
-    current_user = Depends(require_admin),
-    db: Session = Depends(get_db)
-):
+def compute_moderator_stats(db: Session):
     from app.models.models import User, UserRole, AppealHistory
     from app.schemas.schemas import ModeratorStats
     from sqlalchemy.orm import aliased
@@ -510,12 +590,7 @@ async def get_moderator_stats(
     return result
 
 
-@app.get("/api/stats/appeals-by-period", response_model=AppealsByPeriodStats)
-async def get_appeals_by_period(
-    period: Literal["hour", "day", "week", "month", "year", "all"] = Query(default="all"),
-    current_user = Depends(require_admin),
-    db: Session = Depends(get_db)
-):
+def compute_appeals_by_period(db: Session, period: str):
     from app.models.models import Appeal
     from app.schemas.schemas import AppealsByPeriodStats
     
@@ -554,3 +629,49 @@ async def get_appeals_by_period(
         resolved=result.resolved,
         rejected=result.rejected
     )
+
+
+@app.get("/api/stats")
+async def get_stats(current_user = Depends(require_admin)):
+    return await stats_cache.get_or_compute(
+        "summary",
+        partial(run_in_read_session, compute_stats),
+        ttl=settings.STATS_CACHE_TTL_SUMMARY,
+        stale_ttl=settings.STATS_CACHE_STALE_TTL
+    )
+
+
+@app.get("/api/stats/appeals-timeline", response_model=List[TimelineDataPoint])
+async def get_appeals_timeline(
+    period: Literal["hour", "day", "week", "month", "year", "all"] = Query(default="day"),
+    current_user = Depends(require_admin)
+):
+    return await stats_cache.get_or_compute(
+        f"appeals-timeline:{period}",
+        partial(run_in_read_session, compute_appeals_timeline, period),
+        ttl=settings.STATS_CACHE_TTL_TIMELINE,
+        stale_ttl=settings.STATS_CACHE_STALE_TTL
+    )
+
+
+@app.get("/api/stats/moderators", response_model=List[ModeratorStats])
+async def get_moderator_stats(current_user = Depends(require_admin)):
+    return await stats_cache.get_or_compute(
+        "moderators",
+        partial(run_in_read_session, compute_moderator_stats),
+        ttl=settings.STATS_CACHE_TTL_MODERATORS,
+        stale_ttl=settings.STATS_CACHE_STALE_TTL
+    )
+
+
+@app.get("/api/stats/appeals-by-period", response_model=AppealsByPeriodStats)
+async def get_appeals_by_period(
+    period: Literal["hour", "day", "week", "month", "year", "all"] = Query(default="all"),
+    current_user = Depends(require_admin)
+):
+    return await stats_cache.get_or_compute(
+        f"appeals-by-period:{period}",
+        partial(run_in_read_session, compute_appeals_by_period, period),
+        ttl=settings.STATS_CACHE_TTL_BY_PERIOD,
+        stale_ttl=settings.STATS_CACHE_STALE_TTL
+    )
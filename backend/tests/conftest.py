@@ -0,0 +1,91 @@
+"""
+Shared fixtures for the backend tests.
+
+The app reads its settings at import, so the environment is set up first: a
+throwaway SQLite database and upload directory, the SQL profiler on (the
+query_budget fixture counts statements through its engine listeners) and no
+background threads or rate limits to disturb the counts.
+"""
+import os
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+_data_dir = tempfile.mkdtemp(prefix="appeals-tests-")
+os.environ.update({
+    "USE_SQLITE": "true",
+    "DATABASE_URL": f"sqlite:///{_data_dir}/test.db",
+    "UPLOAD_DIR": os.path.join(_data_dir, "uploads"),
+    "SQL_PROFILER": "true",
+    "SLOW_QUERY_THRESHOLD_MS": "0",
+    "RATE_LIMIT_ENABLED": "false",
+    "DUPLICATE_INDEX_ENABLED": "false",
+    "CATEGORIZER_ENABLED": "false",
+    "ARCHIVE_ENABLED": "false",
+})
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core import sql_profiler  # noqa: E402
+
+ADMIN_CREDENTIALS = {"username": "admin", "password": "admin123"}
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "query_budget(n): fail the test when it runs more than n SQL statements"
+    )
+
+
+@pytest.fixture(scope="session")
+def client():
+    import main
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    response = client.post("/api/auth/login", data=ADMIN_CREDENTIALS)
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def make_user(client, admin_headers):
+    """Create a user through the API and log in; returns (user id, username, auth headers)."""
+    def make(role: str = "moderator"):
+        username = f"{role}-{uuid.uuid4().hex[:8]}"
+        response = client.post(
+            "/api/users",
+            json={"username": username, "email": f"{username}@example.com", "password": "secret123", "role": role},
+            headers=admin_headers
+        )
+        assert response.status_code == 200, response.text
+        user_id = response.json()["id"]
+        response = client.post("/api/auth/login", data={"username": username, "password": "secret123"})
+        assert response.status_code == 200, response.text
+        return user_id, username, {"Authorization": f"Bearer {response.json()['access_token']}"}
+    
+    return make
+
+
+@pytest.fixture
+def query_budget(request):
+    """
+    Statement budgets: `with query_budget(n): ...` fails with
+    QueryBudgetExceeded when the block runs more than n statements, and a
+    test marked `@pytest.mark.query_budget(n)` is held to n as a whole.
+    """
+    marker = request.node.get_closest_marker("query_budget")
+    if marker is None:
+        yield sql_profiler.query_budget
+        return
+    with sql_profiler.query_budget(marker.args[0]):
+        yield sql_profiler.query_budget
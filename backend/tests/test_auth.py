@@ -0,0 +1,55 @@
+"""
+get_current_user serves repeat requests from its user cache without a query,
+and revocations still reach the cache: directly in the worker that made the
+change, through the token version stamp in the shared cache backend in the
+others.
+"""
+import time
+
+from app.core.cache import SQLiteCacheBackend
+from app.core.database import SessionLocal
+from app.models.models import User
+from app.routers import auth
+
+
+def test_cached_user_needs_no_query(client, make_user, query_budget):
+    _, _, headers = make_user()
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+    
+    with query_budget(0):
+        response = client.get("/api/auth/me", headers=headers)
+    
+    assert response.status_code == 200, response.text
+
+
+def test_deactivated_user_is_rejected(client, admin_headers, make_user):
+    user_id, _, headers = make_user()
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+    
+    response = client.patch(f"/api/users/{user_id}", json={"is_active": False}, headers=admin_headers)
+    assert response.status_code == 200, response.text
+    
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
+
+
+def test_revocation_by_another_worker_reaches_cached_user(client, make_user, monkeypatch, tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(auth, "cache_backend", backend)
+    user_id, username, headers = make_user()
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+    
+    # Another worker deactivates the user: the database changes and the stamp
+    # is written, but this worker's cache entry is left alone
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        user.is_active = False
+        user.token_version += 1
+        db.commit()
+        new_version = user.token_version
+    finally:
+        db.close()
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+    backend.set(auth.TOKEN_STAMP_PREFIX + username, new_version, time.time(), 30)
+    
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
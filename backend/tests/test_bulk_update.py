@@ -0,0 +1,29 @@
+"""Bulk updates validate what they write before touching any appeal."""
+
+
+def test_unknown_category_is_rejected(client, admin_headers):
+    response = client.post("/api/appeals", data={"text": "Bulk category check", "is_anonymous": "true"})
+    assert response.status_code == 200, response.text
+    appeal_id = response.json()["id"]
+    
+    response = client.post(
+        "/api/appeals/bulk", json={"appeal_ids": [appeal_id], "category_id": 999999}, headers=admin_headers
+    )
+    
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Unknown category"
+    appeal = client.get(f"/api/appeals/{appeal_id}", headers=admin_headers).json()
+    assert appeal["category_id"] is None
+    history = client.get(f"/api/appeals/{appeal_id}/history", headers=admin_headers).json()
+    assert not any(item["action_type"] == "category_changed" for item in history)
+
+
+def test_category_can_still_be_cleared(client, admin_headers):
+    response = client.post("/api/appeals", data={"text": "Bulk category clear", "is_anonymous": "true", "category_id": 1})
+    assert response.status_code == 200, response.text
+    appeal_id = response.json()["id"]
+    
+    response = client.post("/api/appeals/bulk", json={"appeal_ids": [appeal_id], "category_id": 0}, headers=admin_headers)
+    
+    assert response.status_code == 200, response.text
+    assert client.get(f"/api/appeals/{appeal_id}", headers=admin_headers).json()["category_id"] is None
@@ -0,0 +1,49 @@
+"""
+The category model is trained by whichever worker holds the lock on the
+model file; the others load the file instead of training their own copy.
+"""
+from app.core.database import run_in_read_session
+from app.services import categorizer as categorizer_module
+from app.services.categorizer import Categorizer, training_lock
+
+TEXTS = {
+    1: "Яма на дороге возле дома, асфальт разрушен",
+    2: "Не вывозят мусор со двора, контейнеры переполнены",
+}
+
+
+def create_categorized_appeals(client):
+    for category_id, text in TEXTS.items():
+        for i in range(6):
+            response = client.post(
+                "/api/appeals", data={"text": f"{text} {i}", "category_id": category_id, "is_anonymous": "true"}
+            )
+            assert response.status_code == 200, response.text
+
+
+def test_one_worker_trains_and_the_others_load(client, monkeypatch, tmp_path):
+    create_categorized_appeals(client)
+    fits = []
+    fit_model = categorizer_module.fit_model
+    monkeypatch.setattr(categorizer_module, "fit_model", lambda db: fits.append(1) or fit_model(db))
+    path = str(tmp_path / "category_model.npz")
+    workers = [Categorizer(path), Categorizer(path)]
+    
+    for worker in workers:
+        worker.refresh()
+    
+    assert len(fits) == 1
+    assert all(worker.ready for worker in workers)
+    text = "Во дворе переполнены мусорные контейнеры"
+    assert workers[0].suggest(text) == workers[1].suggest(text)
+    assert workers[1].suggest(text)[0]["category_id"] == 2
+
+
+def test_training_is_skipped_while_another_process_holds_the_lock(client, tmp_path):
+    path = str(tmp_path / "category_model.npz")
+    worker = Categorizer(path)
+    
+    with training_lock(path):
+        assert run_in_read_session(worker.train) is False
+    
+    assert run_in_read_session(worker.train) is True
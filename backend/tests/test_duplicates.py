@@ -0,0 +1,40 @@
+"""DuplicateIndex keeps every band of an edited appeal in step with its text."""
+from collections import Counter
+
+import numpy as np
+
+from app.services.duplicates import DuplicateIndex
+
+BAND_KEYS = {
+    "original": [1, 2, 3],
+    "edited": [1, 5, 6],  # band 0 unchanged
+    "edge": [2 ** 32 - 1, 7, 8],
+}
+
+
+def make_index() -> DuplicateIndex:
+    index = DuplicateIndex(bands=3, rows=1, max_appeals=100)
+    index.band_keys = BAND_KEYS.get
+    return index
+
+
+def test_edit_with_unchanged_first_band_is_reindexed():
+    index = make_index()
+    index.add(7, "original")
+    
+    index.add(7, "edited")
+    
+    assert index.candidates("edited") == Counter({7: 3})
+
+
+def test_merged_bands_stay_sorted_and_searchable():
+    index = make_index()
+    index.add(3, "edge")
+    index.add(4, "original")
+    index._merge_delta()
+    index.add(5, "edge")
+    index._merge_delta()
+    
+    assert all(np.all(keys[:-1] <= keys[1:]) for keys in index._sorted)
+    assert index.candidates("edge") == Counter({3: 3, 5: 3})
+    assert index.candidates("original") == Counter({4: 3})
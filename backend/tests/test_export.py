@@ -0,0 +1,16 @@
+"""The appeal export carries contact details, so only admins may run it."""
+
+
+def test_moderators_cannot_export(client, make_user):
+    _, _, headers = make_user("moderator")
+    
+    response = client.get("/api/appeals/export", headers=headers)
+    
+    assert response.status_code == 403, response.text
+
+
+def test_admins_can_export(client, admin_headers):
+    response = client.get("/api/appeals/export", params={"format": "csv"}, headers=admin_headers)
+    
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/csv")
@@ -0,0 +1,39 @@
+"""
+Tag, category and status lists are cached per version on a shared backend,
+and every change moves its scope to a new version.
+"""
+from app.core.cache import SQLiteCacheBackend, reference_cache
+
+
+def public_tag_ids(client):
+    response = client.get("/api/tags/public")
+    assert response.status_code == 200, response.text
+    return [tag["id"] for tag in response.json()]
+
+
+def test_reorder_moves_cached_tags_to_a_new_version(client, admin_headers, query_budget, monkeypatch, tmp_path):
+    monkeypatch.setattr(reference_cache, "backend", SQLiteCacheBackend(str(tmp_path / "cache.db")))
+    for name in ("Cached A", "Cached B", "Cached C"):
+        response = client.post("/api/tags/public", json={"name": name}, headers=admin_headers)
+        assert response.status_code == 200, response.text
+    ids = public_tag_ids(client)
+    with query_budget(0):
+        assert public_tag_ids(client) == ids
+    
+    response = client.put("/api/tags/public/reorder", json={"tag_ids": ids[::-1]}, headers=admin_headers)
+    assert response.status_code == 200, response.text
+    
+    assert public_tag_ids(client) == ids[::-1]
+
+
+def test_lost_version_never_serves_old_entries(client, admin_headers, monkeypatch, tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(reference_cache, "backend", backend)
+    before = public_tag_ids(client)
+    response = client.post("/api/tags/public", json={"name": "Added after eviction"}, headers=admin_headers)
+    assert response.status_code == 200, response.text
+    
+    # The version key is evicted together with the bump made by the create
+    backend.delete_prefix("reference:version:")
+    
+    assert public_tag_ids(client) == before + [response.json()["id"]]
@@ -0,0 +1,28 @@
+import pytest
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.core.sql_profiler import QueryBudgetExceeded
+
+
+def run_statements(count: int):
+    with engine.connect() as conn:
+        for _ in range(count):
+            conn.execute(text("SELECT 1"))
+
+
+def test_block_over_budget_fails(query_budget):
+    with pytest.raises(QueryBudgetExceeded, match="3 queries, budget 2"):
+        with query_budget(2):
+            run_statements(3)
+
+
+def test_block_within_budget_reports_statements(query_budget):
+    with query_budget(3) as profile:
+        run_statements(3)
+    assert profile.count == 3
+
+
+@pytest.mark.query_budget(5)
+def test_marked_test_within_budget(query_budget):
+    run_statements(5)
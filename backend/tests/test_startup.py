@@ -0,0 +1,27 @@
+"""
+Cold-start budget: a fresh interpreter imports main and runs the lifespan
+startup on an empty database (schema, default data, background threads), the
+way a new worker does, and must finish within STARTUP_BUDGET_MS.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Settings conftest changes for the other tests; startup is measured with the defaults
+TEST_ONLY_SETTINGS = ("SQL_PROFILER", "SLOW_QUERY_THRESHOLD_MS", "DUPLICATE_INDEX_ENABLED", "CATEGORIZER_ENABLED")
+
+
+def test_cold_start_within_budget(tmp_path):
+    env = {key: value for key, value in os.environ.items() if key not in TEST_ONLY_SETTINGS}
+    env["DATABASE_URL"] = f"sqlite:///{tmp_path / 'cold_start.db'}"
+    env["UPLOAD_DIR"] = str(tmp_path / "uploads")
+    env["CATEGORIZER_MODEL_PATH"] = str(tmp_path / "category_model.npz")
+    result = subprocess.run(
+        [sys.executable, "-m", "app.core.startup", "--top", "0"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=300
+    )
+    assert result.returncode == 0, f"cold start over budget:\n{result.stdout}\n{result.stderr[-2000:]}"
+    assert "cold start" in result.stdout
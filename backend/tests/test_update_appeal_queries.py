@@ -0,0 +1,53 @@
+"""
+update_appeal resolves tags and categories with one query per table, writes
+history in one insert and changes tag links with set-based statements, so
+its statement count must not grow with the number of tags that change.
+"""
+import pytest
+
+# Appeal, two link reads, two tag lookups, category lookup, link deletes and
+# inserts for both kinds, history, change log (3), the appeal row update and
+# the reload for the response; the auth check is served from the user cache
+UPDATE_BUDGET = 16
+
+
+def create_tags(client, headers, kind: str, prefix: str, count: int):
+    ids = []
+    for i in range(count):
+        response = client.post(f"/api/tags/{kind}", json={"name": f"{prefix} {i}"}, headers=headers)
+        assert response.status_code == 200, response.text
+        ids.append(response.json()["id"])
+    return ids
+
+
+@pytest.mark.parametrize("changed", [1, 5, 25])
+def test_tag_and_category_update_has_fixed_query_count(client, admin_headers, query_budget, changed):
+    response = client.post("/api/appeals", data={"text": f"Query budget {changed}", "is_anonymous": "true"})
+    assert response.status_code == 200, response.text
+    appeal_id = response.json()["id"]
+    old_public = create_tags(client, admin_headers, "public", f"old public {changed}", changed)
+    old_internal = create_tags(client, admin_headers, "internal", f"old internal {changed}", changed)
+    new_public = create_tags(client, admin_headers, "public", f"new public {changed}", changed)
+    new_internal = create_tags(client, admin_headers, "internal", f"new internal {changed}", changed)
+    response = client.put(
+        f"/api/appeals/{appeal_id}",
+        json={"public_tag_ids": old_public, "internal_tag_ids": old_internal, "category_id": 1},
+        headers=admin_headers
+    )
+    assert response.status_code == 200, response.text
+    
+    with query_budget(UPDATE_BUDGET):
+        response = client.put(
+            f"/api/appeals/{appeal_id}",
+            json={"public_tag_ids": new_public, "internal_tag_ids": new_internal, "category_id": 2},
+            headers=admin_headers
+        )
+    
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert sorted(tag["id"] for tag in body["public_tags"]) == sorted(new_public)
+    assert sorted(tag["id"] for tag in body["internal_tags"]) == sorted(new_internal)
+    assert body["category_id"] == 2
+    history = client.get(f"/api/appeals/{appeal_id}/history", headers=admin_headers).json()
+    assert sum(item["action_type"] == "tag_added" for item in history) == 4 * changed
+    assert sum(item["action_type"] == "tag_removed" for item in history) == 2 * changed
@@ -1,9 +1,9 @@
 import React from 'react';
 import { motion } from 'framer-motion';
-import type { Appeal } from '../types';
+import type { AppealSummary } from '../types';
 
 interface AppealCardProps {
-  appeal: Appeal;
+  appeal: AppealSummary;
   onClick: () => void;
   isSelected: boolean;
 }
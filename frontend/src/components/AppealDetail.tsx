@@ -231,6 +231,17 @@ const AppealDetail: React.FC<AppealDetailProps> = ({
     }
   }, [activeTab, appeal.id]);
 
+  useEffect(() => {
+    // Comments pushed by the dashboard's event stream
+    const pushed = appeal.comments || [];
+    setComments((current) => {
+      if (current.length === 0) return current;
+      const known = new Set(current.map((c) => c.id));
+      const fresh = pushed.filter((c) => !known.has(c.id));
+      return fresh.length > 0 ? [...current, ...fresh] : current;
+    });
+  }, [appeal.comments]);
+
   const loadHistory = async () => {
     setLoadingHistory(true);
     try {
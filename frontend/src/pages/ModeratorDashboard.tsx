@@ -2,14 +2,14 @@ import React, { useState, useEffect, useMemo, useRef } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { appealsApi, tagsApi, categoriesApi, statusesApi } from '../services/api';
 import type { AppealStatusConfig } from '../services/api';
-import type { Appeal, Tag, Category } from '../types';
+import type { Appeal, AppealEvent, AppealSummary, Tag, Category } from '../types';
 import AppealCard from '../components/AppealCard';
 import AppealDetail from '../components/AppealDetail';
 import { useAuth } from '../contexts/AuthContext';
 import LoadingScreen from '../components/LoadingScreen';
 
 const ModeratorDashboard: React.FC = () => {
-  const [appeals, setAppeals] = useState<Appeal[]>([]);
+  const [appeals, setAppeals] = useState<AppealSummary[]>([]);
   const [tags, setTags] = useState<Tag[]>([]);
   const [categories, setCategories] = useState<Category[]>([]);
   const [statusConfigs, setStatusConfigs] = useState<AppealStatusConfig[]>([]);
@@ -18,11 +18,12 @@ const ModeratorDashboard: React.FC = () => {
   const [selectedTagId, setSelectedTagId] = useState<number | null>(null);
   const [selectedCategoryId, setSelectedCategoryId] = useState<number | null>(null);
   const [searchQuery, setSearchQuery] = useState('');
-  const [searchResults, setSearchResults] = useState<Appeal[] | null>(null);
+  const [searchResults, setSearchResults] = useState<AppealSummary[] | null>(null);
   const [isSearching, setIsSearching] = useState(false);
   const [loading, setLoading] = useState(true);
   const [categoryDropdownOpen, setCategoryDropdownOpen] = useState(false);
   const categoryDropdownRef = useRef<HTMLDivElement>(null);
+  const syncTokenRef = useRef<string>('');
   const { logout, user } = useAuth();
 
   useEffect(() => {
@@ -39,15 +40,20 @@ const ModeratorDashboard: React.FC = () => {
     loadData();
   }, []);
 
+  useEffect(() => {
+    return appealsApi.subscribeEvents(applyEvent, syncChanges);
+  }, []);
+
   const loadData = async () => {
     try {
-      const [appealsData, tagsData, categoriesData, statusesData] = await Promise.all([
-        appealsApi.getAll(),
+      const [{ appeals: appealsData, syncToken }, tagsData, categoriesData, statusesData] = await Promise.all([
+        appealsApi.getSummariesWithSyncToken(),
         tagsApi.getAll(),
         categoriesApi.getAll(),
         statusesApi.getAll(),
       ]);
       setAppeals(appealsData);
+      syncTokenRef.current = syncToken;
       setTags(tagsData);
       setCategories(categoriesData);
       setStatusConfigs(statusesData);
@@ -58,6 +64,54 @@ const ModeratorDashboard: React.FC = () => {
     }
   };
 
+  const syncChanges = async () => {
+    if (!syncTokenRef.current) {
+      await loadData();
+      return;
+    }
+    try {
+      let hasMore = true;
+      while (hasMore) {
+        const changes = await appealsApi.getChanges(syncTokenRef.current);
+        const removed = new Set(changes.deleted);
+        setAppeals((current) => {
+          const changed = new Map(changes.appeals.map((a) => [a.id, a]));
+          const kept = current
+            .filter((a) => !removed.has(a.id))
+            .map((a) => changed.get(a.id) ?? a);
+          const known = new Set(kept.map((a) => a.id));
+          return [...changes.appeals.filter((a) => !known.has(a.id)), ...kept];
+        });
+        syncTokenRef.current = changes.token;
+        hasMore = changes.has_more;
+      }
+    } catch (error) {
+      console.error('Failed to sync changes:', error);
+    }
+  };
+
+  const applyEvent = (event: AppealEvent) => {
+    if (event.type === 'resync') {
+      loadData();
+      return;
+    }
+    if (event.type === 'comment_added') {
+      setSelectedAppeal((current) => {
+        if (current?.id !== event.appeal_id) return current;
+        const comments = current.comments || [];
+        if (comments.some((c) => c.id === event.comment.id)) return current;
+        return { ...current, comments: [...comments, event.comment] };
+      });
+      return;
+    }
+    const appeal = event.appeal;
+    setAppeals((current) => {
+      const exists = current.some((a) => a.id === appeal.id);
+      return exists ? current.map((a) => (a.id === appeal.id ? { ...a, ...appeal } : a)) : [appeal, ...current];
+    });
+    setSelectedAppeal((current) => (current?.id === appeal.id ? { ...current, ...appeal } : current));
+  };
+
   useEffect(() => {
     if (!searchQuery.trim()) {
       setSearchResults(null);
@@ -80,7 +134,7 @@ const ModeratorDashboard: React.FC = () => {
     return () => clearTimeout(timer);
   }, [searchQuery]);
 
-  const handleAppealClick = async (appeal: Appeal) => {
+  const handleAppealClick = async (appeal: AppealSummary) => {
     try {
       const fullAppeal = await appealsApi.getById(appeal.id);
       setSelectedAppeal(fullAppeal);
@@ -92,7 +146,6 @@ const ModeratorDashboard: React.FC = () => {
   const handleStatusUpdate = async (id: number, status: string) => {
     try {
       await appealsApi.updateStatus(id, status as Appeal['status']);
-      await loadData();
       if (selectedAppeal?.id === id) {
         const updated = await appealsApi.getById(id);
         setSelectedAppeal(updated);
@@ -105,7 +158,6 @@ const ModeratorDashboard: React.FC = () => {
   const handleAddTag = async (appealId: number, tagId: number, tagType: 'public' | 'internal') => {
     try {
       await appealsApi.addTag(appealId, tagId, tagType);
-      await loadData();
       if (selectedAppeal?.id === appealId) {
         const updated = await appealsApi.getById(appealId);
         setSelectedAppeal(updated);
@@ -118,7 +170,6 @@ const ModeratorDashboard: React.FC = () => {
   const handleRemoveTag = async (appealId: number, tagId: number, tagType: 'public' | 'internal') => {
     try {
       await appealsApi.removeTag(appealId, tagId, tagType);
-      await loadData();
       if (selectedAppeal?.id === appealId) {
         const updated = await appealsApi.getById(appealId);
         setSelectedAppeal(updated);
@@ -447,7 +498,7 @@ const ModeratorDashboard: React.FC = () => {
                 Список обращений ({filteredAppeals.length})
               </h2>
               <button 
-                onClick={loadData}
+                onClick={syncChanges}
                 className="p-2 text-gray-500 hover:text-gray-700 hover:bg-gray-100 rounded-lg transition-colors"
                 title="Обновить список"
               >
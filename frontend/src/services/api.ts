@@ -1,5 +1,5 @@
 import axios from 'axios';
-import type { Category, Tag, Appeal, AppealCreate, LoginCredentials, AuthToken, User, Comment, AppealHistoryItem, Statistics, TimelineDataPoint, ModeratorStats, AppealsByPeriodStats, TimePeriod, AppealStatusConfig, AdminTelegramId } from '../types';
+import type { Category, Tag, Appeal, AppealSummary, AppealCreate, AppealBulkUpdate, AppealBulkItemResult, AppealChanges, AppealEvent, LoginCredentials, AuthToken, User, Comment, AppealHistoryItem, Statistics, TimelineDataPoint, ModeratorStats, AppealsByPeriodStats, TimePeriod, AppealStatusConfig, AdminTelegramId } from '../types';
 
 export type { AppealStatusConfig } from '../types';
 
@@ -122,6 +122,16 @@ export const appealsApi = {
     return response.data;
   },
   
+  getSummariesWithSyncToken: async (): Promise<{ appeals: AppealSummary[]; syncToken: string }> => {
+    const response = await api.get<AppealSummary[]>('/appeals', { params: { view: 'summary' } });
+    return { appeals: response.data, syncToken: response.headers['x-sync-token'] ?? '' };
+  },
+  
+  getChanges: async (since: string): Promise<AppealChanges> => {
+    const response = await api.get<AppealChanges>('/appeals/changes', { params: { since } });
+    return response.data;
+  },
+  
   getById: async (id: number): Promise<Appeal> => {
     const response = await api.get<Appeal>(`/appeals/${id}`);
     return response.data;
@@ -196,6 +206,11 @@ export const appealsApi = {
     return response.data;
   },
   
+  bulkUpdate: async (data: AppealBulkUpdate): Promise<AppealBulkItemResult[]> => {
+    const response = await api.post<{ results: AppealBulkItemResult[] }>('/appeals/bulk', data);
+    return response.data.results;
+  },
+  
   addTag: async (appealId: number, tagId: number, tagType: 'public' | 'internal'): Promise<void> => {
     await api.post(`/appeals/${appealId}/tags/${tagId}?tag_type=${tagType}`);
   },
@@ -228,6 +243,26 @@ export const appealsApi = {
   getFileUrl: (filename: string): string => {
     return `/api/appeals/files/${filename}`;
   },
+  
+  subscribeEvents: (onEvent: (event: AppealEvent) => void, onReconnect?: () => void): (() => void) => {
+    const token = localStorage.getItem('token') ?? '';
+    const source = new EventSource(`/api/appeals/events?token=${encodeURIComponent(token)}`);
+    let interrupted = false;
+    source.onmessage = (message) => {
+      onEvent(JSON.parse(message.data) as AppealEvent);
+    };
+    source.onerror = () => {
+      interrupted = true;
+    };
+    source.onopen = () => {
+      // Events published while disconnected are lost, so catch up once
+      if (interrupted) {
+        interrupted = false;
+        onReconnect?.();
+      }
+    };
+    return () => source.close();
+  },
 };
 
 export const usersApi = {
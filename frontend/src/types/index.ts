@@ -73,6 +73,53 @@ export interface Appeal {
   updated_at: string;
 }
 
+// Row of GET /appeals?view=summary; full Appeal objects (events, search) fit it too
+export interface AppealSummary {
+  id: number;
+  status: Appeal['status'];
+  is_anonymous: boolean;
+  author_name?: string;
+  category_id?: number;
+  category?: Pick<Category, 'id' | 'name'>;
+  text: string;
+  text_truncated?: boolean;
+  attachments_count?: number;
+  public_tags?: Pick<Tag, 'id' | 'name' | 'color'>[];
+  internal_tags?: Pick<Tag, 'id' | 'name' | 'color'>[];
+  comments?: Comment[];
+  created_at: string;
+  updated_at: string;
+}
+
+export interface AppealBulkUpdate {
+  appeal_ids: number[];
+  status?: string;
+  category_id?: number; // 0 clears the category
+  add_public_tag_ids?: number[];
+  remove_public_tag_ids?: number[];
+  add_internal_tag_ids?: number[];
+  remove_internal_tag_ids?: number[];
+}
+
+export interface AppealBulkItemResult {
+  appeal_id: number;
+  success: boolean;
+  changed: boolean;
+  detail?: string | null;
+}
+
+export interface AppealChanges {
+  appeals: Appeal[];
+  deleted: number[];
+  token: string;
+  has_more: boolean;
+}
+
+export type AppealEvent =
+  | { type: 'appeal_created' | 'appeal_updated' | 'status_changed' | 'tags_changed'; appeal_id: number; appeal: Appeal }
+  | { type: 'comment_added'; appeal_id: number; comment: Comment }
+  | { type: 'resync' };
+
 export interface AppealCreate {
   author_name?: string;
   email?: string;
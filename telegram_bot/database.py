@@ -1,42 +1,92 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean, ForeignKey, BigInteger, Table
+from sqlalchemy import create_engine, event, Column, Integer, String, Text, DateTime, Boolean, ForeignKey, BigInteger, Table
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
 from typing import Optional, List, Dict
+import json
+import logging
 import os
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 USE_SQLITE = os.environ.get("USE_SQLITE", "true").lower() == "true"
 
 if USE_SQLITE:
     db_path = Path(__file__).parent.parent / "backend" / "citizens_appeals.db"
-    DATABASE_URL = f"sqlite:///{db_path}"
+    # docker-compose points both services at the shared sqlite_data volume
+    DATABASE_URL = os.environ.get("DATABASE_URL", "")
+    if not DATABASE_URL.startswith("sqlite"):
+        DATABASE_URL = f"sqlite:///{db_path}"
 else:
     DATABASE_URL = os.environ.get("DATABASE_URL", "")
     if not DATABASE_URL:
         raise Exception("DATABASE_URL environment variable is not set!")
 
-connect_args = {}
-engine_kwargs = {}
+# Same connection profile as backend/app/core/database.py; both processes share the file
+SQLITE_PROFILE = os.environ.get("SQLITE_PROFILE", "true").lower() == "true"
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    f"PRAGMA synchronous={os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')}",
+    f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+    f"PRAGMA cache_size=-{int(os.environ.get('SQLITE_CACHE_SIZE_KB', '16384'))}",
+    f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', '268435456'))}",
+    "PRAGMA temp_store=MEMORY",
+]
+
+
+def apply_sqlite_profile(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def build_engine(url: str):
+    connect_args = {}
+    engine_kwargs = {}
+    if url.startswith("sqlite"):
+        connect_args = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+    else:
+        engine_kwargs = {
+            "pool_size": 5,
+            "max_overflow": 10,
+            "pool_timeout": 30,
+            "pool_recycle": 1800,
+            "pool_pre_ping": True,
+        }
+    
+    built = create_engine(
+        url,
+        connect_args=connect_args,
+        **engine_kwargs
+    )
+    
+    if url.startswith("sqlite") and SQLITE_PROFILE:
+        event.listen(built, "connect", apply_sqlite_profile)
+    return built
+
 
-if DATABASE_URL.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
-else:
-    engine_kwargs = {
-        "pool_size": 5,
-        "max_overflow": 10,
-        "pool_timeout": 30,
-        "pool_recycle": 1800,
-        "pool_pre_ping": True,
-    }
+engine = build_engine(DATABASE_URL)
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args=connect_args,
-    **engine_kwargs
-)
+# Optional read replica for the lookups below (same idea as READ_REPLICA_URLS in the backend)
+READ_DATABASE_URL = os.environ.get("READ_DATABASE_URL", "")
+read_engine = build_engine(READ_DATABASE_URL) if READ_DATABASE_URL else None
+
+
+def check_sqlite_profile() -> Dict[str, object]:
+    with engine.connect() as conn:
+        return {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in ("journal_mode", "synchronous", "busy_timeout")
+        }
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine) if read_engine else None
 
 Base = declarative_base()
 
@@ -103,6 +153,30 @@ class Appeal(Base):
     public_tags = relationship("PublicTag", secondary=appeal_public_tags)
 
 
+class ArchivedAppeal(Base):
+    """Closed appeals the backend moved out of `appeals` (backend/app/services/archive.py)."""
+    __tablename__ = "archived_appeals"
+    
+    id = Column(Integer, primary_key=True)
+    status = Column(String, nullable=False)
+    category_id = Column(Integer, nullable=True)
+    telegram_user_id = Column(BigInteger, nullable=True, index=True)
+    created_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow, index=True)
+    payload = Column(Text, nullable=False)
+
+
+def appeal_from_archive(payload: str) -> Appeal:
+    """A detached Appeal rebuilt from the JSON the backend archived it as."""
+    values = json.loads(payload)["appeal"]
+    columns = {column.name for column in Appeal.__table__.columns}
+    row = {key: value for key, value in values.items() if key in columns}
+    for key in ("created_at", "updated_at"):
+        if row.get(key):
+            row[key] = datetime.fromisoformat(row[key])
+    return Appeal(**row)
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -111,31 +185,51 @@ def get_db():
         db.close()
 
 
+def read_session():
+    """Session on the read replica when it answers, otherwise on the primary."""
+    if ReadSessionLocal is not None:
+        db = ReadSessionLocal()
+        try:
+            db.connection()
+            return db
+        except OperationalError as e:
+            db.close()
+            logger.warning(f"Read replica unavailable, using the primary: {e.orig}")
+    return SessionLocal()
+
+
 def get_user_appeals(telegram_user_id: int) -> List[Appeal]:
-    db = SessionLocal()
+    db = read_session()
     try:
         appeals = db.query(Appeal).filter(
             Appeal.telegram_user_id == telegram_user_id
-        ).order_by(Appeal.created_at.desc()).all()
+        ).all()
         db.expunge_all()
+        archived = db.query(ArchivedAppeal.payload).filter(
+            ArchivedAppeal.telegram_user_id == telegram_user_id
+        ).all()
+        appeals += [appeal_from_archive(payload) for payload, in archived]
+        appeals.sort(key=lambda appeal: appeal.created_at or datetime.min, reverse=True)
         return appeals
     finally:
         db.close()
 
 
 def get_appeal_by_id(appeal_id: int) -> Optional[Appeal]:
-    db = SessionLocal()
+    db = read_session()
     try:
         appeal = db.query(Appeal).filter(Appeal.id == appeal_id).first()
         if appeal:
             db.expunge(appeal)
-        return appeal
+            return appeal
+        archived = db.query(ArchivedAppeal.payload).filter(ArchivedAppeal.id == appeal_id).scalar()
+        return appeal_from_archive(archived) if archived is not None else None
     finally:
         db.close()
 
 
 def get_status_config(status_key: str) -> Optional[AppealStatusConfig]:
-    db = SessionLocal()
+    db = read_session()
     try:
         config = db.query(AppealStatusConfig).filter(
             AppealStatusConfig.status_key == status_key
@@ -148,7 +242,7 @@ def get_status_config(status_key: str) -> Optional[AppealStatusConfig]:
 
 
 def get_category_name(category_id: int) -> str:
-    db = SessionLocal()
+    db = read_session()
     try:
         category = db.query(Category).filter(Category.id == category_id).first()
         return category.name if category else "Не указана"
@@ -157,7 +251,7 @@ def get_category_name(category_id: int) -> str:
 
 
 def get_all_status_configs() -> List[AppealStatusConfig]:
-    db = SessionLocal()
+    db = read_session()
     try:
         configs = db.query(AppealStatusConfig).filter(
             AppealStatusConfig.status_key.isnot(None),
@@ -2,6 +2,7 @@ import asyncio
 import logging
 import os
 import sys
+import time
 from aiohttp import web
 
 from aiogram import Bot, Dispatcher
@@ -10,6 +11,13 @@ from aiogram.client.default import DefaultBotProperties
 
 from handlers import router
 from notification_service import send_status_notification
+from database import engine, check_sqlite_profile
+from tracing import SPAN_KIND_CLIENT, start_span, trace_requests
+from metrics import (
+    render as render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    BOT_UPDATE_DURATION, BOT_UPDATE_FAILURES, BOT_HTTP_REQUEST_DURATION,
+    BOT_NOTIFICATION_DURATION, BOT_NOTIFICATION_FAILURES
+)
 
 logging.basicConfig(level=logging.INFO, stream=sys.stdout)
 logger = logging.getLogger(__name__)
@@ -65,6 +73,42 @@ async def handle_notification(request):
         return web.json_response({"error": str(e)}, status=500)
 
 
+async def handle_batch_notification(request):
+    global bot
+    
+    if NOTIFY_SECRET:
+        auth_header = request.headers.get("Authorization", "")
+        expected_header = f"Bearer {NOTIFY_SECRET}"
+        if auth_header != expected_header:
+            logger.warning("Unauthorized batch notification request")
+            return web.json_response({"error": "Unauthorized"}, status=401)
+    
+    if not bot:
+        return web.json_response({"error": "Bot not initialized"}, status=500)
+    
+    try:
+        data = await request.json()
+        notifications = data.get("notifications", [])
+        
+        sent_count = 0
+        for item in notifications:
+            telegram_user_id = item.get("telegram_user_id")
+            appeal_id = item.get("appeal_id")
+            old_status = item.get("old_status")
+            new_status = item.get("new_status")
+            if not all([telegram_user_id, appeal_id, old_status, new_status]):
+                continue
+            if await send_status_notification(bot, int(telegram_user_id), int(appeal_id), old_status, new_status):
+                sent_count += 1
+        
+        logger.info(f"Batch notification: sent {sent_count}/{len(notifications)}")
+        return web.json_response({"status": "sent", "sent_count": sent_count})
+            
+    except Exception as e:
+        logger.error(f"Error handling batch notification request: {e}")
+        return web.json_response({"error": str(e)}, status=500)
+
+
 async def handle_admin_notification(request):
     global bot
     
@@ -116,15 +160,19 @@ async def handle_admin_notification(request):
         
         sent_count = 0
         for telegram_id in admin_telegram_ids:
+            started = time.perf_counter()
             try:
-                await bot.send_message(
-                    chat_id=telegram_id,
-                    text=message_text,
-                    reply_markup=keyboard
-                )
+                with start_span("telegram sendMessage", kind=SPAN_KIND_CLIENT, **{"notification.kind": "admin"}):
+                    await bot.send_message(
+                        chat_id=telegram_id,
+                        text=message_text,
+                        reply_markup=keyboard
+                    )
                 sent_count += 1
             except Exception as e:
                 logger.error(f"Failed to send admin notification to {telegram_id}: {e}")
+                BOT_NOTIFICATION_FAILURES.inc(kind="admin")
+            BOT_NOTIFICATION_DURATION.observe(time.perf_counter() - started, kind="admin")
         
         logger.info(f"Admin notification sent for appeal {appeal_id} to {sent_count}/{len(admin_telegram_ids)} admins")
         return web.json_response({"status": "sent", "sent_count": sent_count})
@@ -138,11 +186,46 @@ async def health_check(request):
     return web.json_response({"status": "ok", "bot_running": bot is not None})
 
 
+async def metrics_handler(request):
+    return web.Response(body=render_metrics().encode("utf-8"), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
+
+@web.middleware
+async def record_request_metrics(request, handler):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else "unmatched"
+        BOT_HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, route=route, status=status)
+
+
+async def record_update_metrics(handler, event, data):
+    """Outer middleware on dp.update: how long each Telegram update takes to handle."""
+    update_type = event.event_type
+    started = time.perf_counter()
+    try:
+        return await handler(event, data)
+    except Exception:
+        BOT_UPDATE_FAILURES.inc(update_type=update_type)
+        raise
+    finally:
+        BOT_UPDATE_DURATION.observe(time.perf_counter() - started, update_type=update_type)
+
+
 async def start_web_server():
-    app = web.Application()
+    app = web.Application(middlewares=[trace_requests, record_request_metrics])
     app.router.add_post('/notify', handle_notification)
+    app.router.add_post('/notify_batch', handle_batch_notification)
     app.router.add_post('/notify_admins', handle_admin_notification)
     app.router.add_get('/health', health_check)
+    app.router.add_get('/metrics', metrics_handler)
     
     runner = web.AppRunner(app)
     await runner.setup()
@@ -165,12 +248,19 @@ async def main():
     if not NOTIFY_SECRET:
         logger.warning("NOTIFY_SECRET not set! /notify endpoint will accept unauthenticated requests.")
     
+    if engine.dialect.name == "sqlite":
+        profile = check_sqlite_profile()
+        logger.info(f"SQLite profile: {profile}")
+        if str(profile["journal_mode"]).lower() != "wal":
+            logger.warning("SQLite is not in WAL mode; the bot and the API will block each other")
+    
     bot = Bot(
         token=BOT_TOKEN, 
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
     
     dp = Dispatcher()
+    dp.update.outer_middleware(record_update_metrics)
     dp.include_router(router)
     
     web_runner = await start_web_server()
@@ -3,7 +3,10 @@ from aiogram.enums import ParseMode
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from database import get_status_display_info
+from metrics import BOT_NOTIFICATION_DURATION, BOT_NOTIFICATION_FAILURES
+from tracing import SPAN_KIND_CLIENT, start_span
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +35,7 @@ async def send_status_notification(
     old_status: str,
     new_status: str
 ):
+    started = time.perf_counter()
     try:
         new_info = get_status_display_info(new_status)
         old_info = get_status_display_info(old_status)
@@ -77,16 +81,21 @@ async def send_status_notification(
 <i>👇 Нажмите кнопку для просмотра:</i>
 """
         
-        await bot.send_message(
-            chat_id=telegram_user_id,
-            text=message_text,
-            parse_mode=ParseMode.HTML,
-            reply_markup=get_notification_keyboard(appeal_id)
-        )
+        with start_span("telegram sendMessage", kind=SPAN_KIND_CLIENT,
+                        **{"notification.kind": "status", "appeal.id": appeal_id}):
+            await bot.send_message(
+                chat_id=telegram_user_id,
+                text=message_text,
+                parse_mode=ParseMode.HTML,
+                reply_markup=get_notification_keyboard(appeal_id)
+            )
         
         logger.info(f"Notification sent to user {telegram_user_id} for appeal {appeal_id}: {old_status} -> {new_status}")
+        BOT_NOTIFICATION_DURATION.observe(time.perf_counter() - started, kind="status")
         return True
         
     except Exception as e:
         logger.error(f"Failed to send notification to user {telegram_user_id}: {e}")
+        BOT_NOTIFICATION_DURATION.observe(time.perf_counter() - started, kind="status")
+        BOT_NOTIFICATION_FAILURES.inc(kind="status")
         return False
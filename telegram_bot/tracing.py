@@ -0,0 +1,169 @@
+"""
+W3C trace context for the notification server (TRACING_ENABLED=true).
+
+The backend sends a `traceparent` header with every /notify* call; the
+trace_requests middleware continues that trace with a server span, and
+start_span() adds child spans for the Bot API calls. Spans are written in the
+same OTLP/JSON lines format as backend/app/core/tracing.py, to
+TRACE_EXPORT_FILE (logs/traces.jsonl by default; empty: the log), so
+`python -m app.core.tracing` in the backend can summarize both files.
+"""
+import json
+import logging
+import logging.handlers
+import os
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "citizens-appeals-bot"
+
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "").lower() in ("1", "true", "yes")
+TRACE_EXPORT_FILE = os.environ.get("TRACE_EXPORT_FILE", "logs/traces.jsonl")
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: int, attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes)
+        self.status = STATUS_OK
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": [span]}],
+        }]}
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(header: Optional[str]):
+    """(trace_id, parent span_id) of a valid version-00 traceparent, else None."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or parts[0] != "00" or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    trace_id, span_id = parts[1].lower(), parts[2].lower()
+    try:
+        int(trace_id, 16), int(span_id, 16), int(parts[3], 16)
+    except ValueError:
+        return None
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id
+
+
+_export_logger = None
+
+
+def export(span: Span):
+    global _export_logger
+    if _export_logger is None:
+        _export_logger = logging.getLogger("tracing.spans")
+        if TRACE_EXPORT_FILE and not _export_logger.handlers:
+            directory = os.path.dirname(TRACE_EXPORT_FILE)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                TRACE_EXPORT_FILE, maxBytes=20 * 1024 * 1024, backupCount=3, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            _export_logger.addHandler(handler)
+            _export_logger.propagate = False
+        _export_logger.setLevel(logging.INFO)
+    _export_logger.info(json.dumps(span.to_otlp(), ensure_ascii=False))
+
+
+@contextmanager
+def start_span(name: str, kind: int = SPAN_KIND_INTERNAL, traceparent: Optional[str] = None, **attributes):
+    if not TRACING_ENABLED:
+        yield None
+        return
+    remote = parse_traceparent(traceparent)
+    parent = current_span.get()
+    if remote:
+        trace_id, parent_id = remote
+    elif parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+    span = Span(name, trace_id, parent_id, kind, attributes)
+    token = current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = STATUS_ERROR
+        span.set_attribute("exception.type", type(e).__name__)
+        raise
+    finally:
+        current_span.reset(token)
+        span.end_ns = time.time_ns()
+        export(span)
+
+
+@web.middleware
+async def trace_requests(request, handler):
+    route = request.match_info.route.resource.canonical if request.match_info.route.resource else "unmatched"
+    with start_span(
+        f"{request.method} {route}",
+        kind=SPAN_KIND_SERVER,
+        traceparent=request.headers.get("traceparent"),
+        **{"http.method": request.method, "http.route": route}
+    ) as span:
+        try:
+            response = await handler(request)
+        except web.HTTPException as e:
+            if span is not None:
+                span.set_attribute("http.status_code", e.status)
+            raise
+        if span is not None:
+            span.set_attribute("http.status_code", response.status)
+            if response.status >= 500:
+                span.status = STATUS_ERROR
+        return response